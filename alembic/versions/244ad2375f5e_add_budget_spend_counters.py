@@ -0,0 +1,55 @@
+"""add budget spend counters
+
+Revision ID: 244ad2375f5e
+Revises: bbc67b745ce9
+Create Date: 2026-10-19 10:41:07.553921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '244ad2375f5e'
+down_revision = 'bbc67b745ce9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Счетчики потраченного по бюджету за период
+    op.create_table(
+        'budget_spend',
+        sa.Column('budget_id', sa.Integer(), nullable=False),
+        sa.Column('period_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('spent', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['budget_id'], ['budgets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('budget_id', 'period_start')
+    )
+
+    # 2. Заполняем счетчики текущего периода для активных бюджетов
+    op.execute("""
+        INSERT INTO budget_spend (budget_id, period_start, spent)
+        SELECT b.id, p.period_start, coalesce(sum(o.amount), 0)
+        FROM budgets b
+        CROSS JOIN LATERAL (
+            SELECT date_trunc(CASE b.period WHEN 'daily' THEN 'day'
+                                            WHEN 'weekly' THEN 'week'
+                                            ELSE 'month' END, now()) AS period_start,
+                   CASE b.period WHEN 'daily' THEN interval '1 day'
+                                 WHEN 'weekly' THEN interval '1 week'
+                                 ELSE interval '1 month' END AS period_length
+        ) p
+        LEFT JOIN operations o
+               ON o.user_id = b.user_id
+              AND (b.category_id IS NULL OR o.category_id = b.category_id)
+              AND o.type = 'expense'
+              AND o.occurred_at >= greatest(p.period_start, b.start_date)
+              AND o.occurred_at < p.period_start + p.period_length
+              AND (b.end_date IS NULL OR o.occurred_at <= b.end_date)
+        WHERE b.is_active = TRUE
+        GROUP BY b.id, p.period_start;
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('budget_spend')
@@ -0,0 +1,49 @@
+"""add limit notifications
+
+Revision ID: 5c1d0e7a9f32
+Revises: 244ad2375f5e
+Create Date: 2026-10-19 11:05:26.904113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5c1d0e7a9f32'
+down_revision = '244ad2375f5e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Очередь и отметки уведомлений о лимитах
+    op.create_table(
+        'limit_notifications',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period_key', sa.String(length=20), nullable=False),
+        sa.Column('level', sa.String(length=10), nullable=False),
+        sa.Column('spent', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('limit_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'period_key', 'level')
+    )
+    op.create_index(
+        'ix_limit_notifications_pending', 'limit_notifications', ['created_at'],
+        postgresql_where=sa.text('sent_at IS NULL')
+    )
+
+    # 2. Частичный индекс для выборки пользователей с лимитами по часовому поясу
+    op.create_index(
+        'ix_users_limit_notifications', 'users', ['timezone'],
+        postgresql_where=sa.text(
+            'notification_enabled AND is_active AND (daily_limit IS NOT NULL OR monthly_limit IS NOT NULL)'
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_limit_notifications', table_name='users')
+    op.drop_index('ix_limit_notifications_pending', table_name='limit_notifications')
+    op.drop_table('limit_notifications')
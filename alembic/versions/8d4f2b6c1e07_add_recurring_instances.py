@@ -0,0 +1,45 @@
+"""add recurring instances
+
+Revision ID: 8d4f2b6c1e07
+Revises: 5c1d0e7a9f32
+Create Date: 2026-10-19 11:38:52.207416
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8d4f2b6c1e07'
+down_revision = '5c1d0e7a9f32'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Связь сгенерированной операции с шаблоном и плановой датой
+    op.add_column('operations', sa.Column('recurring_template_id', sa.Integer(), nullable=True))
+    op.add_column('operations', sa.Column('recurring_period_start', sa.DateTime(timezone=True), nullable=True))
+    op.create_foreign_key(
+        'fk_operations_recurring_template', 'operations', 'operations',
+        ['recurring_template_id'], ['id'], ondelete='SET NULL'
+    )
+
+    # 2. Одна операция на шаблон и период; индекс также дает последнюю дату повторения
+    op.create_unique_constraint(
+        'uq_operations_recurring_period', 'operations',
+        ['recurring_template_id', 'recurring_period_start']
+    )
+
+    # 3. Быстрый поиск шаблонов
+    op.create_index(
+        'ix_operations_recurring_templates', 'operations', ['id'],
+        postgresql_where=sa.text('is_recurring')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_operations_recurring_templates', table_name='operations')
+    op.drop_constraint('uq_operations_recurring_period', 'operations', type_='unique')
+    op.drop_constraint('fk_operations_recurring_template', 'operations', type_='foreignkey')
+    op.drop_column('operations', 'recurring_period_start')
+    op.drop_column('operations', 'recurring_template_id')
@@ -0,0 +1,44 @@
+"""add operation search
+
+Revision ID: a4e9c2f7b318
+Revises: f1b8d3a6c492
+Create Date: 2026-10-19 13:41:07.552019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'a4e9c2f7b318'
+down_revision = 'f1b8d3a6c492'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Нечеткий поиск по триграммам
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # 2. Полнотекстовый вектор описания, вычисляемый БД
+    op.add_column(
+        'operations',
+        sa.Column(
+            'search_vector', postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('russian'::regconfig, coalesce(description, ''))", persisted=True),
+            nullable=True
+        )
+    )
+
+    # 3. GIN-индексы для @@ и для %, <% (pg_trgm)
+    op.create_index('ix_operations_search_vector', 'operations', ['search_vector'], postgresql_using='gin')
+    op.create_index(
+        'ix_operations_description_trgm', 'operations', ['description'],
+        postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_operations_description_trgm', table_name='operations')
+    op.drop_index('ix_operations_search_vector', table_name='operations')
+    op.drop_column('operations', 'search_vector')
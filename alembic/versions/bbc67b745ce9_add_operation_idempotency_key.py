@@ -0,0 +1,27 @@
+"""add operation idempotency key
+
+Revision ID: bbc67b745ce9
+Revises: e2153238aa62
+Create Date: 2026-10-19 10:12:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'bbc67b745ce9'
+down_revision = 'e2153238aa62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Ключ идемпотентности для операций, выгружаемых из локальной очереди
+    op.add_column('operations', sa.Column('idempotency_key', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_unique_constraint('uq_operations_idempotency_key', 'operations', ['idempotency_key'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_operations_idempotency_key', 'operations', type_='unique')
+    op.drop_column('operations', 'idempotency_key')
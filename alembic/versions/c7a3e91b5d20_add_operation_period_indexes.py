@@ -0,0 +1,31 @@
+"""add operation period indexes
+
+Revision ID: c7a3e91b5d20
+Revises: 8d4f2b6c1e07
+Create Date: 2026-10-19 12:20:14.631870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c7a3e91b5d20'
+down_revision = '8d4f2b6c1e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Выборка операций пользователя за период
+    op.create_index('ix_operations_user_occurred_at', 'operations', ['user_id', 'occurred_at'])
+
+    # 2. Группировка по локальным месяцам для пояса по умолчанию (Europe/Moscow)
+    op.create_index(
+        'ix_operations_user_local_month', 'operations',
+        ['user_id', sa.text("date_trunc('month', timezone('Europe/Moscow', occurred_at))")]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_operations_user_local_month', table_name='operations')
+    op.drop_index('ix_operations_user_occurred_at', table_name='operations')
@@ -0,0 +1,40 @@
+"""add operation tag list
+
+Revision ID: d2c6a8e4f153
+Revises: a4e9c2f7b318
+Create Date: 2026-10-19 14:22:51.906344
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'd2c6a8e4f153'
+down_revision = 'a4e9c2f7b318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Массив тегов; NOT NULL с константным значением по умолчанию
+    #    добавляется без перезаписи таблицы
+    op.add_column(
+        'operations',
+        sa.Column('tag_list', postgresql.ARRAY(sa.Text()), server_default=sa.text("'{}'"), nullable=False)
+    )
+
+    # 2. GIN-индекс для фильтра по тегам (@>) строится без блокировки записи.
+    #    Старые JSON-строки из operations.tags переносит фоновая задача
+    #    (app/services/tags.py) пачками в коротких транзакциях
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_operations_tag_list', 'operations', ['tag_list'],
+            postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_operations_tag_list', table_name='operations', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('operations', 'tag_list')
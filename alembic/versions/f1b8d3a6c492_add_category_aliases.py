@@ -0,0 +1,33 @@
+"""add category aliases
+
+Revision ID: f1b8d3a6c492
+Revises: c7a3e91b5d20
+Create Date: 2026-10-19 12:58:40.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f1b8d3a6c492'
+down_revision = 'c7a3e91b5d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Выученные синонимы категорий для быстрого ввода
+    op.create_table(
+        'category_aliases',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('alias', sa.String(length=64), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'alias')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('category_aliases')
@@ -1,413 +1,1237 @@
-from datetime import datetime, timedelta, timezone
-from decimal import Decimal
-from typing import List, Optional, Dict, Any
-from sqlalchemy import select, func, and_, or_, desc, asc, insert, delete
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-
-from .models import User, Operation, Category, Budget, user_categories
-from ..schemas.user import UserCreate, UserUpdate
-from ..schemas.operation import OperationCreate, OperationUpdate
-
-class UserCRUD:
-    @staticmethod
-    async def get_by_telegram_id(db: AsyncSession, telegram_id: int) -> Optional[User]:
-        """Получить пользователя по telegram_id"""
-        result = await db.execute(
-            select(User).where(User.telegram_id == telegram_id)
-        )
-        return result.scalar_one_or_none()
-    
-    @staticmethod
-    async def create_user(db: AsyncSession, telegram_id: int, first_name: str, 
-                         last_name: Optional[str] = None, username: Optional[str] = None) -> User:
-        """Создать нового пользователя с базовыми категориями"""
-        user = User(
-            telegram_id=telegram_id,
-            first_name=first_name,
-            last_name=last_name,
-            username=username
-        )
-        db.add(user)
-        await db.flush()  # Получаем ID пользователя
-    
-        # Добавляем базовые категории
-        await CategoryCRUD.ensure_user_has_default_categories(db, user.id)
-    
-        await db.commit()
-        return user
-    
-    @staticmethod
-    async def update(db: AsyncSession, user: User, user_data: UserUpdate) -> User:
-        """Обновить данные пользователя"""
-        for field, value in user_data.dict(exclude_unset=True).items():
-            setattr(user, field, value)
-        
-        await db.commit()
-        await db.refresh(user)
-        return user
-    
-    @staticmethod
-    async def get_or_create_user(db: AsyncSession, telegram_id: int, **kwargs) -> tuple[User, bool]:
-        """Получить существующего пользователя или создать нового"""
-        user = await UserCRUD.get_by_telegram_id(db, telegram_id)
-        
-        if user:
-            return user, False
-        
-        # Создаем нового пользователя
-        user = await UserCRUD.create_user(
-            db, 
-            telegram_id=telegram_id,
-            first_name=kwargs.get('first_name', 'Пользователь'),
-            last_name=kwargs.get('last_name'),
-            username=kwargs.get('username')
-        )
-        
-        return user, True
-
-
-class CategoryCRUD:
-    @staticmethod
-    async def get_user_categories(db: AsyncSession, user_id: int, is_income: Optional[bool] = None) -> List[Category]:
-        """Получить категории пользователя"""
-        query = (
-            select(Category)
-            .join(user_categories, Category.id == user_categories.c.category_id)
-            .where(user_categories.c.user_id == user_id)
-            .where(Category.is_active == True)
-        )
-    
-        if is_income is not None:
-            query = query.where(Category.is_income == is_income)
-        
-        query = query.order_by(Category.name)
-        result = await db.execute(query)
-        return result.scalars().all()
-    
-    @staticmethod
-    async def get_category_by_id(db: AsyncSession, category_id: int) -> Optional[Category]:
-        """Получить категорию по ID"""
-        result = await db.execute(
-            select(Category).where(Category.id == category_id)
-        )
-        return result.scalar_one_or_none()
-    
-    @staticmethod
-    async def create_or_get_category(db: AsyncSession, name: str, icon: str, is_income: bool) -> Category:
-        """Создать новую категорию или получить существующую по имени"""
-        # Проверяем существование категории
-        result = await db.execute(
-            select(Category).where(Category.name == name)
-        )
-        category = result.scalar_one_or_none()
-    
-        if not category:
-            category = Category(
-                name=name,
-                icon=icon,
-                is_income=is_income,
-                is_default=False,
-                is_active=True
-            )
-            db.add(category)
-            await db.flush()
-        
-        return category
-    
-    @staticmethod
-    async def add_category_to_user(db: AsyncSession, user_id: int, category_id: int) -> bool:
-        """Добавить категорию пользователю"""
-        # Проверяем, есть ли уже такая связь
-        result = await db.execute(
-            select(user_categories)
-            .where(
-                and_(
-                    user_categories.c.user_id == user_id,
-                    user_categories.c.category_id == category_id
-                )
-            )
-        )
-    
-        if result.scalar_one_or_none():
-            return False  # Связь уже существует
-    
-        # Создаем связь
-        stmt = insert(user_categories).values(
-            user_id=user_id,
-            category_id=category_id
-        )
-        await db.execute(stmt)
-        return True
-    
-    @staticmethod
-    async def remove_category_from_user(db: AsyncSession, user_id: int, category_id: int) -> bool:
-        """Удалить категорию у пользователя"""
-        stmt = delete(user_categories).where(
-            and_(
-                user_categories.c.user_id == user_id,
-                user_categories.c.category_id == category_id
-            )
-        )
-        result = await db.execute(stmt)
-        return result.rowcount > 0
-    
-    @staticmethod
-    async def ensure_user_has_default_categories(db: AsyncSession, user_id: int):
-        """Убедиться, что у пользователя есть все базовые категории"""
-        # Получаем базовые категории
-        default_categories = await db.execute(
-            select(Category).where(Category.is_default == True)
-        )
-        default_categories = default_categories.scalars().all()
-        
-        # Получаем категории пользователя
-        user_category_ids = await db.execute(
-            select(user_categories.c.category_id)
-            .where(user_categories.c.user_id == user_id)
-        )
-        user_category_ids = {row[0] for row in user_category_ids.all()}
-        
-        # Добавляем недостающие базовые категории
-        for category in default_categories:
-            if category.id not in user_category_ids:
-                await CategoryCRUD.add_category_to_user(db, user_id, category.id)
-                
-    @staticmethod
-    async def get_category_by_id(db: AsyncSession, category_id: int) -> Category:
-        """Получить категорию по ID"""
-        from sqlalchemy import select
-        result = await db.execute(
-            select(Category).where(Category.id == category_id)
-        )
-        return result.scalar_one_or_none()
-
-    @staticmethod  
-    async def remove_category_from_user(db: AsyncSession, user_id: int, category_id: int) -> bool:
-        """Удалить связь категории с пользователем"""
-        from sqlalchemy import delete, and_
-        from app.database.models import user_categories
-    
-        result = await db.execute(
-            delete(user_categories).where(
-                and_(
-                    user_categories.c.user_id == user_id,
-                    user_categories.c.category_id == category_id
-                )
-            )
-        )
-        return result.rowcount > 0
-
-
-class OperationCRUD:
-    @staticmethod
-    async def create(db: AsyncSession, operation_data: OperationCreate, user_id: int) -> Operation:
-        """Создать новую операцию"""
-        operation = Operation(**operation_data.dict(), user_id=user_id)
-        db.add(operation)
-        await db.commit()
-        await db.refresh(operation)
-        return operation
-    
-    @staticmethod
-    async def get_operations_by_user(db: AsyncSession, user_id: int, limit: int = 100) -> List[Operation]:
-        """Получить операции пользователя с категориями"""
-        query = (
-            select(Operation)
-            .options(selectinload(Operation.category))
-            .where(Operation.user_id == user_id)
-            .order_by(Operation.created_at.desc())
-            .limit(limit)
-        )
-        
-        result = await db.execute(query)
-        return result.scalars().all()
-    
-    @staticmethod
-    async def get_by_id(db: AsyncSession, operation_id: int, user_id: int) -> Optional[Operation]:
-        """Получить операцию по ID для конкретного пользователя"""
-        result = await db.execute(
-            select(Operation).options(selectinload(Operation.category)).where(
-                and_(Operation.id == operation_id, Operation.user_id == user_id)
-            )
-        )
-        return result.scalar_one_or_none()
-    
-    @staticmethod
-    async def update(db: AsyncSession, operation: Operation, operation_data: OperationUpdate) -> Operation:
-        """Обновить операцию"""
-        for field, value in operation_data.dict(exclude_unset=True).items():
-            setattr(operation, field, value)
-        
-        await db.commit()
-        await db.refresh(operation)
-        return operation
-    
-    @staticmethod
-    async def delete(db: AsyncSession, operation: Operation):
-        """Удалить операцию"""
-        await db.delete(operation)
-        await db.commit()
-    
-    @staticmethod
-    async def get_balance(db: AsyncSession, user_id: int) -> Dict[str, Decimal]:
-        """Получить баланс пользователя"""
-        # Получаем сумму доходов
-        income_result = await db.execute(
-            select(func.coalesce(func.sum(Operation.amount), 0)).where(
-                and_(Operation.user_id == user_id, Operation.type == 'income')
-            )
-        )
-        total_income = income_result.scalar()
-        
-        # Получаем сумму расходов
-        expense_result = await db.execute(
-            select(func.coalesce(func.sum(Operation.amount), 0)).where(
-                and_(Operation.user_id == user_id, Operation.type == 'expense')
-            )
-        )
-        total_expense = expense_result.scalar()
-        
-        balance = total_income - total_expense
-        
-        return {
-            "balance": balance,
-            "total_income": total_income,
-            "total_expense": total_expense
-        }
-    
-    @staticmethod
-    async def get_statistics_by_period(
-        db: AsyncSession, 
-        user_id: int, 
-        start_date: datetime, 
-        end_date: datetime
-    ) -> Dict[str, Any]:
-        """Получить статистику за период"""
-        
-        # Операции за период
-        operations = await OperationCRUD.get_operations_by_user(
-            db, user_id, limit=1000
-        )
-        
-        # Фильтруем по периоду
-        filtered_operations = [
-            op for op in operations
-            if start_date <= op.occurred_at <= end_date
-        ]
-        
-        # Группировка по категориям
-        categories_stats = {}
-        total_income = Decimal('0')
-        total_expense = Decimal('0')
-        
-        for op in filtered_operations:
-            category_name = op.category.name if op.category else "Без категории"
-            
-            if category_name not in categories_stats:
-                categories_stats[category_name] = {
-                    "income": Decimal('0'),
-                    "expense": Decimal('0'),
-                    "count": 0
-                }
-            
-            if op.type == 'income':
-                categories_stats[category_name]["income"] += op.amount
-                total_income += op.amount
-            else:
-                categories_stats[category_name]["expense"] += op.amount
-                total_expense += op.amount
-            
-            categories_stats[category_name]["count"] += 1
-        
-        return {
-            "total_income": total_income,
-            "total_expense": total_expense,
-            "balance": total_income - total_expense,
-            "operations_count": len(filtered_operations),
-            "categories": categories_stats,
-            "period": {
-                "start": start_date,
-                "end": end_date
-            }
-        }
-    
-    @staticmethod
-    async def get_recent_operations(db: AsyncSession, user_id: int, limit: int = 10) -> List[Operation]:
-        """Получить последние операции пользователя"""
-        return await OperationCRUD.get_operations_by_user(db, user_id, limit=limit)
-
-
-class BudgetCRUD:
-    @staticmethod
-    async def create(db: AsyncSession, budget_data: dict) -> Budget:
-        """Создать новый бюджет"""
-        budget = Budget(**budget_data)
-        db.add(budget)
-        await db.commit()
-        await db.refresh(budget)
-        return budget
-    
-    @staticmethod
-    async def get_user_budgets(db: AsyncSession, user_id: int) -> List[Budget]:
-        """Получить активные бюджеты пользователя"""
-        result = await db.execute(
-            select(Budget).options(selectinload(Budget.category)).where(
-                and_(Budget.user_id == user_id, Budget.is_active == True)
-            )
-        )
-        return result.scalars().all()
-    
-    @staticmethod
-    async def check_budget_exceeded(db: AsyncSession, user_id: int, category_id: int, amount: Decimal) -> Optional[Dict]:
-        """Проверить превышение бюджета"""
-        # Получаем активные бюджеты для категории
-        result = await db.execute(
-            select(Budget).where(
-                and_(
-                    Budget.user_id == user_id,
-                    Budget.category_id == category_id,
-                    Budget.is_active == True
-                )
-            )
-        )
-        budget = result.scalar_one_or_none()
-        
-        if not budget:
-            return None
-        
-        # Вычисляем потраченную сумму за период бюджета
-        start_date = budget.start_date
-        end_date = budget.end_date or datetime.now(timezone.utc)
-        
-        spent_result = await db.execute(
-            select(func.coalesce(func.sum(Operation.amount), 0)).where(
-                and_(
-                    Operation.user_id == user_id,
-                    Operation.category_id == category_id,
-                    Operation.type == 'expense',
-                    Operation.occurred_at >= start_date,
-                    Operation.occurred_at <= end_date
-                )
-            )
-        )
-        spent_amount = spent_result.scalar()
-        
-        new_total = spent_amount + amount
-        
-        if new_total > budget.limit_amount:
-            return {
-                "budget_exceeded": True,
-                "budget_limit": budget.limit_amount,
-                "spent_amount": spent_amount,
-                "new_total": new_total,
-                "excess_amount": new_total - budget.limit_amount
-            }
-        
-        return {
-            "budget_exceeded": False,
-            "budget_limit": budget.limit_amount,
-            "spent_amount": spent_amount,
-            "new_total": new_total,
-            "remaining": budget.limit_amount - new_total
-        }
\ No newline at end of file
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+from sqlalchemy import select, func, and_, or_, all_, insert, delete, update, values, union_all, tuple_, column, literal_column, case, cast, literal, extract, true, false, BigInteger, DateTime, Integer, Numeric, String, Text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, INTERVAL, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, aliased
+
+from .models import User, Operation, Category, CategoryAlias, Budget, BudgetSpend, LimitNotification, user_categories
+from .versions import data_versions, category_versions, catalog_versions, limit_counters
+from ..schemas.user import UserCreate, UserUpdate
+from ..schemas.operation import OperationCreate, OperationUpdate
+from ..utils.periods import DEFAULT_TIMEZONE, months_back
+from ..utils.tags import parse_legacy_tags
+
+# Единица date_trunc для периода бюджета
+BUDGET_PERIOD_UNIT = case(
+    (Budget.period == 'daily', 'day'),
+    (Budget.period == 'weekly', 'week'),
+    else_='month',
+)
+
+def budget_period_start(moment):
+    """Начало периода бюджета, в который попадает moment"""
+    return func.date_trunc(BUDGET_PERIOD_UNIT, moment)
+
+def budget_current_window():
+    """Границы текущего периода бюджета [начало, конец)"""
+    period_start = budget_period_start(func.now())
+    period_end = period_start + cast(literal('1 ').concat(BUDGET_PERIOD_UNIT), INTERVAL)
+    return period_start, period_end
+
+def budget_operations_join():
+    """Условие соединения бюджета с расходами его текущего окна"""
+    period_start, period_end = budget_current_window()
+    return and_(
+        Operation.user_id == Budget.user_id,
+        or_(Budget.category_id.is_(None), Operation.category_id == Budget.category_id),
+        Operation.type == 'expense',
+        Operation.occurred_at >= func.greatest(period_start, Budget.start_date),
+        Operation.occurred_at < period_end,
+        or_(Budget.end_date.is_(None), Operation.occurred_at <= Budget.end_date)
+    )
+
+def local_time(moment, tz_name: Optional[str]):
+    """
+    Локальное время пользователя: timezone(tz, occurred_at).
+    Пояс по умолчанию подставляется константой, чтобы запрос совпадал
+    с выражением индекса ix_operations_user_local_month.
+    """
+    if not tz_name or tz_name == DEFAULT_TIMEZONE:
+        return func.timezone(literal_column(f"'{DEFAULT_TIMEZONE}'"), moment)
+    return func.timezone(tz_name, moment)
+
+# Конфигурация полнотекстового поиска; совпадает с выражением search_vector
+SEARCH_CONFIG = literal_column("'russian'::regconfig")
+
+# Ключ advisory-блокировки генерации повторяющихся операций
+RECURRING_LOCK_KEY = 7_310_035
+
+# Допустимые периоды повторения и их шаг
+RECURRING_PERIODS = ('daily', 'weekly', 'monthly')
+
+def recurring_step(period):
+    """Интервал между повторениями шаблона"""
+    unit = case((period == 'daily', 'day'), (period == 'weekly', 'week'), else_='month')
+    return cast(literal('1 ').concat(unit), INTERVAL)
+
+def recurring_steps_between(period, start, end):
+    """Число целых шагов повторения от start до end"""
+    age = func.age(end, start)
+    return cast(
+        case(
+            (period == 'monthly', extract('year', age) * 12 + extract('month', age)),
+            else_=func.floor(
+                extract('epoch', end - start) / case((period == 'weekly', 604800), else_=86400)
+            )
+        ),
+        Integer
+    )
+
+class UserCRUD:
+    @staticmethod
+    async def get_by_telegram_id(db: AsyncSession, telegram_id: int) -> Optional[User]:
+        """Получить пользователя по telegram_id"""
+        result = await db.execute(
+            select(User).where(User.telegram_id == telegram_id)
+        )
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def create_user(db: AsyncSession, telegram_id: int, first_name: str, 
+                         last_name: Optional[str] = None, username: Optional[str] = None) -> User:
+        """Создать нового пользователя с базовыми категориями"""
+        user = User(
+            telegram_id=telegram_id,
+            first_name=first_name,
+            last_name=last_name,
+            username=username
+        )
+        db.add(user)
+        await db.flush()  # Получаем ID пользователя
+    
+        # Добавляем базовые категории
+        await CategoryCRUD.ensure_user_has_default_categories(db, user.id)
+    
+        await db.commit()
+        return user
+    
+    @staticmethod
+    async def update(db: AsyncSession, user: User, user_data: UserUpdate) -> User:
+        """Обновить данные пользователя"""
+        for field, value in user_data.dict(exclude_unset=True).items():
+            setattr(user, field, value)
+        # Часовой пояс определяет периоды отчетов: кэш отчетов устаревает
+        data_versions.touch(db, user.id)
+        
+        await db.commit()
+        await db.refresh(user)
+        return user
+    
+    @staticmethod
+    async def get_or_create_user(db: AsyncSession, telegram_id: int, **kwargs) -> tuple[User, bool]:
+        """Получить существующего пользователя или создать нового"""
+        user = await UserCRUD.get_by_telegram_id(db, telegram_id)
+        
+        if user:
+            return user, False
+        
+        # Создаем нового пользователя
+        user = await UserCRUD.create_user(
+            db, 
+            telegram_id=telegram_id,
+            first_name=kwargs.get('first_name', 'Пользователь'),
+            last_name=kwargs.get('last_name'),
+            username=kwargs.get('username')
+        )
+        
+        return user, True
+
+
+class CategoryCRUD:
+    @staticmethod
+    async def get_user_categories(db: AsyncSession, user_id: int, is_income: Optional[bool] = None) -> List[Category]:
+        """Получить категории пользователя"""
+        query = (
+            select(Category)
+            .join(user_categories, Category.id == user_categories.c.category_id)
+            .where(user_categories.c.user_id == user_id)
+            .where(Category.is_active == True)
+        )
+    
+        if is_income is not None:
+            query = query.where(Category.is_income == is_income)
+        
+        query = query.order_by(Category.name)
+        result = await db.execute(query)
+        return result.scalars().all()
+    
+    @staticmethod
+    async def get_category_by_id(db: AsyncSession, category_id: int) -> Optional[Category]:
+        """Получить категорию по ID"""
+        result = await db.execute(
+            select(Category).where(Category.id == category_id)
+        )
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def get_catalog(db: AsyncSession) -> List[Any]:
+        """Все активные категории (только столбцы, без ORM-объектов) для справочника"""
+        result = await db.execute(
+            select(Category.id, Category.name, Category.icon, Category.is_income, Category.is_default)
+            .where(Category.is_active == True)
+        )
+        return result.all()
+    
+    @staticmethod
+    async def create_or_get_category(db: AsyncSession, name: str, icon: str, is_income: bool) -> Category:
+        """Создать новую категорию или получить существующую по имени"""
+        # Проверяем существование категории
+        result = await db.execute(
+            select(Category).where(Category.name == name)
+        )
+        category = result.scalar_one_or_none()
+    
+        if not category:
+            category = Category(
+                name=name,
+                icon=icon,
+                is_income=is_income,
+                is_default=False,
+                is_active=True
+            )
+            db.add(category)
+            await db.flush()
+            catalog_versions.touch(db, 0)
+        
+        return category
+    
+    @staticmethod
+    async def add_category_to_user(db: AsyncSession, user_id: int, category_id: int) -> bool:
+        """Добавить категорию пользователю"""
+        # Проверяем, есть ли уже такая связь
+        result = await db.execute(
+            select(user_categories)
+            .where(
+                and_(
+                    user_categories.c.user_id == user_id,
+                    user_categories.c.category_id == category_id
+                )
+            )
+        )
+    
+        if result.scalar_one_or_none():
+            return False  # Связь уже существует
+    
+        # Создаем связь
+        stmt = insert(user_categories).values(
+            user_id=user_id,
+            category_id=category_id
+        )
+        await db.execute(stmt)
+        data_versions.touch(db, user_id)
+        category_versions.touch(db, user_id)
+        return True
+    
+    @staticmethod
+    async def remove_category_from_user(db: AsyncSession, user_id: int, category_id: int) -> bool:
+        """Удалить категорию у пользователя"""
+        stmt = delete(user_categories).where(
+            and_(
+                user_categories.c.user_id == user_id,
+                user_categories.c.category_id == category_id
+            )
+        )
+        result = await db.execute(stmt)
+        data_versions.touch(db, user_id)
+        category_versions.touch(db, user_id)
+        return result.rowcount > 0
+    
+    @staticmethod
+    async def get_aliases(db: AsyncSession, user_id: int) -> List[Any]:
+        """Выученные синонимы категорий пользователя (слово → категория)"""
+        result = await db.execute(
+            select(CategoryAlias.alias, CategoryAlias.category_id)
+            .where(CategoryAlias.user_id == user_id)
+        )
+        return result.all()
+    
+    @staticmethod
+    async def add_alias(db: AsyncSession, user_id: int, alias: str, category_id: int):
+        """Запомнить синоним категории; повторный синоним переназначается"""
+        stmt = pg_insert(CategoryAlias).values(user_id=user_id, alias=alias, category_id=category_id)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=['user_id', 'alias'],
+                set_={'category_id': stmt.excluded.category_id}
+            )
+        )
+        category_versions.touch(db, user_id)
+    
+    @staticmethod
+    async def ensure_user_has_default_categories(db: AsyncSession, user_id: int):
+        """Убедиться, что у пользователя есть все базовые категории"""
+        # Получаем базовые категории
+        default_categories = await db.execute(
+            select(Category).where(Category.is_default == True)
+        )
+        default_categories = default_categories.scalars().all()
+        
+        # Получаем категории пользователя
+        user_category_ids = await db.execute(
+            select(user_categories.c.category_id)
+            .where(user_categories.c.user_id == user_id)
+        )
+        user_category_ids = {row[0] for row in user_category_ids.all()}
+        
+        # Добавляем недостающие базовые категории
+        for category in default_categories:
+            if category.id not in user_category_ids:
+                await CategoryCRUD.add_category_to_user(db, user_id, category.id)
+                
+    @staticmethod
+    async def get_category_by_id(db: AsyncSession, category_id: int) -> Category:
+        """Получить категорию по ID"""
+        from sqlalchemy import select
+        result = await db.execute(
+            select(Category).where(Category.id == category_id)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod  
+    async def remove_category_from_user(db: AsyncSession, user_id: int, category_id: int) -> bool:
+        """Удалить связь категории с пользователем"""
+        from sqlalchemy import delete, and_
+        from app.database.models import user_categories
+    
+        result = await db.execute(
+            delete(user_categories).where(
+                and_(
+                    user_categories.c.user_id == user_id,
+                    user_categories.c.category_id == category_id
+                )
+            )
+        )
+        data_versions.touch(db, user_id)
+        category_versions.touch(db, user_id)
+        return result.rowcount > 0
+
+
+class OperationCRUD:
+    @staticmethod
+    async def create(db: AsyncSession, operation_data: OperationCreate, user_id: int) -> Operation:
+        """Создать новую операцию"""
+        operation = Operation(**operation_data.dict(), user_id=user_id)
+        db.add(operation)
+        await db.flush()
+        await BudgetCRUD.track_operation(db, operation)
+        data_versions.touch(db, user_id)
+        # Значения по умолчанию из БД читаются до коммита: после него
+        # обращений к БД нет, и сбой после записи нельзя принять за
+        # незаписанную операцию (обработчик отправил бы ее в очередь повторно)
+        await db.refresh(operation)
+        await db.commit()
+        return operation
+    
+    @staticmethod
+    async def create_spooled(db: AsyncSession, spooled: list) -> Tuple[int, list]:
+        """
+        Записать операции из локальной очереди одним INSERT.
+        Пользователь определяется по telegram_id, дубликаты отсекаются
+        по ключу идемпотентности. Возвращает число вставленных операций
+        и ключи операций, для которых пользователь не найден (они не
+        записываются).
+        """
+        known = set((await db.execute(
+            select(User.telegram_id).where(User.telegram_id.in_({item.telegram_id for item in spooled}))
+        )).scalars())
+        unknown_users = [item.idempotency_key for item in spooled if item.telegram_id not in known]
+        spooled = [item for item in spooled if item.telegram_id in known]
+        if not spooled:
+            return 0, unknown_users
+        
+        rows = values(
+            column('idempotency_key', UUID(as_uuid=True)),
+            column('telegram_id', BigInteger),
+            column('category_id', Integer),
+            column('type', Text),
+            column('amount', Numeric(12, 2)),
+            column('occurred_at', DateTime(timezone=True)),
+            column('description', Text),
+            column('tag_list', ARRAY(Text)),
+            name='spooled',
+        ).data([
+            (
+                item.idempotency_key,
+                item.telegram_id,
+                item.operation.category_id,
+                item.operation.type,
+                Decimal(str(item.operation.amount)),
+                item.operation.occurred_at,
+                item.operation.description,
+                item.operation.tag_list,
+            )
+            for item in spooled
+        ])
+        
+        stmt = pg_insert(Operation).from_select(
+            ['idempotency_key', 'user_id', 'category_id', 'type', 'amount', 'occurred_at', 'description', 'tag_list'],
+            select(
+                rows.c.idempotency_key,
+                User.id,
+                rows.c.category_id,
+                rows.c.type,
+                rows.c.amount,
+                rows.c.occurred_at,
+                rows.c.description,
+                rows.c.tag_list,
+            ).join(User, User.telegram_id == rows.c.telegram_id)
+        ).on_conflict_do_nothing(
+            index_elements=['idempotency_key']
+        ).returning(
+            Operation.user_id, Operation.category_id, Operation.type, Operation.amount, Operation.occurred_at
+        )
+        
+        inserted = (await db.execute(stmt)).all()
+        for operation in inserted:
+            await BudgetCRUD.track_operation(db, operation)
+        user_ids = {operation.user_id for operation in inserted}
+        data_versions.touch(db, *user_ids)
+        limit_counters.touch(db, *user_ids)
+        await db.commit()
+        return len(inserted), unknown_users
+    
+    @staticmethod
+    async def quick_create(db: AsyncSession, operation_data: OperationCreate, user_id: int) -> int:
+        """
+        Создать операцию одним запросом: INSERT ... RETURNING и обновление
+        счетчиков бюджетов в CTE того же запроса. В отличие от create,
+        объект Operation не загружается обратно. Возвращает ID операции.
+        """
+        inserted = (
+            insert(Operation)
+            .values(**operation_data.model_dump(), user_id=user_id)
+            .returning(
+                Operation.id, Operation.user_id, Operation.category_id,
+                Operation.type, Operation.amount, Operation.occurred_at
+            )
+            .cte('inserted')
+        )
+        tracked = BudgetCRUD.track_operations_statement(inserted).cte('tracked')
+        operation_id = await db.scalar(select(inserted.c.id).add_cte(tracked))
+        data_versions.touch(db, user_id)
+        await db.commit()
+        return operation_id
+    
+    @staticmethod
+    async def materialize_recurring(db: AsyncSession, until: datetime, max_steps: int = 366) -> Optional[int]:
+        """
+        Создать все наступившие к until повторения шаблонов одним запросом.
+        
+        Для каждого шаблона (is_recurring) номера повторений берутся из
+        generate_series, начиная со следующего после последнего созданного,
+        поэтому догонять пропущенное после простоя дешево; за один вызов
+        создается не больше max_steps повторений на шаблон. Дубликаты по
+        (шаблон, период) отсекает ON CONFLICT DO NOTHING, а счетчики
+        бюджетов обновляются в том же запросе.
+        
+        Возвращает число созданных операций или None, если генерацию уже
+        выполняет другой процесс (advisory-блокировка занята).
+        """
+        locked = await db.scalar(select(func.pg_try_advisory_xact_lock(RECURRING_LOCK_KEY)))
+        if not locked:
+            await db.rollback()
+            return None
+        
+        template = aliased(Operation, name='template')
+        until = literal(until, DateTime(timezone=True))
+        
+        # Последнее созданное повторение шаблона (по уникальному индексу)
+        last = (
+            select(func.max(Operation.recurring_period_start).label('due'))
+            .where(Operation.recurring_template_id == template.id)
+            .lateral('last')
+        )
+        first_step = func.coalesce(
+            recurring_steps_between(template.recurring_period, template.occurred_at, last.c.due), 0
+        ) + 1
+        last_step = func.least(
+            recurring_steps_between(template.recurring_period, template.occurred_at, until),
+            first_step + max_steps - 1
+        )
+        steps = func.generate_series(first_step, last_step).table_valued('step').render_derived(name='steps')
+        due = template.occurred_at + steps.c.step * recurring_step(template.recurring_period)
+        
+        inserted = (
+            pg_insert(Operation)
+            .from_select(
+                ['user_id', 'category_id', 'type', 'amount', 'description', 'occurred_at',
+                 'is_recurring', 'recurring_template_id', 'recurring_period_start'],
+                select(
+                    template.user_id,
+                    template.category_id,
+                    template.type,
+                    template.amount,
+                    template.description,
+                    due,
+                    false(),
+                    template.id,
+                    due
+                )
+                .select_from(template)
+                .join(last, true())
+                .join(steps, true())
+                .where(
+                    and_(
+                        template.is_recurring == True,
+                        template.recurring_period.in_(RECURRING_PERIODS),
+                        template.occurred_at < until,
+                        due <= until
+                    )
+                )
+            )
+            .on_conflict_do_nothing(index_elements=['recurring_template_id', 'recurring_period_start'])
+            .returning(
+                Operation.user_id, Operation.category_id, Operation.type, Operation.amount, Operation.occurred_at
+            )
+            .cte('inserted')
+        )
+        
+        tracked = BudgetCRUD.track_operations_statement(inserted).cte('tracked')
+        per_user = (await db.execute(
+            select(inserted.c.user_id, func.count()).group_by(inserted.c.user_id).add_cte(tracked)
+        )).all()
+        data_versions.touch(db, *(user_id for user_id, _ in per_user))
+        limit_counters.touch(db, *(user_id for user_id, _ in per_user))
+        await db.commit()
+        return sum(count for _, count in per_user)
+    
+    @staticmethod
+    async def get_operations_by_user(db: AsyncSession, user_id: int, limit: int = 100) -> List[Operation]:
+        """Получить операции пользователя с категориями"""
+        query = (
+            select(Operation)
+            .options(selectinload(Operation.category))
+            .where(Operation.user_id == user_id)
+            .order_by(Operation.created_at.desc())
+            .limit(limit)
+        )
+        
+        result = await db.execute(query)
+        return result.scalars().all()
+    
+    @staticmethod
+    async def get_by_id(db: AsyncSession, operation_id: int, user_id: int) -> Optional[Operation]:
+        """Получить операцию по ID для конкретного пользователя"""
+        result = await db.execute(
+            select(Operation).options(selectinload(Operation.category)).where(
+                and_(Operation.id == operation_id, Operation.user_id == user_id)
+            )
+        )
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def update(db: AsyncSession, operation: Operation, operation_data: OperationUpdate) -> Operation:
+        """Обновить операцию"""
+        # Снимаем старую сумму со счетчиков бюджетов и добавляем новую
+        await BudgetCRUD.track_operation(db, operation, sign=-1)
+        for field, value in operation_data.dict(exclude_unset=True).items():
+            setattr(operation, field, value)
+        await BudgetCRUD.track_operation(db, operation)
+        data_versions.touch(db, operation.user_id)
+        limit_counters.touch(db, operation.user_id)
+        
+        await db.commit()
+        await db.refresh(operation)
+        return operation
+    
+    @staticmethod
+    async def delete(db: AsyncSession, operation: Operation):
+        """Удалить операцию"""
+        await BudgetCRUD.track_operation(db, operation, sign=-1)
+        data_versions.touch(db, operation.user_id)
+        limit_counters.touch(db, operation.user_id)
+        await db.delete(operation)
+        await db.commit()
+    
+    @staticmethod
+    async def get_balance(db: AsyncSession, user_id: int) -> Dict[str, Decimal]:
+        """Получить баланс пользователя"""
+        # Получаем сумму доходов
+        income_result = await db.execute(
+            select(func.coalesce(func.sum(Operation.amount), 0)).where(
+                and_(Operation.user_id == user_id, Operation.type == 'income')
+            )
+        )
+        total_income = income_result.scalar()
+        
+        # Получаем сумму расходов
+        expense_result = await db.execute(
+            select(func.coalesce(func.sum(Operation.amount), 0)).where(
+                and_(Operation.user_id == user_id, Operation.type == 'expense')
+            )
+        )
+        total_expense = expense_result.scalar()
+        
+        balance = total_income - total_expense
+        
+        return {
+            "balance": balance,
+            "total_income": total_income,
+            "total_expense": total_expense
+        }
+    
+    @staticmethod
+    async def get_expense_totals_since(
+        db: AsyncSession,
+        user_id: int,
+        day_start: datetime,
+        month_start: datetime
+    ) -> Tuple[Decimal, Decimal]:
+        """Сумма расходов с начала дня и с начала месяца одним запросом"""
+        result = await db.execute(
+            select(
+                func.coalesce(func.sum(Operation.amount).filter(Operation.occurred_at >= day_start), 0),
+                func.coalesce(func.sum(Operation.amount), 0)
+            ).where(
+                and_(
+                    Operation.user_id == user_id,
+                    Operation.type == 'expense',
+                    Operation.occurred_at >= month_start
+                )
+            )
+        )
+        day_total, month_total = result.one()
+        return day_total, month_total
+    
+    @staticmethod
+    async def get_statistics_by_period(
+        db: AsyncSession, 
+        user_id: int, 
+        start_date: datetime, 
+        end_date: datetime
+    ) -> Dict[str, Any]:
+        """Получить статистику за период [start_date, end_date) одним сгруппированным запросом"""
+        result = await db.execute(
+            select(
+                Category.name,
+                Category.icon,
+                Operation.type,
+                func.sum(Operation.amount),
+                func.count()
+            )
+            .select_from(Operation)
+            .outerjoin(Category, Category.id == Operation.category_id)
+            .where(
+                and_(
+                    Operation.user_id == user_id,
+                    Operation.occurred_at >= start_date,
+                    Operation.occurred_at < end_date
+                )
+            )
+            .group_by(Category.id, Operation.type)
+        )
+        
+        # Группировка по категориям
+        categories_stats = {}
+        total_income = Decimal('0')
+        total_expense = Decimal('0')
+        operations_count = 0
+        
+        for name, icon, op_type, amount, count in result.all():
+            category_name = name or "Без категории"
+            stats = categories_stats.setdefault(category_name, {
+                "icon": icon or "📦",
+                "income": Decimal('0'),
+                "expense": Decimal('0'),
+                "count": 0
+            })
+            
+            if op_type == 'income':
+                stats["income"] += amount
+                total_income += amount
+            else:
+                stats["expense"] += amount
+                total_expense += amount
+            
+            stats["count"] += count
+            operations_count += count
+        
+        return {
+            "total_income": total_income,
+            "total_expense": total_expense,
+            "balance": total_income - total_expense,
+            "operations_count": operations_count,
+            "categories": categories_stats,
+            "period": {
+                "start": start_date,
+                "end": end_date
+            }
+        }
+    
+    @staticmethod
+    async def get_monthly_totals(
+        db: AsyncSession,
+        user_id: int,
+        tz_name: Optional[str] = None,
+        months: int = 12
+    ) -> List[Any]:
+        """
+        Доходы и расходы по локальным месяцам пользователя за последние
+        months месяцев (включая текущий) одним сгруппированным запросом
+        """
+        # Константы вместо параметров: выражение совпадает с индексом ix_operations_user_local_month
+        month = func.date_trunc(literal_column("'month'"), local_time(Operation.occurred_at, tz_name)).label('month')
+        since = months_back(tz_name, months)
+        result = await db.execute(
+            select(
+                month,
+                func.coalesce(func.sum(Operation.amount).filter(Operation.type == 'income'), 0).label('income'),
+                func.coalesce(func.sum(Operation.amount).filter(Operation.type == 'expense'), 0).label('expense')
+            )
+            .where(and_(Operation.user_id == user_id, Operation.occurred_at >= since))
+            .group_by(month)
+            .order_by(month)
+        )
+        return result.all()
+    
+    @staticmethod
+    async def get_expenses_by_category(
+        db: AsyncSession,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Any]:
+        """Расходы по категориям за период, по убыванию суммы"""
+        total = func.sum(Operation.amount).label('total')
+        result = await db.execute(
+            select(Category.name, Category.icon, total)
+            .select_from(Operation)
+            .outerjoin(Category, Category.id == Operation.category_id)
+            .where(
+                and_(
+                    Operation.user_id == user_id,
+                    Operation.type == 'expense',
+                    Operation.occurred_at >= start_date,
+                    Operation.occurred_at < end_date
+                )
+            )
+            .group_by(Category.id)
+            .order_by(total.desc())
+        )
+        return result.all()
+    
+    @staticmethod
+    async def get_recent_operations(db: AsyncSession, user_id: int, limit: int = 10) -> List[Operation]:
+        """Получить последние операции пользователя"""
+        return await OperationCRUD.get_operations_by_user(db, user_id, limit=limit)
+    
+    @staticmethod
+    async def search_operations(
+        db: AsyncSession,
+        user_id: int,
+        text: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category: Optional[str] = None,
+        tags: Sequence[str] = (),
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 10
+    ) -> List[Any]:
+        """
+        Поиск операций пользователя по описанию, от новых к старым.
+        
+        Описание совпадает, если подходит полнотекстовый запрос (со
+        стеммингом, индекс по search_vector) или запрос похож на слово
+        описания (pg_trgm word_similarity, индекс по триграммам) — так
+        находятся опечатки и части слов. category — начало названия
+        категории. Пагинация по ключу: after — (occurred_at, id) последней
+        показанной операции. tags — все перечисленные теги должны быть
+        у операции (индекс по tag_list). Возвращает до limit + 1 строк, чтобы вызывающий
+        знал, есть ли следующая страница.
+        """
+        conditions = [Operation.user_id == user_id]
+        if text:
+            conditions.append(
+                or_(
+                    Operation.search_vector.op('@@')(func.websearch_to_tsquery(SEARCH_CONFIG, text)),
+                    literal(text, Text).op('<%')(Operation.description)
+                )
+            )
+        if start is not None:
+            conditions.append(Operation.occurred_at >= start)
+        if end is not None:
+            conditions.append(Operation.occurred_at < end)
+        if category:
+            conditions.append(func.replace(func.lower(Category.name), 'ё', 'е').startswith(category, autoescape=True))
+        if tags:
+            conditions.append(Operation.tag_list.contains(list(tags)))
+        if after is not None:
+            conditions.append(tuple_(Operation.occurred_at, Operation.id) < tuple_(*after))
+        
+        result = await db.execute(
+            select(
+                Operation.id,
+                Operation.occurred_at,
+                Operation.type,
+                Operation.amount,
+                Operation.description,
+                Category.name.label('category_name'),
+                Category.icon.label('category_icon')
+            )
+            .outerjoin(Category, Category.id == Operation.category_id)
+            .where(and_(*conditions))
+            .order_by(Operation.occurred_at.desc(), Operation.id.desc())
+            .limit(limit + 1)
+        )
+        return result.all()
+    
+    @staticmethod
+    async def get_tag_monthly_totals(
+        db: AsyncSession,
+        user_id: int,
+        tz_name: Optional[str] = None,
+        months: int = 6
+    ) -> List[Any]:
+        """
+        Расходы по тегам и локальным месяцам пользователя за последние
+        months месяцев: строки (tag, month, total). Операция с несколькими
+        тегами учитывается в каждом из них.
+        """
+        month = func.date_trunc(literal_column("'month'"), local_time(Operation.occurred_at, tz_name)).label('month')
+        tag = func.unnest(Operation.tag_list).table_valued('tag').render_derived(name='tag')
+        result = await db.execute(
+            select(tag.c.tag, month, func.sum(Operation.amount).label('total'))
+            .select_from(Operation)
+            .join(tag, true())
+            .where(
+                and_(
+                    Operation.user_id == user_id,
+                    Operation.type == 'expense',
+                    Operation.occurred_at >= months_back(tz_name, months),
+                    func.cardinality(Operation.tag_list) > 0
+                )
+            )
+            .group_by(tag.c.tag, month)
+            .order_by(tag.c.tag, month)
+        )
+        return result.all()
+    
+    @staticmethod
+    async def backfill_tag_batch(db: AsyncSession, after_id: int, batch_size: int = 1000) -> Optional[int]:
+        """
+        Перенести пачку старых JSON-тегов (operations.tags) в tag_list.
+        
+        Строки берутся по возрастанию id после after_id с FOR UPDATE SKIP
+        LOCKED и обновляются одним UPDATE ... FROM (VALUES ...) в короткой
+        транзакции; перенесенные строки получают tags = NULL. Возвращает
+        id последней просмотренной строки или None, если переносить нечего.
+        """
+        rows = (await db.execute(
+            select(Operation.id, Operation.tags)
+            .where(and_(Operation.id > after_id, Operation.tags.isnot(None)))
+            .order_by(Operation.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if not rows:
+            await db.rollback()
+            return None
+        
+        converted = values(
+            column('id', Integer),
+            column('tag_list', ARRAY(Text)),
+            name='converted',
+        ).data([(operation_id, parse_legacy_tags(raw)) for operation_id, raw in rows])
+        # Теги, которые уже есть в tag_list, не дублируются
+        legacy_tag = func.unnest(converted.c.tag_list).table_valued('tag').render_derived(name='legacy_tag')
+        new_tags = select(legacy_tag.c.tag).where(legacy_tag.c.tag != all_(Operation.tag_list)).scalar_subquery()
+        user_ids = (await db.execute(
+            update(Operation)
+            .where(Operation.id == converted.c.id)
+            .values(tag_list=func.array_cat(Operation.tag_list, func.array(new_tags)), tags=None)
+            .returning(Operation.user_id)
+        )).scalars().all()
+        data_versions.touch(db, *set(user_ids))
+        await db.commit()
+        return rows[-1].id
+    
+    @staticmethod
+    async def count_legacy_tags(db: AsyncSession) -> int:
+        """Число операций, старые теги которых еще не перенесены"""
+        return await db.scalar(select(func.count()).select_from(Operation).where(Operation.tags.isnot(None)))
+    
+    @staticmethod
+    async def get_category_history(db: AsyncSession, user_id: int, limit: int = 1000) -> List[Any]:
+        """Последние пары (описание, категория) пользователя для обучения автокатегоризации"""
+        result = await db.execute(
+            select(Operation.description, Operation.category_id)
+            .where(Operation.user_id == user_id)
+            .order_by(Operation.occurred_at.desc())
+            .limit(limit)
+        )
+        return result.all()
+
+
+class BudgetCRUD:
+    @staticmethod
+    async def create(db: AsyncSession, budget_data: dict) -> Budget:
+        """Создать новый бюджет"""
+        budget = Budget(**budget_data)
+        db.add(budget)
+        await db.flush()
+        # Заполняем счетчик текущего периода уже сделанными расходами
+        await BudgetCRUD.reconcile_spend_counters(db, budget_id=budget.id)
+        await db.refresh(budget)
+        return budget
+    
+    @staticmethod
+    async def get_user_budgets(db: AsyncSession, user_id: int) -> List[Budget]:
+        """Получить активные бюджеты пользователя"""
+        result = await db.execute(
+            select(Budget).options(selectinload(Budget.category)).where(
+                and_(Budget.user_id == user_id, Budget.is_active == True)
+            )
+        )
+        return result.scalars().all()
+    
+    @staticmethod
+    async def get_budget_overview(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
+        """
+        Прогресс всех активных бюджетов пользователя одним запросом:
+        бюджеты соединяются с суммой расходов в окне каждого бюджета
+        (текущий период, ограниченный start_date/end_date бюджета).
+        """
+        spent = func.coalesce(func.sum(Operation.amount), 0).label('spent')
+        result = await db.execute(
+            select(
+                Budget.id,
+                Budget.period,
+                Budget.limit_amount,
+                Category.name,
+                Category.icon,
+                spent
+            )
+            .select_from(Budget)
+            .outerjoin(Category, Category.id == Budget.category_id)
+            .outerjoin(Operation, budget_operations_join())
+            .where(and_(Budget.user_id == user_id, Budget.is_active == True))
+            .group_by(Budget.id, Category.id)
+            .order_by(Category.name.nulls_first(), Budget.id)
+        )
+        
+        overview = []
+        for budget_id, period, limit_amount, category_name, icon, spent_amount in result.all():
+            overview.append({
+                "budget_id": budget_id,
+                "period": period,
+                "category_name": category_name,
+                "icon": icon,
+                "limit": limit_amount,
+                "spent": spent_amount,
+                "remaining": limit_amount - spent_amount,
+                "percent": float(spent_amount / limit_amount * 100) if limit_amount else 0.0
+            })
+        return overview
+    
+    @staticmethod
+    async def track_operation(db: AsyncSession, operation, sign: int = 1):
+        """
+        Учесть расход в счетчиках всех активных бюджетов, которые его покрывают
+        (бюджет на категорию операции или общий бюджет без категории).
+        Выполняется в транзакции записи операции.
+        """
+        if operation.type != 'expense':
+            return
+        
+        occurred_at = literal(operation.occurred_at, DateTime(timezone=True))
+        amount = Decimal(str(operation.amount)) * sign
+        source = select(
+            Budget.id,
+            budget_period_start(occurred_at),
+            literal(amount, Numeric(12, 2)),
+        ).where(
+            and_(
+                Budget.user_id == operation.user_id,
+                Budget.is_active == True,
+                or_(Budget.category_id == operation.category_id, Budget.category_id.is_(None)),
+                Budget.start_date <= occurred_at,
+                or_(Budget.end_date.is_(None), Budget.end_date >= occurred_at)
+            )
+        )
+        
+        stmt = pg_insert(BudgetSpend).from_select(['budget_id', 'period_start', 'spent'], source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['budget_id', 'period_start'],
+            set_={'spent': BudgetSpend.spent + stmt.excluded.spent}
+        )
+        await db.execute(stmt)
+    
+    @staticmethod
+    def track_operations_statement(operations):
+        """
+        То же, что track_operation, но для набора операций (подзапроса или CTE
+        со столбцами user_id, category_id, type, amount, occurred_at).
+        """
+        period_start = budget_period_start(operations.c.occurred_at).label('period_start')
+        source = (
+            select(Budget.id, period_start, func.sum(operations.c.amount))
+            .join(
+                operations,
+                and_(
+                    Budget.user_id == operations.c.user_id,
+                    or_(Budget.category_id == operations.c.category_id, Budget.category_id.is_(None)),
+                    Budget.start_date <= operations.c.occurred_at,
+                    or_(Budget.end_date.is_(None), Budget.end_date >= operations.c.occurred_at)
+                )
+            )
+            .where(and_(Budget.is_active == True, operations.c.type == 'expense'))
+            .group_by(Budget.id, period_start)
+        )
+        
+        stmt = pg_insert(BudgetSpend).from_select(['budget_id', 'period_start', 'spent'], source)
+        return stmt.on_conflict_do_update(
+            index_elements=['budget_id', 'period_start'],
+            set_={'spent': BudgetSpend.spent + stmt.excluded.spent}
+        )
+    
+    @staticmethod
+    async def reconcile_spend_counters(db: AsyncSession, budget_id: Optional[int] = None) -> int:
+        """
+        Пересчитать счетчики текущего периода из операций и удалить
+        счетчики прошедших периодов. Возвращает число исправленных счетчиков.
+        
+        Счетчик не перезаписывается суммой, а сдвигается на расхождение,
+        посчитанное по снимку запроса: операция и ее прибавка к счетчику
+        пишутся в одной транзакции, поэтому в снимке видны обе или ни одна.
+        Прибавки транзакций, закоммиченных во время сверки, ON CONFLICT
+        DO UPDATE применяет к последней версии строки и сохраняет.
+        """
+        period_start, _ = budget_current_window()
+        
+        counted = (
+            select(BudgetSpend.spent)
+            .where(and_(BudgetSpend.budget_id == Budget.id, BudgetSpend.period_start == period_start))
+            .scalar_subquery()
+        )
+        drift = func.coalesce(func.sum(Operation.amount), 0) - func.coalesce(counted, 0)
+        source = (
+            select(Budget.id, period_start, drift)
+            .select_from(Budget)
+            .outerjoin(Operation, budget_operations_join())
+            .where(Budget.is_active == True)
+            .group_by(Budget.id)
+        )
+        if budget_id is not None:
+            source = source.where(Budget.id == budget_id)
+        
+        stmt = pg_insert(BudgetSpend).from_select(['budget_id', 'period_start', 'spent'], source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['budget_id', 'period_start'],
+            set_={'spent': BudgetSpend.spent + stmt.excluded.spent},
+            where=stmt.excluded.spent != 0
+        )
+        result = await db.execute(stmt)
+        
+        # Переход на новый период: счетчики прошлых периодов больше не читаются
+        stale = delete(BudgetSpend).where(
+            and_(
+                BudgetSpend.budget_id == Budget.id,
+                BudgetSpend.period_start < budget_period_start(func.now())
+            )
+        )
+        if budget_id is not None:
+            stale = stale.where(Budget.id == budget_id)
+        await db.execute(stale)
+        await db.commit()
+        return result.rowcount
+    
+    @staticmethod
+    async def check_budget_exceeded(db: AsyncSession, user_id: int, category_id: int, amount: Decimal) -> Optional[Dict]:
+        """Проверить превышение бюджета по счетчику текущего периода"""
+        result = await db.execute(
+            select(Budget.limit_amount, func.coalesce(BudgetSpend.spent, 0))
+            .outerjoin(
+                BudgetSpend,
+                and_(
+                    BudgetSpend.budget_id == Budget.id,
+                    BudgetSpend.period_start == budget_period_start(func.now())
+                )
+            )
+            .where(
+                and_(
+                    Budget.user_id == user_id,
+                    Budget.category_id == category_id,
+                    Budget.is_active == True
+                )
+            )
+        )
+        row = result.one_or_none()
+        
+        if not row:
+            return None
+        
+        limit_amount, spent_amount = row
+        new_total = spent_amount + amount
+        
+        if new_total > limit_amount:
+            return {
+                "budget_exceeded": True,
+                "budget_limit": limit_amount,
+                "spent_amount": spent_amount,
+                "new_total": new_total,
+                "excess_amount": new_total - limit_amount
+            }
+        
+        return {
+            "budget_exceeded": False,
+            "budget_limit": limit_amount,
+            "spent_amount": spent_amount,
+            "new_total": new_total,
+            "remaining": limit_amount - new_total
+        }
+
+class NotificationCRUD:
+    @staticmethod
+    async def get_notification_timezones(db: AsyncSession) -> List[str]:
+        """Часовые пояса пользователей, которым нужны уведомления о лимитах"""
+        result = await db.execute(
+            select(User.timezone).distinct().where(
+                and_(
+                    User.notification_enabled == True,
+                    User.is_active == True,
+                    or_(User.daily_limit.isnot(None), User.monthly_limit.isnot(None))
+                )
+            )
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def enqueue_limit_notifications(
+        db: AsyncSession,
+        tz_name: str,
+        day_key: str,
+        day_start: datetime,
+        month_key: str,
+        month_start: datetime,
+        near_ratio: float
+    ) -> int:
+        """
+        Поставить в очередь уведомления для всех пользователей часового пояса,
+        чьи расходы приблизились к лимиту или превысили его. Один запрос:
+        расходы за день и месяц считаются агрегатом по всем пользователям,
+        а ON CONFLICT DO NOTHING пропускает уже поставленные уведомления.
+        """
+        spent = (
+            select(
+                User.id.label('user_id'),
+                User.daily_limit,
+                User.monthly_limit,
+                func.coalesce(func.sum(Operation.amount).filter(Operation.occurred_at >= day_start), 0).label('day_spent'),
+                func.sum(Operation.amount).label('month_spent')
+            )
+            .join(
+                Operation,
+                and_(
+                    Operation.user_id == User.id,
+                    Operation.type == 'expense',
+                    Operation.occurred_at >= month_start
+                )
+            )
+            .where(
+                and_(
+                    User.timezone == tz_name,
+                    User.notification_enabled == True,
+                    User.is_active == True,
+                    or_(User.daily_limit.isnot(None), User.monthly_limit.isnot(None))
+                )
+            )
+            .group_by(User.id)
+            .cte('spent')
+        )
+        
+        def candidates(period_key, spent_column, limit_column):
+            return select(
+                spent.c.user_id,
+                literal(period_key, String(20)),
+                case((spent_column >= limit_column, 'crossed'), else_='near'),
+                spent_column,
+                limit_column
+            ).where(
+                and_(limit_column.isnot(None), spent_column >= limit_column * Decimal(str(near_ratio)))
+            )
+        
+        stmt = pg_insert(LimitNotification).from_select(
+            ['user_id', 'period_key', 'level', 'spent', 'limit_amount'],
+            union_all(
+                candidates(day_key, spent.c.day_spent, spent.c.daily_limit),
+                candidates(month_key, spent.c.month_spent, spent.c.monthly_limit)
+            )
+        ).on_conflict_do_nothing()
+        
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount
+    
+    @staticmethod
+    async def claim_pending(db: AsyncSession, batch_size: int = 500) -> List[Any]:
+        """
+        Забрать пачку неотправленных уведомлений, сразу отметив их отправленными.
+        SKIP LOCKED позволяет нескольким экземплярам бота разбирать очередь
+        параллельно; отметка до отправки исключает повторные уведомления
+        после перезапуска.
+        """
+        pending = (
+            select(LimitNotification.user_id, LimitNotification.period_key, LimitNotification.level)
+            .where(LimitNotification.sent_at.is_(None))
+            .order_by(LimitNotification.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(LimitNotification)
+            .where(
+                and_(
+                    tuple_(
+                        LimitNotification.user_id, LimitNotification.period_key, LimitNotification.level
+                    ).in_(pending),
+                    User.id == LimitNotification.user_id
+                )
+            )
+            .values(sent_at=func.now())
+            .returning(
+                User.telegram_id,
+                LimitNotification.period_key,
+                LimitNotification.level,
+                LimitNotification.spent,
+                LimitNotification.limit_amount
+            )
+            .execution_options(synchronize_session=False)
+        )
+        claimed = result.all()
+        await db.commit()
+        return claimed
+    
+    @staticmethod
+    async def mark_sent(
+        db: AsyncSession,
+        user_id: int,
+        period_key: str,
+        level: str,
+        spent: Decimal,
+        limit_amount: Decimal
+    ) -> None:
+        """Отметить уведомление отправленным (пользователь уже предупрежден в чате)"""
+        await db.execute(
+            pg_insert(LimitNotification)
+            .values(
+                user_id=user_id,
+                period_key=period_key,
+                level=level,
+                spent=spent,
+                limit_amount=limit_amount,
+                sent_at=func.now()
+            )
+            .on_conflict_do_nothing()
+        )
+        await db.commit()
+    
+    @staticmethod
+    async def purge_limit_notifications(db: AsyncSession, older_than: datetime) -> int:
+        """Удалить отметки уведомлений за давно прошедшие периоды"""
+        result = await db.execute(
+            delete(LimitNotification).where(LimitNotification.created_at < older_than)
+        )
+        await db.commit()
+        return result.rowcount
\ No newline at end of file
@@ -1,80 +1,123 @@
-import os
-import asyncpg
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base
-from dotenv import load_dotenv
-from contextlib import asynccontextmanager
-
-load_dotenv()
-
-DB_USER     = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST     = os.getenv("DB_HOST")
-DB_PORT     = os.getenv("DB_PORT")
-DB_NAME     = os.getenv("DB_NAME")
-
-required = {
-    "DB_USER": DB_USER,
-    "DB_PASSWORD": DB_PASSWORD,
-    "DB_HOST": DB_HOST,
-    "DB_PORT": DB_PORT,
-    "DB_NAME": DB_NAME,
-}
-missing = [k for k, v in required.items() if not v]
-if missing:
-    raise RuntimeError(f"В .env отсутствуют переменные: {', '.join(missing)}")
-
-DATABASE_URL = (
-    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-)
-
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    pool_size=20,
-    max_overflow=0,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-)
-
-async_session_maker = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
-
-Base = declarative_base()
-
-@asynccontextmanager
-async def get_async_session() -> AsyncSession:
-    """
-    Асинхронный контекстный менеджер для получения сессии SQLAlchemy.
-    Использование:
-        async with get_async_session() as db:
-            ...
-    """
-    session: AsyncSession = async_session_maker()
-    try:
-        yield session
-        await session.commit()
-    except:
-        await session.rollback()
-        raise
-    finally:
-        await session.close()
-        
-async def init_database():
-    """
-    Инициализация базы данных (миграции, проверка схем).
-    Вызывается при старте приложения.
-    """
-    # Здесь можно выполнить Alembic миграции или создание таблиц:
-    # async with engine.begin() as conn:
-    #     await conn.run_sync(Base.metadata.create_all)
-    pass
-
-async def close_database():
-    """
-    Закрытие движка и освобождение ресурсов.
-    """
+import os
+import asyncio
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base
+from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+
+from app.database.versions import VersionedSession
+from app.services.circuit_breaker import CircuitBreaker, DatabaseConnectError
+from config import settings
+
+load_dotenv()
+
+DB_USER     = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST     = os.getenv("DB_HOST")
+DB_PORT     = os.getenv("DB_PORT")
+DB_NAME     = os.getenv("DB_NAME")
+
+required = {
+    "DB_USER": DB_USER,
+    "DB_PASSWORD": DB_PASSWORD,
+    "DB_HOST": DB_HOST,
+    "DB_PORT": DB_PORT,
+    "DB_NAME": DB_NAME,
+}
+missing = [k for k, v in required.items() if not v]
+if missing:
+    raise RuntimeError(f"В .env отсутствуют переменные: {', '.join(missing)}")
+
+DATABASE_URL = (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+async def _connect():
+    """
+    Новое соединение asyncpg для пула.
+    SQLAlchemy пропускает сетевые ошибки подключения как есть (OSError,
+    TimeoutError); здесь они помечаются как недоступность БД, чтобы
+    автомат защиты не путал их с ошибками Redis или Telegram.
+    """
+    try:
+        return await asyncpg.connect(
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=int(DB_PORT),
+            database=DB_NAME,
+        )
+    except (OSError, asyncio.TimeoutError) as e:
+        raise DatabaseConnectError(f"Нет соединения с {DB_HOST}:{DB_PORT}: {e}") from e
+
+engine = create_async_engine(
+    DATABASE_URL,
+    async_creator=_connect,
+    echo=False,
+    pool_size=20,
+    max_overflow=0,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+
+async_session_maker = async_sessionmaker(
+    engine,
+    class_=VersionedSession,
+    expire_on_commit=False,
+)
+
+Base = declarative_base()
+
+async def _ping_database():
+    """Пробный запрос для автомата защиты"""
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+# Автомат защиты: при недоступности БД запросы отклоняются сразу,
+# а не ждут таймаута пула
+db_breaker = CircuitBreaker(
+    "database",
+    probe=_ping_database,
+    failure_threshold=settings.db_breaker_failures,
+    reset_timeout=settings.db_breaker_reset_timeout,
+)
+
+@asynccontextmanager
+async def get_async_session() -> AsyncSession:
+    """
+    Асинхронный контекстный менеджер для получения сессии SQLAlchemy.
+    Использование:
+        async with get_async_session() as db:
+            ...
+    """
+    await db_breaker.before_call()
+    session: AsyncSession = async_session_maker()
+    try:
+        yield session
+        await session.commit()
+    except BaseException as e:
+        db_breaker.record_failure(e)
+        await session.rollback()
+        raise
+    else:
+        db_breaker.record_success()
+    finally:
+        await session.close()
+        
+async def init_database():
+    """
+    Инициализация базы данных (миграции, проверка схем).
+    Вызывается при старте приложения.
+    """
+    # Здесь можно выполнить Alembic миграции или создание таблиц:
+    # async with engine.begin() as conn:
+    #     await conn.run_sync(Base.metadata.create_all)
+    pass
+
+async def close_database():
+    """
+    Закрытие движка и освобождение ресурсов.
+    """
     await engine.dispose()
\ No newline at end of file
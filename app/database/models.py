@@ -1,142 +1,218 @@
-from datetime import datetime, timezone
-from decimal import Decimal
-from sqlalchemy import Table, Column, Integer, BigInteger, DateTime, ForeignKey, Text, Numeric, CheckConstraint, func, Boolean, String
-from sqlalchemy.sql import func
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
-
-Base = declarative_base()
-
-user_categories = Table(
-    'user_categories',
-    Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
-    Column('category_id', Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True),
-    Column('created_at', DateTime(timezone=True), server_default=func.now(), nullable=False)
-)
-
-class User(Base):
-    __tablename__ = 'users'
-    
-    id = Column(Integer, primary_key=True, index=True)
-    telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)
-    first_name = Column(Text, nullable=False)
-    last_name = Column(Text, nullable=True)
-    username = Column(Text, nullable=True)
-    is_active = Column(Boolean, default=True, nullable=False)
-    timezone = Column(String(50), default='Europe/Moscow', nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
-    
-    # Настройки пользователя
-    currency = Column(String(3), default='RUB', nullable=False)
-    notification_enabled = Column(Boolean, default=True, nullable=False)
-    daily_limit = Column(Numeric(12, 2), nullable=True)
-    monthly_limit = Column(Numeric(12, 2), nullable=True)
-    
-    # Связи
-    operations = relationship('Operation', back_populates='user', cascade='all, delete-orphan')
-    # Many-to-many связь с Category через secondary table
-    categories = relationship("Category", secondary=user_categories, back_populates="users")
-    
-    def __repr__(self):
-        return f"<User(id={self.id}, telegram_id={self.telegram_id}, first_name='{self.first_name}')>"
-
-class Category(Base):
-    __tablename__ = 'categories'
-    
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(100), nullable=False, unique=True)
-    icon = Column(String(10), nullable=True)
-    is_income = Column(Boolean, default=False, nullable=False)
-    is_default = Column(Boolean, default=False, nullable=False)
-    is_active = Column(Boolean, default=True, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    
-    # Many-to-many связь с User через secondary table
-    users = relationship("User", secondary="user_categories", back_populates="categories")
-    operations = relationship('Operation', back_populates='category')
-    
-    def __repr__(self):
-        return f"<Category(id={self.id}, name='{self.name}', is_income={self.is_income})>"
-
-class Operation(Base):
-    __tablename__ = 'operations'
-    __table_args__ = (
-        CheckConstraint("type IN ('income','expense')", name='chk_type'),
-        CheckConstraint("amount > 0", name='chk_positive_amount'),
-    )
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
-    category_id = Column(Integer, ForeignKey('categories.id', ondelete='SET NULL'), nullable=True, index=True)
-    
-    # Основные поля
-    type = Column(Text, nullable=False)  # 'income' или 'expense'
-    amount = Column(Numeric(12, 2), nullable=False)
-    description = Column(Text, nullable=True)
-    
-    # Временные метки
-    occurred_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
-    
-    # Дополнительные поля
-    is_recurring = Column(Boolean, default=False, nullable=False)
-    recurring_period = Column(String(20), nullable=True)  # 'daily', 'weekly', 'monthly'
-    tags = Column(Text, nullable=True)  # JSON строка с тегами
-    location = Column(Text, nullable=True)  # Геолокация
-    receipt_url = Column(Text, nullable=True)  # Ссылка на чек
-    
-    # Связи
-    user = relationship('User', back_populates='operations')
-    category = relationship('Category', back_populates='operations')
-    
-    @property
-    def category_name(self):
-        """Получить имя категории или значение по умолчанию"""
-        return self.category.name if self.category else 'Без категории'
-    
-    def __repr__(self):
-        return f"<Operation(id={self.id}, type='{self.type}', amount={self.amount})>"
-
-class UserSession(Base):
-    """Таблица для хранения пользовательских сессий и состояний FSM"""
-    __tablename__ = 'user_sessions'
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
-    session_data = Column(Text, nullable=True)  # JSON данные FSM состояния
-    state = Column(String(100), nullable=True)  # Текущее FSM состояние
-    expires_at = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
-    
-    # Связи
-    user = relationship('User')
-
-class Budget(Base):
-    """Таблица для бюджетов по категориям"""
-    __tablename__ = 'budgets'
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
-    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), nullable=True, index=True)
-    
-    # Бюджет
-    limit_amount = Column(Numeric(12, 2), nullable=False)
-    period = Column(String(20), nullable=False, default='monthly')  # 'daily', 'weekly', 'monthly'
-    start_date = Column(DateTime(timezone=True), nullable=False)
-    end_date = Column(DateTime(timezone=True), nullable=True)
-    
-    # Статус
-    is_active = Column(Boolean, default=True, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    
-    # Связи
-    user = relationship('User')
-    category = relationship('Category')
-    
-    def __repr__(self):
-        return f"<Budget(id={self.id}, limit_amount={self.limit_amount}, period='{self.period}')>"
\ No newline at end of file
+from datetime import datetime, timezone
+from decimal import Decimal
+from sqlalchemy import Table, Column, Integer, BigInteger, DateTime, ForeignKey, Text, Numeric, CheckConstraint, func, Boolean, String, Index, UniqueConstraint, Computed, text
+from sqlalchemy.sql import func
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, TSVECTOR
+
+Base = declarative_base()
+
+user_categories = Table(
+    'user_categories',
+    Base.metadata,
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+    Column('category_id', Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True),
+    Column('created_at', DateTime(timezone=True), server_default=func.now(), nullable=False)
+)
+
+class User(Base):
+    __tablename__ = 'users'
+    __table_args__ = (
+        # Пользователи, которым нужны уведомления о лимитах, по часовым поясам
+        Index(
+            'ix_users_limit_notifications', 'timezone',
+            postgresql_where=text(
+                'notification_enabled AND is_active AND (daily_limit IS NOT NULL OR monthly_limit IS NOT NULL)'
+            )
+        ),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)
+    first_name = Column(Text, nullable=False)
+    last_name = Column(Text, nullable=True)
+    username = Column(Text, nullable=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    timezone = Column(String(50), default='Europe/Moscow', nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Настройки пользователя
+    currency = Column(String(3), default='RUB', nullable=False)
+    notification_enabled = Column(Boolean, default=True, nullable=False)
+    daily_limit = Column(Numeric(12, 2), nullable=True)
+    monthly_limit = Column(Numeric(12, 2), nullable=True)
+    
+    # Связи
+    operations = relationship('Operation', back_populates='user', cascade='all, delete-orphan')
+    # Many-to-many связь с Category через secondary table
+    categories = relationship("Category", secondary=user_categories, back_populates="users")
+    
+    def __repr__(self):
+        return f"<User(id={self.id}, telegram_id={self.telegram_id}, first_name='{self.first_name}')>"
+
+class Category(Base):
+    __tablename__ = 'categories'
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False, unique=True)
+    icon = Column(String(10), nullable=True)
+    is_income = Column(Boolean, default=False, nullable=False)
+    is_default = Column(Boolean, default=False, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Many-to-many связь с User через secondary table
+    users = relationship("User", secondary="user_categories", back_populates="categories")
+    operations = relationship('Operation', back_populates='category')
+    
+    def __repr__(self):
+        return f"<Category(id={self.id}, name='{self.name}', is_income={self.is_income})>"
+
+class CategoryAlias(Base):
+    """Выученный синоним категории для быстрого ввода («обед» → Еда)"""
+    __tablename__ = 'category_aliases'
+    
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    alias = Column(String(64), primary_key=True)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<CategoryAlias(user_id={self.user_id}, alias='{self.alias}', category_id={self.category_id})>"
+
+class Operation(Base):
+    __tablename__ = 'operations'
+    __table_args__ = (
+        CheckConstraint("type IN ('income','expense')", name='chk_type'),
+        CheckConstraint("amount > 0", name='chk_positive_amount'),
+        UniqueConstraint('recurring_template_id', 'recurring_period_start', name='uq_operations_recurring_period'),
+        Index('ix_operations_recurring_templates', 'id', postgresql_where=text('is_recurring')),
+        Index('ix_operations_user_occurred_at', 'user_id', 'occurred_at'),
+        # Группировка по локальным месяцам для пояса по умолчанию
+        Index(
+            'ix_operations_user_local_month', 'user_id',
+            text("date_trunc('month', timezone('Europe/Moscow', occurred_at))")
+        ),
+        # Поиск по описанию: полнотекстовый и нечеткий (pg_trgm)
+        Index('ix_operations_search_vector', 'search_vector', postgresql_using='gin'),
+        Index(
+            'ix_operations_description_trgm', 'description',
+            postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}
+        ),
+        Index('ix_operations_tag_list', 'tag_list', postgresql_using='gin'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='SET NULL'), nullable=True, index=True)
+    
+    # Основные поля
+    type = Column(Text, nullable=False)  # 'income' или 'expense'
+    amount = Column(Numeric(12, 2), nullable=False)
+    description = Column(Text, nullable=True)
+    search_vector = Column(
+        TSVECTOR,
+        Computed("to_tsvector('russian'::regconfig, coalesce(description, ''))", persisted=True)
+    )  # Вычисляется БД из описания
+    
+    # Временные метки
+    occurred_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Дополнительные поля
+    is_recurring = Column(Boolean, default=False, nullable=False)
+    recurring_period = Column(String(20), nullable=True)  # 'daily', 'weekly', 'monthly'
+    recurring_template_id = Column(Integer, ForeignKey('operations.id', ondelete='SET NULL'), nullable=True)  # Шаблон, из которого создана операция
+    recurring_period_start = Column(DateTime(timezone=True), nullable=True)  # Плановая дата повторения
+    tags = Column(Text, nullable=True)  # Устаревшее: JSON строка с тегами, переносится в tag_list
+    tag_list = Column(ARRAY(Text), nullable=False, default=list, server_default=text("'{}'"))  # Теги без «#», в нижнем регистре
+    location = Column(Text, nullable=True)  # Геолокация
+    receipt_url = Column(Text, nullable=True)  # Ссылка на чек
+    idempotency_key = Column(UUID(as_uuid=True), nullable=True, unique=True)  # Ключ операций из локальной очереди
+    
+    # Связи
+    user = relationship('User', back_populates='operations')
+    category = relationship('Category', back_populates='operations')
+    
+    @property
+    def category_name(self):
+        """Получить имя категории или значение по умолчанию"""
+        return self.category.name if self.category else 'Без категории'
+    
+    def __repr__(self):
+        return f"<Operation(id={self.id}, type='{self.type}', amount={self.amount})>"
+
+class UserSession(Base):
+    """Таблица для хранения пользовательских сессий и состояний FSM"""
+    __tablename__ = 'user_sessions'
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    session_data = Column(Text, nullable=True)  # JSON данные FSM состояния
+    state = Column(String(100), nullable=True)  # Текущее FSM состояние
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Связи
+    user = relationship('User')
+
+class Budget(Base):
+    """Таблица для бюджетов по категориям"""
+    __tablename__ = 'budgets'
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), nullable=True, index=True)
+    
+    # Бюджет
+    limit_amount = Column(Numeric(12, 2), nullable=False)
+    period = Column(String(20), nullable=False, default='monthly')  # 'daily', 'weekly', 'monthly'
+    start_date = Column(DateTime(timezone=True), nullable=False)
+    end_date = Column(DateTime(timezone=True), nullable=True)
+    
+    # Статус
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Связи
+    user = relationship('User')
+    category = relationship('Category')
+    
+    def __repr__(self):
+        return f"<Budget(id={self.id}, limit_amount={self.limit_amount}, period='{self.period}')>"
+
+class BudgetSpend(Base):
+    """Счетчик потраченного по бюджету за период (день, неделю или месяц)"""
+    __tablename__ = 'budget_spend'
+    
+    budget_id = Column(Integer, ForeignKey('budgets.id', ondelete='CASCADE'), primary_key=True)
+    period_start = Column(DateTime(timezone=True), primary_key=True)
+    spent = Column(Numeric(12, 2), nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<BudgetSpend(budget_id={self.budget_id}, period_start={self.period_start}, spent={self.spent})>"
+
+class LimitNotification(Base):
+    """
+    Уведомление о лимите расходов: запись одновременно служит очередью
+    отправки и отметкой «уже уведомлен» за период (повторно не шлется)
+    """
+    __tablename__ = 'limit_notifications'
+    __table_args__ = (
+        Index('ix_limit_notifications_pending', 'created_at', postgresql_where=text('sent_at IS NULL')),
+    )
+    
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    period_key = Column(String(20), primary_key=True)  # 'day:2024-05-01' или 'month:2024-05'
+    level = Column(String(10), primary_key=True)  # 'near' или 'crossed'
+    spent = Column(Numeric(12, 2), nullable=False)
+    limit_amount = Column(Numeric(12, 2), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<LimitNotification(user_id={self.user_id}, period_key='{self.period_key}', level='{self.level}')>"
\ No newline at end of file
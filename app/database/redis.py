@@ -0,0 +1,14 @@
+import os
+from dotenv import load_dotenv
+from redis.asyncio import Redis
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Общий клиент Redis для счетчиков и кэшей (FSM использует свое подключение)
+redis_client = Redis.from_url(REDIS_URL, decode_responses=True)
+
+async def close_redis():
+    """Закрыть пул соединений Redis"""
+    await redis_client.aclose()
\ No newline at end of file
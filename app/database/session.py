@@ -1,36 +1,36 @@
-import os
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# 1. Собираем параметры из .envDB_USER = os.getenv("DB_USER", "finbot_user")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-
-# 2. Формируем строку подключения
-DATABASE_URL = (
-    f"postgresql+asyncpg://"
-    f"{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-)
-
-# 3. Создаем асинхронный движок и фабрику сессий
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-)
-
-async_session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
-    bind=engine,
-    expire_on_commit=False,
-    class_=AsyncSession,
-)
-
-# 4. Функция для получения сессии
-async def get_async_session() -> AsyncSession:
-    async with async_session_factory() as session:
+import os
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 1. Собираем параметры из .envDB_USER = os.getenv("DB_USER", "finbot_user")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = os.getenv("DB_PORT")
+DB_NAME = os.getenv("DB_NAME")
+
+# 2. Формируем строку подключения
+DATABASE_URL = (
+    f"postgresql+asyncpg://"
+    f"{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# 3. Создаем асинхронный движок и фабрику сессий
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    future=True,
+)
+
+async_session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
+    bind=engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+)
+
+# 4. Функция для получения сессии
+async def get_async_session() -> AsyncSession:
+    async with async_session_factory() as session:
         yield session
\ No newline at end of file
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Set
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+class DataVersions:
+    """
+    Версия данных пользователя — счетчик в Redis, который растет при каждой
+    записи операций и категорий. Кэши отчетов включают версию в ключ,
+    поэтому после записи старые записи кэша просто перестают находиться.
+
+    Записи CRUD отмечают пользователей в сессии (touch), а версия
+    увеличивается только после успешного коммита: отчет, построенный
+    до коммита, не попадет в кэш под новой версией. VersionedSession
+    дожидается увеличения версий в commit(), поэтому отчет, открытый
+    сразу после записи, уже видит новую версию.
+    """
+
+    instances: List["DataVersions"] = []
+
+    def __init__(self, redis: Redis, prefix: str = "data_version", ttl: int = 90 * 24 * 3600):
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+        self.pending_key = f"{prefix}_users"
+        self._tasks: Set[asyncio.Task] = set()
+        DataVersions.instances.append(self)
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    def touch(self, db: AsyncSession, *user_ids: int) -> None:
+        """Отметить, что в транзакции изменены данные пользователей"""
+        db.sync_session.info.setdefault(self.pending_key, set()).update(user_ids)
+
+    async def get(self, user_id: int) -> Optional[int]:
+        """Текущая версия данных; None, если Redis недоступен"""
+        try:
+            return int(await self.redis.get(self._key(user_id)) or 0)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Версии данных недоступны: {e}")
+            return None
+
+    async def bump(self, user_ids: Iterable[int]) -> None:
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.incr(self._key(user_id))
+                    pipe.expire(self._key(user_id), self.ttl)
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            logger.warning(f"Не удалось обновить версии данных: {e}")
+
+    def _schedule_bump(self, user_ids: Set[int]) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(self.bump(user_ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+
+class LimitCounters(DataVersions):
+    """
+    Сброс счетчиков лимитов расходов (app.services.limits).
+
+    Счетчики увеличивает record_expense при создании расхода. Записи в
+    обход него (изменение и удаление операций, запись из локальной
+    очереди, повторяющиеся операции) отмечают пользователей через touch,
+    и после коммита их счетчики удаляются: следующий record_expense
+    пересчитает их из SQL. Часовой пояс пользователя здесь неизвестен,
+    поэтому удаляются счетчики всех дней и месяцев, которые могут быть
+    текущими в каком-либо поясе (UTC ± сутки).
+    """
+
+    def __init__(self, redis: Redis):
+        super().__init__(redis, prefix="limits")
+
+    def key(self, user_id: int, period_key: str) -> str:
+        return f"{self.prefix}:{user_id}:{period_key}"
+
+    def current_keys(self, user_id: int, now: Optional[datetime] = None) -> Set[str]:
+        today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+        days = [today + timedelta(days=shift) for shift in (-1, 0, 1)]
+        period_keys = {f"day:{day:%Y-%m-%d}" for day in days} | {f"month:{day:%Y-%m}" for day in days}
+        return {self.key(user_id, period_key) for period_key in period_keys}
+
+    async def bump(self, user_ids: Iterable[int]) -> None:
+        keys = [key for user_id in user_ids for key in self.current_keys(user_id)]
+        try:
+            await self.redis.delete(*keys)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Не удалось сбросить счетчики лимитов: {e}")
+
+
+# Любые данные пользователя (операции и категории) — для кэша отчетов
+data_versions = DataVersions(redis_client)
+# Только категории и их синонимы — для индекса категорий быстрого ввода
+category_versions = DataVersions(redis_client, prefix="category_version")
+# Общий справочник категорий — одна глобальная версия с id 0
+catalog_versions = DataVersions(redis_client, prefix="category_catalog")
+# Счетчики лимитов расходов, измененных в обход record_expense
+limit_counters = LimitCounters(redis_client)
+
+
+BUMPS_KEY = "data_version_bumps"
+
+
+class VersionedSession(AsyncSession):
+    """
+    Сессия, commit() которой возвращается только после увеличения версий
+    данных. Ожидание ограничено bump_timeout: при зависшем Redis запись
+    не блокируется, версии увеличатся в фоне.
+    """
+
+    bump_timeout = 1.0
+
+    async def commit(self) -> None:
+        await super().commit()
+        bumps = self.sync_session.info.pop(BUMPS_KEY, None)
+        if not bumps:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.gather(*bumps)), timeout=self.bump_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Версии данных не обновлены за отведенное время, обновятся в фоне")
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions_after_commit(session: Session) -> None:
+    for versions in DataVersions.instances:
+        user_ids = session.info.pop(versions.pending_key, None)
+        if user_ids:
+            session.info.setdefault(BUMPS_KEY, []).append(versions._schedule_bump(user_ids))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_versions_after_rollback(session: Session) -> None:
+    for versions in DataVersions.instances:
+        session.info.pop(versions.pending_key, None)
\ No newline at end of file
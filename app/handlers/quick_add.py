@@ -0,0 +1,134 @@
+import html
+import logging
+from datetime import datetime, timezone
+from aiogram import Router, F
+from aiogram.types import Message
+from aiogram.filters.state import StateFilter
+from aiogram.fsm.context import FSMContext
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.crud import OperationCRUD, CategoryCRUD
+from app.database.models import User
+from app.handlers.operations import OperationStates
+from app.keyboards.inline import get_category_selection_keyboard, main_menu_keyboard
+from app.middlewares.dependencies import inject
+from app.schemas.operation import OperationCreate
+from app.services.categorizer import categorizer
+from app.services.category_catalog import category_catalog
+from app.services.category_index import category_indexes
+from app.services.limits import spending_limits
+from app.utils.quick_add import normalize, parse_quick_add
+from app.utils.states import QuickAddStates
+from app.utils.tags import normalize_tags
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+QUICK_ADD_HINT = (
+    "🤔 Не понял сообщение. Чтобы быстро добавить операцию, напиши сумму и описание:\n"
+    "• <code>1200 обед</code> — расход\n"
+    "• <code>+5000 зарплата</code> — доход\n"
+    "Или открой меню: /menu"
+)
+
+
+def alias_candidate(description: str) -> str:
+    """Первое слово описания — синоним, который запомним после выбора категории"""
+    word = normalize(description.split()[0]) if description else ""
+    return word.strip(".,!?:;\"'«»()")[:64]
+
+
+@router.message(
+    StateFilter(None, QuickAddStates.waiting_for_operation),
+    F.text,
+    ~F.text.startswith("/")
+)
+@inject
+async def quick_add(message: Message, state: FSMContext, db: AsyncSession, user: User = None):
+    """Быстрый ввод: «1200 обед», «+5000 зарплата», «кофе 250 #работа»"""
+    parsed = parse_quick_add(message.text)
+    if parsed is None:
+        await message.answer(QUICK_ADD_HINT)
+        return
+    if not user:
+        await message.answer("❌ Пользователь не найден. Используйте /start для регистрации.")
+        return
+
+    description = parsed.description or None
+    tags = normalize_tags(parsed.tags)
+    match = await category_indexes.resolve(db, user.id, parsed.description, parsed.sign)
+
+    if match is None:
+        # Категорию не узнали: спрашиваем и запоминаем ответ как синоним
+        op_type = "income" if parsed.sign == "+" else "expense"
+        categories = await CategoryCRUD.get_user_categories(db, user.id, is_income=op_type == "income")
+        if not categories:
+            await message.answer("❌ У вас нет категорий для этого типа операций. Используйте /start для инициализации.")
+            return
+        await state.set_state(OperationStates.waiting_for_category)
+        await state.update_data(
+            operation_type=op_type,
+            amount=float(parsed.amount),
+            description=description,
+            tags=tags,
+            alias=alias_candidate(parsed.description),
+        )
+        # Модель по прошлым операциям ставит вероятные категории первыми
+        categories = await categorizer.rank(db, user.id, parsed.description, categories)
+        kb = get_category_selection_keyboard(
+            categories,
+            operation_type=op_type,
+            suggested_id=categories[0].id if parsed.description else None
+        )
+        await message.answer(
+            f"{'Доход' if op_type == 'income' else 'Расход'} {parsed.amount:.2f}₽. Выберите категорию:",
+            reply_markup=kb
+        )
+        return
+
+    op_type = "income" if match.is_income else "expense"
+    await OperationCRUD.quick_create(
+        db,
+        OperationCreate(
+            amount=float(parsed.amount),
+            type=op_type,
+            occurred_at=datetime.now(timezone.utc),
+            category_id=match.category_id,
+            description=description,
+            tag_list=tags,
+        ),
+        user.id
+    )
+    # Операция закоммичена: состояние очищаем сразу, а следующие шаги,
+    # как и в process_category, выполняются по возможности
+    await state.clear()
+
+    try:
+        await categorizer.learn(db, user.id, description, match.category_id)
+    except Exception as e:
+        logger.warning(f"Не удалось обновить модель категорий пользователя {user.id}: {e}")
+
+    try:
+        category = await category_catalog.get_or_load(match.category_id)
+    except Exception as e:
+        logger.warning(f"Не удалось загрузить категорию {match.category_id}: {e}")
+        category = None
+    category_name = f"{category.icon} {category.name}" if category else "Неизвестная категория"
+    text = (
+        f"✅ {'Доход' if op_type == 'income' else 'Расход'} {parsed.amount:.2f}₽ сохранён.\n"
+        f"📁 Категория: {category_name}"
+    )
+    if description:
+        text += f"\n📝 {html.escape(description)}"
+    if tags:
+        text += "\n🏷 " + " ".join(f"#{html.escape(tag)}" for tag in tags)
+    if op_type == "expense":
+        try:
+            warnings = await spending_limits.record_expense(db, user, float(parsed.amount))
+        except Exception as e:
+            logger.warning(f"Не удалось проверить лимиты пользователя {user.id}: {e}")
+            warnings = None
+        if warnings:
+            text += "\n\n" + "\n".join(warnings)
+
+    await message.answer(text, reply_markup=main_menu_keyboard())
\ No newline at end of file
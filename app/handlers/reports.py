@@ -1,37 +1,235 @@
-from aiogram import Router, types, F
-from aiogram.filters import Command
-from app.database.database import get_async_session
-from app.database.crud import OperationCRUD
-from app.keyboards.inline import reports_menu_keyboard
-
-router = Router()
-
-@router.message(Command("report"))
-async def report_command(message: types.Message):
-    async with get_async_session() as db:
-        ops = await OperationCRUD.get_user_operations(db, message.from_user.id, limit=20)
-        
-        if not ops:
-            await message.answer("📊 Нет операций за период", reply_markup=reports_menu_keyboard())
-            return
-            
-        text = "📊 <b>Последние операции:</b>\n\n"
-        for o in ops:
-            emoji = "💰" if o.type == "income" else "💸"
-            date_str = o.occurred_at.strftime('%d.%m.%Y %H:%M')
-            text += f"{emoji} <b>{date_str}</b> - {o.amount} ₽\n"
-            text += f"   📁 {o.category_name}\n"
-            if o.description:
-                text += f"   💬 {o.description}\n"
-            text += "\n"
-        
-        await message.answer(text, parse_mode="HTML", reply_markup=reports_menu_keyboard())
-
-@router.callback_query(F.data == "reports")
-async def reports_callback(callback: types.CallbackQuery):
-    await callback.message.edit_text(
-        "📊 <b>Выберите тип отчета:</b>",
-        parse_mode="HTML",
-        reply_markup=reports_menu_keyboard()
-    )
+from html import escape
+from aiogram import Router, types
+from aiogram.filters import Command
+from app.database.database import get_async_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.crud import OperationCRUD, BudgetCRUD
+from app.database.models import User
+from app.keyboards.inline import reports_menu_keyboard, budgets_keyboard, trends_keyboard, tags_report_keyboard
+from app.middlewares.callback_ack import CallbackAck
+from app.middlewares.callbacks import callbacks
+from app.middlewares.dependencies import Dependencies, inject, reply_auth_error
+from app.services.charts import chart_service
+from app.services.file_ids import file_id_cache
+from app.services.report_cache import report_cache
+from app.services.snapshots import screen_snapshots
+from app.utils.formatting import format_budget_overview, format_amount, format_month_label, format_trends, format_period_report, format_tag_report
+from app.utils.periods import current_period, months_back
+
+router = Router()
+
+@router.message(Command("report"))
+async def report_command(message: types.Message):
+    async with get_async_session() as db:
+        ops = await OperationCRUD.get_user_operations(db, message.from_user.id, limit=20)
+        
+        if not ops:
+            await message.answer("📊 Нет операций за период", reply_markup=reports_menu_keyboard())
+            return
+            
+        text = "📊 <b>Последние операции:</b>\n\n"
+        for o in ops:
+            emoji = "💰" if o.type == "income" else "💸"
+            date_str = o.occurred_at.strftime('%d.%m.%Y %H:%M')
+            text += f"{emoji} <b>{date_str}</b> - {o.amount} ₽\n"
+            text += f"   📁 {o.category_name}\n"
+            if o.description:
+                text += f"   💬 {o.description}\n"
+            text += "\n"
+        
+        await message.answer(text, parse_mode="HTML", reply_markup=reports_menu_keyboard())
+
+@callbacks.route("reports")
+async def reports_callback(callback: types.CallbackQuery):
+    await callback.message.edit_text(
+        "📊 <b>Выберите тип отчета:</b>",
+        parse_mode="HTML",
+        reply_markup=reports_menu_keyboard()
+    )
+    await callback.answer()
+
+@callbacks.route("budgets")
+@inject(auth=True)
+async def budgets_callback(callback: types.CallbackQuery, user: User, db: AsyncSession):
+    """Прогресс всех активных бюджетов (один запрос к БД)"""
+    overview = await BudgetCRUD.get_budget_overview(db, user.id)
+    text = format_budget_overview(overview)
+    
+    screen_snapshots.save(callback.from_user.id, "budgets", text, budgets_keyboard(), "HTML")
+    await callback.message.edit_text(
+        text,
+        parse_mode="HTML",
+        reply_markup=budgets_keyboard()
+    )
+    await callback.answer()
+
+async def cached_report(callback: types.CallbackQuery, deps: Dependencies, build):
+    """
+    Отчет из кэша по кнопке callback.data. Пользователь и сессия БД
+    запрашиваются только при промахе: build(user, db) строит отчет и
+    возвращает конец его периода. None — пользователь не найден
+    (ответ уже отправлен).
+    """
+    async def build_for(user):
+        return await build(user, await deps.get("db"))
+
+    report = await report_cache.get_or_build(
+        callback.from_user.id, callback.data, lambda: deps.get("user"), build_for
+    )
+    if report is None:
+        await reply_auth_error(callback)
+    return report
+
+# Кнопки отчетов за текущий период
+REPORT_PERIODS = {
+    "report_today": "day",
+    "report_week": "week",
+    "report_month": "month",
+    "report_year": "year",
+}
+
+@callbacks.route(*REPORT_PERIODS)
+@inject
+async def report_period_callback(callback: types.CallbackQuery, deps: Dependencies):
+    """Отчет за текущий день, неделю, месяц или год в часовом поясе пользователя"""
+    async def build(user: User, db: AsyncSession):
+        period = current_period(user.timezone, REPORT_PERIODS[callback.data])
+        stats = await OperationCRUD.get_statistics_by_period(db, user.id, period.start, period.end)
+        return period.end, format_period_report(period.title, stats)
+    
+    text = await cached_report(callback, deps, build)
+    if text is None:
+        return
+    
+    screen_snapshots.save(callback.from_user.id, callback.data, text, reports_menu_keyboard(), "HTML")
+    await callback.message.edit_text(text, parse_mode="HTML", reply_markup=reports_menu_keyboard())
+    await callback.answer()
+
+@callbacks.route("report_trends")
+@inject
+async def report_trends_callback(callback: types.CallbackQuery, deps: Dependencies):
+    """Доходы и расходы по месяцам за год (текстом, без отрисовки картинки)"""
+    async def build(user: User, db: AsyncSession):
+        month = current_period(user.timezone, "month")
+        rows = await OperationCRUD.get_monthly_totals(db, user.id, user.timezone, months=12)
+        if not rows:
+            return month.end, ""
+        return month.end, format_trends(
+            [format_month_label(row.month) for row in rows],
+            [float(row.income) for row in rows],
+            [float(row.expense) for row in rows]
+        )
+    
+    text = await cached_report(callback, deps, build)
+    if text is None:
+        return
+    if not text:
+        await callback.answer("📈 Нет операций за последний год", show_alert=True)
+        return
+    
+    screen_snapshots.save(callback.from_user.id, "report_trends", text, trends_keyboard(), "HTML")
+    await callback.message.edit_text(text, parse_mode="HTML", reply_markup=trends_keyboard())
+    await callback.answer()
+
+@callbacks.route("report_tags")
+@inject
+async def report_tags_callback(callback: types.CallbackQuery, deps: Dependencies):
+    """Расходы по тегам по месяцам за полгода"""
+    months = 6
+    
+    async def build(user: User, db: AsyncSession):
+        month = current_period(user.timezone, "month")
+        rows = await OperationCRUD.get_tag_monthly_totals(db, user.id, user.timezone, months=months)
+        if not rows:
+            return month.end, ""
+        # Все месяцы периода, включая месяцы без расходов по тегам
+        start = months_back(user.timezone, months).replace(tzinfo=None)
+        month_starts = [
+            start.replace(year=start.year + (start.month - 1 + i) // 12, month=(start.month - 1 + i) % 12 + 1)
+            for i in range(months)
+        ]
+        position = {month_start: i for i, month_start in enumerate(month_starts)}
+        totals = {}
+        for row in rows:
+            values = totals.setdefault(row.tag, [0.0] * months)
+            index = position.get(row.month.replace(tzinfo=None))
+            if index is not None:
+                values[index] += float(row.total)
+        return month.end, format_tag_report([format_month_label(month_start) for month_start in month_starts], totals)
+    
+    text = await cached_report(callback, deps, build)
+    if text is None:
+        return
+    if not text:
+        await callback.answer("🏷 Нет расходов с тегами за полгода. Добавь тег: 350 кофе #работа", show_alert=True)
+        return
+    
+    screen_snapshots.save(callback.from_user.id, "report_tags", text, tags_report_keyboard(), "HTML")
+    await callback.message.edit_text(text, parse_mode="HTML", reply_markup=tags_report_keyboard())
+    await callback.answer()
+
+@callbacks.route("report_trends_chart")
+@inject(auth=True)
+async def report_trends_chart_callback(callback: types.CallbackQuery, user: User, db: AsyncSession, callback_ack: CallbackAck):
+    """Доходы и расходы по месяцам за год (график)"""
+    rows = await OperationCRUD.get_monthly_totals(db, user.id, user.timezone, months=12)
+    if not rows:
+        await callback.answer("📈 Нет операций за последний год", show_alert=True)
+        return
+    
+    await callback_ack.loading("⏳ Строю график…")
+    labels = [format_month_label(row.month) for row in rows]
+    series = {
+        "income": [float(row.income) for row in rows],
+        "expense": [float(row.expense) for row in rows],
+    }
+    chart = await chart_service.render("trends", "Доходы и расходы по месяцам", labels, series)
+    
+    total_income = sum(row.income for row in rows)
+    total_expense = sum(row.expense for row in rows)
+    caption = (
+        f"📈 <b>Тренды за {len(rows)} мес.</b>\n"
+        f"Доходы: {format_amount(total_income)}\n"
+        f"Расходы: {format_amount(total_expense)}"
+    )
+    await file_id_cache.send_photo(
+        callback.bot,
+        callback.message.chat.id,
+        chart.digest,
+        chart.png,
+        "trends.png",
+        caption=caption,
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+@callbacks.route("report_categories")
+@inject(auth=True)
+async def report_categories_callback(callback: types.CallbackQuery, user: User, db: AsyncSession, callback_ack: CallbackAck):
+    """Расходы текущего месяца по категориям (график)"""
+    month = current_period(user.timezone, "month")
+    rows = await OperationCRUD.get_expenses_by_category(db, user.id, month.start, month.end)
+    if not rows:
+        await callback.answer("📊 В этом месяце расходов нет", show_alert=True)
+        return
+    
+    await callback_ack.loading("⏳ Строю график…")
+    labels = [row.name or "Без категории" for row in rows]
+    series = {"expense": [float(row.total) for row in rows]}
+    chart = await chart_service.render("categories", "Расходы по категориям за месяц", labels, series)
+    
+    caption = "📊 <b>Расходы по категориям за месяц</b>\n\n"
+    caption += "\n".join(
+        f"{row.icon or '📦'} {escape(row.name or 'Без категории')}: {format_amount(row.total)}"
+        for row in rows[:10]
+    )
+    await file_id_cache.send_photo(
+        callback.bot,
+        callback.message.chat.id,
+        chart.digest,
+        chart.png,
+        "categories.png",
+        caption=caption,
+        parse_mode="HTML"
+    )
     await callback.answer()
\ No newline at end of file
@@ -0,0 +1,108 @@
+from datetime import datetime
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message, CallbackQuery
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.crud import OperationCRUD
+from app.database.models import User
+from app.keyboards.inline import search_results_keyboard
+from app.middlewares.callbacks import callbacks
+from app.middlewares.dependencies import inject
+from app.utils.formatting import format_search_results
+from app.utils.periods import get_zone
+from app.utils.search import parse_search_query
+
+router = Router()
+
+PAGE_SIZE = 10
+
+SEARCH_HELP = (
+    "🔍 <b>Поиск операций</b>\n\n"
+    "<code>/search такси</code> — по описанию (с опечатками и частями слов)\n"
+    "<code>/search такси в марте</code> — за месяц\n"
+    "<code>/search аптека 01.03.2024-15.03.2024</code> — за даты\n"
+    "<code>/search кофе @кафе</code> — в категории\n"
+    "<code>/search #отпуск</code> — по тегу"
+)
+
+
+def _parse_moment(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+async def show_search_page(db: AsyncSession, user: User, search: dict) -> tuple:
+    """Страница результатов для сохраненного запроса; обновляет курсор в search"""
+    after = search.get("after")
+    rows = await OperationCRUD.search_operations(
+        db,
+        user.id,
+        search["text"],
+        start=_parse_moment(search.get("start")),
+        end=_parse_moment(search.get("end")),
+        category=search.get("category"),
+        tags=search.get("tags", ()),
+        after=(datetime.fromisoformat(after[0]), after[1]) if after else None,
+        limit=PAGE_SIZE
+    )
+    has_more = len(rows) > PAGE_SIZE
+    rows = rows[:PAGE_SIZE]
+
+    text = format_search_results(search["query"], rows, get_zone(user.timezone), offset=search.get("shown", 0))
+    if rows:
+        search["after"] = [rows[-1].occurred_at.isoformat(), rows[-1].id]
+        search["shown"] = search.get("shown", 0) + len(rows)
+    return text, search_results_keyboard(has_more)
+
+
+@router.message(Command("search"))
+@inject
+async def search_command(
+    message: Message,
+    command: CommandObject,
+    state: FSMContext,
+    db: AsyncSession,
+    user: User = None
+):
+    if not command.args:
+        await message.answer(SEARCH_HELP)
+        return
+    if not user:
+        await message.answer("❌ Пользователь не найден. Используйте /start для регистрации.")
+        return
+
+    parsed = parse_search_query(command.args, user.timezone)
+    if not parsed.text and parsed.start is None and parsed.category is None and not parsed.tags:
+        await message.answer(SEARCH_HELP)
+        return
+
+    # Запрос и курсор хранятся в данных FSM для кнопок «Дальше» и «В начало»
+    search = {
+        "query": command.args,
+        "text": parsed.text,
+        "start": parsed.start.isoformat() if parsed.start else None,
+        "end": parsed.end.isoformat() if parsed.end else None,
+        "category": parsed.category,
+        "tags": list(parsed.tags),
+    }
+    text, keyboard = await show_search_page(db, user, search)
+    await state.update_data(search=search)
+    await message.answer(text, reply_markup=keyboard)
+
+
+@callbacks.route("search_more", "search_first")
+@inject
+async def search_page_callback(callback: CallbackQuery, state: FSMContext, db: AsyncSession, user: User = None):
+    search = (await state.get_data()).get("search")
+    if not search or not user:
+        await callback.answer("Поиск устарел, повтори /search", show_alert=True)
+        return
+
+    if callback.data == "search_first":
+        search.pop("after", None)
+        search.pop("shown", None)
+
+    text, keyboard = await show_search_page(db, user, search)
+    await state.update_data(search=search)
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
\ No newline at end of file
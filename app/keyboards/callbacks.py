@@ -0,0 +1,31 @@
+from typing import Literal, Optional
+from aiogram.filters.callback_data import CallbackData
+
+# Данные кнопок с аргументами. Префикс — ключ в таблице маршрутов
+# CallbackDispatcher, аргументы разбираются и проверяются один раз при
+# поиске обработчика, обработчик получает готовый объект в callback_data.
+# Кнопки без аргументов используют просто строку-префикс.
+
+
+class SelectCategory(CallbackData, prefix="select_category"):
+    """Выбор категории для новой операции"""
+    category_id: int
+    operation_type: Optional[Literal["income", "expense"]] = None
+
+
+class EditCategory(CallbackData, prefix="edit_category"):
+    category_id: int
+
+
+class DeleteCategory(CallbackData, prefix="delete_category"):
+    """Запрос подтверждения удаления"""
+    category_id: int
+
+
+class ConfirmDelete(CallbackData, prefix="confirm_delete"):
+    category_id: int
+
+
+class CategoryType(CallbackData, prefix="category_type"):
+    """Тип новой категории"""
+    category_type: Literal["income", "expense"]
\ No newline at end of file
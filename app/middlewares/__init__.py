@@ -1,4 +1,4 @@
-from .auth import AuthMiddleware
-from .logging import LoggingMiddleware
-
-__all__ = ["AuthMiddleware", "LoggingMiddleware"]
\ No newline at end of file
+from .dependencies import DependencyMiddleware, inject
+from .logging import LoggingMiddleware
+
+__all__ = ["DependencyMiddleware", "LoggingMiddleware", "inject"]
\ No newline at end of file
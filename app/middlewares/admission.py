@@ -0,0 +1,137 @@
+import logging
+import time
+from enum import IntEnum
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Message, CallbackQuery
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BUSY_TEXT = "⏳ Сервис сейчас перегружен. Попробуй еще раз через минуту."
+
+
+class Priority(IntEnum):
+    """Приоритет апдейта при перегрузке"""
+    LOW = 0        # отчеты, история, экспорт — отбрасываются первыми
+    NORMAL = 1     # навигация по меню
+    CRITICAL = 2   # запись операций и шаги FSM — принимаются всегда
+
+
+# Callback-и тяжелых экранов, которые можно отложить
+LOW_PRIORITY_CALLBACKS = ("reports", "report_", "history", "export_data", "import_data")
+LOW_PRIORITY_COMMANDS = ("/report", "/export")
+# Callback-и, которые завершают запись данных пользователя
+CRITICAL_CALLBACKS = ("select_category:", "confirm_save", "category_type:", "confirm_delete:")
+
+
+class PoolWaitMonitor:
+    """
+    Скользящая оценка времени ожидания соединения из пула БД.
+    Значение затухает со временем, чтобы после пика нагрузки
+    контроллер не продолжал отбрасывать апдейты бесконечно.
+    """
+
+    def __init__(self, alpha: float = 0.2, half_life: float = 10.0):
+        self.alpha = alpha
+        self.half_life = half_life
+        self._value = 0.0
+        self._updated_at = time.monotonic()
+
+    def observe(self, seconds: float) -> None:
+        """Записать время ожидания pool.acquire"""
+        self._value = self.alpha * seconds + (1 - self.alpha) * self.value
+        self._updated_at = time.monotonic()
+        metrics.observe("db_pool_wait_seconds", seconds)
+
+    @property
+    def value(self) -> float:
+        elapsed = time.monotonic() - self._updated_at
+        return self._value * 0.5 ** (elapsed / self.half_life)
+
+
+pool_monitor = PoolWaitMonitor()
+
+
+def classify(event: TelegramObject, data: Dict[str, Any]) -> Priority:
+    """Определить приоритет апдейта"""
+    if isinstance(event, CallbackQuery):
+        callback_data = event.data or ""
+        if callback_data.startswith(CRITICAL_CALLBACKS):
+            return Priority.CRITICAL
+        if callback_data.startswith(LOW_PRIORITY_CALLBACKS):
+            return Priority.LOW
+        return Priority.NORMAL
+
+    if isinstance(event, Message):
+        # Пользователь в середине сценария (ввод суммы, названия и т.п.)
+        if data.get("raw_state"):
+            return Priority.CRITICAL
+        if event.text and event.text.startswith(LOW_PRIORITY_COMMANDS):
+            return Priority.LOW
+
+    return Priority.NORMAL
+
+
+class AdmissionMiddleware(BaseMiddleware):
+    """
+    Middleware контроля нагрузки.
+
+    Ограничивает число одновременно обрабатываемых апдейтов и при
+    перегрузке (много апдейтов в работе или долгое ожидание пула БД)
+    сразу отвечает "сервис занят" на низкоприоритетные запросы.
+    Запись операций принимается всегда.
+
+    Args:
+        max_in_flight: Жесткий предел для обычных апдейтов
+        shed_in_flight: Порог, после которого отбрасываются низкоприоритетные
+        shed_pool_wait: Порог среднего ожидания пула БД в секундах
+    """
+
+    def __init__(self, max_in_flight: int = 200, shed_in_flight: int = 100, shed_pool_wait: float = 0.5):
+        self.max_in_flight = max_in_flight
+        self.shed_in_flight = shed_in_flight
+        self.shed_pool_wait = shed_pool_wait
+        self.in_flight = 0
+
+    def _admit(self, priority: Priority) -> bool:
+        if priority == Priority.CRITICAL:
+            return True
+        if priority == Priority.NORMAL:
+            return self.in_flight < self.max_in_flight
+        return self.in_flight < self.shed_in_flight and pool_monitor.value < self.shed_pool_wait
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        priority = classify(event, data)
+
+        if not self._admit(priority):
+            metrics.inc("updates_shed_total", priority=priority.name.lower())
+            logger.warning(
+                f"Апдейт отброшен: priority={priority.name}, in_flight={self.in_flight}, "
+                f"pool_wait={pool_monitor.value:.3f}s"
+            )
+            await self._reply_busy(event)
+            return None
+
+        self.in_flight += 1
+        metrics.set("updates_in_flight", self.in_flight)
+        try:
+            return await handler(event, data)
+        finally:
+            self.in_flight -= 1
+            metrics.set("updates_in_flight", self.in_flight)
+
+    @staticmethod
+    async def _reply_busy(event: TelegramObject) -> None:
+        try:
+            if isinstance(event, (Message, CallbackQuery)):
+                await event.answer(BUSY_TEXT)
+        except Exception as e:
+            logger.debug(f"Не удалось отправить ответ о перегрузке: {e}")
\ No newline at end of file
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Set
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+
+from app.services.callback_answers import CallbackAnswers
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackAck:
+    """
+    Раннее подтверждение callback-а, доступное обработчику как callback_ack.
+
+    Долгий обработчик может сразу показать состояние загрузки:
+        await callback_ack.loading("⏳ Строю график…")
+    """
+
+    __slots__ = ("callback", "answers")
+
+    def __init__(self, callback: CallbackQuery, answers: CallbackAnswers):
+        self.callback = callback
+        self.answers = answers
+
+    @property
+    def answered(self) -> bool:
+        return self.answers.is_answered(self.callback.id)
+
+    async def answer(self, text: str = None) -> None:
+        """Ответить на callback, если ответа еще не было"""
+        if self.answered:
+            return
+        try:
+            await self.callback.answer(text)
+        except Exception as e:
+            logger.warning(f"Не удалось подтвердить callback: {e}")
+
+    async def loading(self, text: str = "⏳ Загрузка…") -> None:
+        await self.answer(text)
+
+
+class CallbackAckMiddleware(BaseMiddleware):
+    """
+    Раннее подтверждение callback-запросов.
+
+    Пока callback не подтвержден, Telegram показывает на кнопке индикатор
+    загрузки. Если обработчик не ответил сам за delay секунд (обычно его
+    держит запрос к БД или отрисовка), ответ отправляется параллельно с
+    его работой, а итоговый экран приходит правкой сообщения, когда готов.
+    Быстрые обработчики успевают ответить сами, и их подсказки не теряются;
+    всплывающая подсказка (без show_alert) после раннего ответа не
+    показывается — ее нужно отправить до долгой работы.
+    После обработчика callback подтверждается, если ответа так и не было.
+
+    Повторные ответы отсекает CallbackAnswers на уровне сессии бота.
+    Метрики: callback_ack_seconds — время до ответа (воспринимаемая
+    задержка), callback_handler_seconds — полное время обработки.
+    """
+
+    def __init__(self, answers: CallbackAnswers, delay: float = 0.1):
+        self.answers = answers
+        self.delay = delay
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        started = time.monotonic()
+        self.answers.track(event.id, event.message.chat.id if event.message else None)
+        ack = CallbackAck(event, self.answers)
+        data["callback_ack"] = ack
+
+        early = asyncio.get_running_loop().create_task(self._answer_later(ack))
+        self._tasks.add(early)
+        early.add_done_callback(self._tasks.discard)
+        try:
+            return await handler(event, data)
+        finally:
+            metrics.observe("callback_handler_seconds", time.monotonic() - started)
+            # Уже отправленный ранний ответ не прерываем
+            if not ack.answered:
+                early.cancel()
+                await ack.answer()
+
+    async def _answer_later(self, ack: CallbackAck) -> None:
+        await asyncio.sleep(self.delay)
+        if not ack.answered:
+            metrics.inc("callback_early_acks_total")
+            await ack.answer()
\ No newline at end of file
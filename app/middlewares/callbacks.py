@@ -0,0 +1,123 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, Type, Union
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STALE_BUTTON_TEXT = "⚠️ Эта кнопка устарела или недоступна. Открой меню: /menu"
+
+ANY_STATE = "*"
+
+
+class CallbackRoute(NamedTuple):
+    prefix: str
+    factory: Optional[Type[CallbackData]]  # None — кнопка без аргументов
+    state: Optional[str]                   # ANY_STATE, None (без состояния) или имя состояния
+    handler: HandlerObject
+
+
+class CallbackDispatcher:
+    """
+    Маршрутизация callback-запросов по префиксу данных кнопки.
+
+    Обработчики регистрируются в таблице «префикс → маршруты», поэтому
+    поиск обработчика — одно обращение к словару вместо перебора фильтров
+    F.data во всех роутерах. Префикс — часть данных до первого «:».
+    Аргументы кнопки разбираются один раз фабрикой CallbackData и
+    передаются обработчику в callback_data.
+
+    Поиск выполняет outer middleware роутера, то есть до middleware
+    диспетчера: неизвестные кнопки сразу получают ответ и не занимают
+    соединение с БД. Найденный маршрут доступен middleware в
+    data["callback_route"].
+    """
+
+    def __init__(self, name: str = "callbacks"):
+        self.routes: Dict[str, List[CallbackRoute]] = {}
+        self.router = Router(name=name)
+        self.router.callback_query.outer_middleware(self._resolve)
+        self.router.callback_query()(self._dispatch)
+
+    def route(
+        self,
+        *keys: Union[str, Type[CallbackData]],
+        state: Union[str, State, None] = ANY_STATE
+    ) -> Callable:
+        """
+        Зарегистрировать обработчик для кнопок с данными-строками
+        или фабрикой CallbackData. state ограничивает маршрут
+        состоянием FSM (None — только вне сценария); маршруты
+        с состоянием проверяются раньше маршрутов без него.
+        Маршруты одного префикса для разных состояний могут разбирать
+        аргументы разными фабриками.
+        """
+        if isinstance(state, State):
+            state = state.state
+
+        def decorator(callback: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            handler = HandlerObject(callback)
+            for key in keys:
+                factory = key if isinstance(key, type) and issubclass(key, CallbackData) else None
+                prefix = factory.__prefix__ if factory else key
+                routes = self.routes.setdefault(prefix, [])
+                for existing in routes:
+                    if existing.state == state:
+                        raise ValueError(f"Маршрут {prefix!r} для состояния {state!r} уже зарегистрирован")
+                routes.append(CallbackRoute(prefix, factory, state, handler))
+                routes.sort(key=lambda route: route.state == ANY_STATE)
+            return callback
+
+        return decorator
+
+    def match(self, data: str, raw_state: Optional[str]) -> Optional[Tuple[CallbackRoute, Optional[CallbackData]]]:
+        """
+        Маршрут и разобранные аргументы для данных кнопки или None.
+        Сначала выбирается маршрут по состоянию, затем аргументы
+        разбираются фабрикой этого маршрута.
+        """
+        prefix, _, args = data.partition(":")
+        for route in self.routes.get(prefix, ()):
+            if route.state == ANY_STATE or route.state == raw_state:
+                break
+        else:
+            return None
+
+        if route.factory is None:
+            return (route, None) if not args else None
+        try:
+            return route, route.factory.unpack(data)
+        except (TypeError, ValueError):
+            return None
+
+    async def _resolve(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        found = self.match(event.data or "", data.get("raw_state"))
+        if found is None:
+            metrics.inc("callback_unrouted_total")
+            logger.info(f"Кнопка без обработчика: {event.data!r}")
+            await event.answer(STALE_BUTTON_TEXT)
+            return None
+
+        route, callback_data = found
+        data["callback_route"] = route
+        if callback_data is not None:
+            data["callback_data"] = callback_data
+        return await handler(event, data)
+
+    @staticmethod
+    async def _dispatch(callback: CallbackQuery, callback_route: CallbackRoute, **kwargs: Any) -> Any:
+        return await callback_route.handler.call(callback, callback_route=callback_route, **kwargs)
+
+
+callbacks = CallbackDispatcher()
\ No newline at end of file
@@ -1,17 +0,0 @@
-from typing import Callable, Dict, Any, Awaitable
-from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.database.database import get_async_session
-
-class DatabaseMiddleware(BaseMiddleware):
-    async def __call__(
-        self,
-        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
-        event: TelegramObject,
-        data: Dict[str, Any]
-    ) -> Any:
-        """Middleware для предоставления сессии БД"""
-        async with get_async_session() as session:
-            data['db'] = session
-            return await handler(event, data)
\ No newline at end of file
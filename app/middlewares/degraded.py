@@ -0,0 +1,100 @@
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Any, Awaitable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Message, CallbackQuery
+
+from app.services.circuit_breaker import is_db_failure
+from app.services.snapshots import screen_snapshots
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE_TEXT = "⚠️ База данных временно недоступна. Попробуй еще раз через пару минут."
+
+
+def offline_fallback(fallback: Callable[..., Awaitable[Any]]):
+    """
+    Назначить обработчику запасной вариант на время недоступности БД.
+    Запасной обработчик вызывается как fallback(event, state).
+    """
+    def decorator(handler):
+        handler.offline_fallback = fallback
+        return handler
+    return decorator
+
+
+def screen_key(event: TelegramObject) -> Optional[str]:
+    """Ключ экрана: данные callback-а или команда без слэша"""
+    if isinstance(event, CallbackQuery):
+        return event.data
+    if isinstance(event, Message) and event.text and event.text.startswith("/"):
+        return event.text.split()[0][1:].split("@")[0]
+    return None
+
+
+def stale_marker(saved_at: float, parse_mode: Optional[str]) -> str:
+    note = f"⚠️ Данные на {datetime.fromtimestamp(saved_at).strftime('%d.%m %H:%M')} — база временно недоступна"
+    if parse_mode == "Markdown":
+        return f"\n\n_{note}_"
+    return f"\n\n<i>{note}</i>"
+
+
+class DegradedModeMiddleware(BaseMiddleware):
+    """
+    Middleware деградированного режима.
+
+    Если обработчик упал из-за недоступности БД (автомат разомкнут или
+    ошибка соединения), вызывается его запасной обработчик (offline_fallback),
+    экраны чтения показываются из последнего сохраненного снимка с пометкой
+    об устаревании, а остальные действия быстро отклоняются понятным
+    сообщением.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            if not is_db_failure(e):
+                raise
+            logger.warning(f"Деградированный режим: {e}")
+            
+            # Для callback-ов обработчик — маршрут CallbackDispatcher, а не
+            # общий обработчик его роутера
+            route = data.get("callback_route")
+            handler_object = route.handler if route is not None else data.get("handler")
+            fallback = getattr(getattr(handler_object, "callback", None), "offline_fallback", None)
+            if fallback is not None:
+                metrics.inc("degraded_responses_total", kind="offline")
+                return await fallback(event, data.get("state"))
+            
+            await self._fallback(event)
+
+    async def _fallback(self, event: TelegramObject) -> None:
+        key = screen_key(event)
+        user = getattr(event, "from_user", None)
+        snapshot = screen_snapshots.get(user.id, key) if user and key else None
+
+        if snapshot is None:
+            metrics.inc("degraded_responses_total", kind="refused")
+            if isinstance(event, CallbackQuery):
+                await event.answer(UNAVAILABLE_TEXT, show_alert=True)
+            elif isinstance(event, Message):
+                await event.answer(UNAVAILABLE_TEXT)
+            return
+
+        metrics.inc("degraded_responses_total", kind="stale")
+        text = snapshot.text + stale_marker(snapshot.saved_at, snapshot.parse_mode)
+        # Без явного parse_mode работает parse_mode бота по умолчанию (HTML)
+        kwargs = {"parse_mode": snapshot.parse_mode} if snapshot.parse_mode else {}
+        if isinstance(event, CallbackQuery):
+            await event.message.edit_text(text, reply_markup=snapshot.reply_markup, **kwargs)
+            await event.answer()
+        elif isinstance(event, Message):
+            await event.answer(text, reply_markup=snapshot.reply_markup, **kwargs)
\ No newline at end of file
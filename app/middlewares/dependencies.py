@@ -0,0 +1,193 @@
+import inspect
+import logging
+import time
+from contextlib import AsyncExitStack
+from functools import WRAPPER_ASSIGNMENTS
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from app.database.crud import CategoryCRUD, UserCRUD
+from app.database.database import get_async_session
+from app.middlewares.admission import pool_monitor
+from app.services.circuit_breaker import is_db_failure
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+AUTH_ERROR_TEXT = "❌ Ошибка аутентификации. Используйте /start для регистрации."
+
+Provider = Callable[["Dependencies"], Awaitable[Any]]
+
+# Сигнатура обертки @inject: aiogram передает ей все данные апдейта
+INJECTED_SIGNATURE = inspect.Signature([
+    inspect.Parameter("event", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=TelegramObject),
+    inspect.Parameter("data", inspect.Parameter.VAR_KEYWORD, annotation=Any),
+])
+
+# Зависимости, которые обработчик может запросить по имени параметра
+PROVIDERS: Dict[str, Provider] = {}
+
+
+def provider(name: str) -> Callable[[Provider], Provider]:
+    def decorator(func: Provider) -> Provider:
+        PROVIDERS[name] = func
+        return func
+    return decorator
+
+
+class Dependencies:
+    """
+    Зависимости одного апдейта.
+
+    Создаются при первом запросе и кэшируются до конца апдейта:
+    сессия БД открывается, только если она нужна обработчику, и
+    закрывается (с коммитом или откатом) после его завершения.
+    """
+
+    __slots__ = ("event", "settings", "stack", "_values")
+
+    def __init__(self, event: TelegramObject, settings: Any = None):
+        self.event = event
+        self.settings = settings
+        self.stack = AsyncExitStack()
+        self._values: Dict[str, Any] = {}
+
+    async def get(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        value = await PROVIDERS[name](self)
+        self._values[name] = value
+        metrics.inc("dependency_resolved_total", dependency=name)
+        return value
+
+
+@provider("db")
+async def provide_db(deps: Dependencies):
+    session = await deps.stack.enter_async_context(get_async_session())
+    # Берем соединение сразу, чтобы измерить ожидание пула
+    started = time.monotonic()
+    await session.connection()
+    pool_monitor.observe(time.monotonic() - started)
+    return session
+
+
+@provider("user")
+async def provide_user(deps: Dependencies):
+    """Пользователь из БД; новый пользователь создается при первом обращении"""
+    telegram_user = getattr(deps.event, "from_user", None)
+    if telegram_user is None:
+        return None
+    db = await deps.get("db")
+    try:
+        user, _ = await UserCRUD.get_or_create_user(
+            db=db,
+            telegram_id=telegram_user.id,
+            first_name=telegram_user.first_name or "Пользователь",
+            last_name=telegram_user.last_name,
+            username=telegram_user.username
+        )
+    except Exception as e:
+        # Недоступность БД обрабатывает DegradedModeMiddleware
+        if is_db_failure(e):
+            raise
+        logger.warning(f"Пользователь {telegram_user.id} не получен: {e}")
+        return None
+    return user
+
+
+@provider("categories")
+async def provide_categories(deps: Dependencies):
+    """Все категории пользователя"""
+    user = await deps.get("user")
+    if user is None:
+        return []
+    return await CategoryCRUD.get_user_categories(await deps.get("db"), user.id)
+
+
+@provider("settings")
+async def provide_settings(deps: Dependencies):
+    """Настройки приложения (config.settings)"""
+    return deps.settings
+
+
+class DependencyMiddleware(BaseMiddleware):
+    """
+    Middleware зависимостей: кладет в данные апдейта контейнер
+    Dependencies, из которого обработчики с @inject получают
+    только объявленные зависимости.
+    """
+
+    def __init__(self, settings: Any = None):
+        self.settings = settings
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        deps = Dependencies(event, self.settings)
+        data["deps"] = deps
+        async with deps.stack:
+            return await handler(event, data)
+
+
+async def reply_auth_error(event: TelegramObject) -> None:
+    """Сообщить, что пользователь не найден в БД"""
+    if isinstance(event, Message):
+        await event.reply(AUTH_ERROR_TEXT)
+    elif isinstance(event, CallbackQuery):
+        await event.answer(AUTH_ERROR_TEXT, show_alert=True)
+
+
+def inject(handler: Optional[Callable[..., Awaitable[Any]]] = None, *, auth: bool = False):
+    """
+    Внедрение зависимостей в обработчик.
+
+    Сигнатура разбирается один раз при регистрации: параметры с именами
+    зависимостей (db, user, categories, settings) берутся из контейнера
+    апдейта, остальные (state, callback_data, ...) — из данных aiogram.
+    С auth=True обработчик вызывается только для найденного пользователя.
+
+        @callbacks.route("budgets")
+        @inject(auth=True)
+        async def budgets_callback(callback: CallbackQuery, user: User, db: AsyncSession): ...
+    """
+    def decorator(handler: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        parameters = list(inspect.signature(handler).parameters.values())[1:]  # первый — событие
+        plan = tuple(
+            (parameter.name, parameter.name in PROVIDERS)
+            for parameter in parameters
+            if parameter.kind not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+        )
+
+        async def wrapper(event: TelegramObject, **data: Any) -> Any:
+            deps: Dependencies = data["deps"]
+            if auth and await deps.get("user") is None:
+                await reply_auth_error(event)
+                return None
+
+            kwargs = {}
+            for name, provided in plan:
+                if provided:
+                    kwargs[name] = await deps.get(name)
+                elif name in data:
+                    kwargs[name] = data[name]
+            return await handler(event, **kwargs)
+
+        # Имя, документация и флаги aiogram переносятся с обработчика, но
+        # __wrapped__ не ставится: aiogram разворачивает его и передал бы
+        # обертке только параметры исходного обработчика, без контейнера deps.
+        # Сигнатура обертки задается явно.
+        for attr in WRAPPER_ASSIGNMENTS:
+            if hasattr(handler, attr):
+                setattr(wrapper, attr, getattr(handler, attr))
+        wrapper.__dict__.update((key, value) for key, value in vars(handler).items() if key != "__wrapped__")
+        wrapper.__signature__ = INJECTED_SIGNATURE
+        return wrapper
+
+    return decorator(handler) if handler is not None else decorator
\ No newline at end of file
@@ -0,0 +1,24 @@
+import asyncio
+import logging
+
+from app.database.crud import BudgetCRUD
+from app.database.database import get_async_session
+from app.services.circuit_breaker import is_db_failure
+
+logger = logging.getLogger(__name__)
+
+
+async def run_budget_reconciler(interval: float = 3600.0) -> None:
+    """
+    Фоновая задача: сверяет счетчики бюджетов с операциями
+    и убирает счетчики прошедших периодов.
+    """
+    while True:
+        try:
+            async with get_async_session() as db:
+                repaired = await BudgetCRUD.reconcile_spend_counters(db)
+            logger.info(f"Счетчики бюджетов сверены: {repaired}")
+        except Exception as e:
+            if not is_db_failure(e):
+                logger.exception(f"Ошибка сверки счетчиков бюджетов: {e}")
+        await asyncio.sleep(interval)
\ No newline at end of file
@@ -0,0 +1,88 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import AnswerCallbackQuery, SendMessage, TelegramMethod
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _Callback(NamedTuple):
+    chat_id: Optional[int]
+    received_at: float
+    answered: bool
+
+
+class CallbackAnswers(BaseRequestMiddleware):
+    """
+    Ровно один answerCallbackQuery на callback.
+
+    Telegram принимает только первый ответ на callback, повторный
+    заканчивается ошибкой. Когда ответ уже отправлен (например, ранним
+    подтверждением CallbackAckMiddleware), повторные answer() обработчика
+    не уходят в Telegram: пустые и всплывающие подсказки отбрасываются,
+    а окна с show_alert=True отправляются сообщением в чат, чтобы
+    пользователь не потерял ошибку. Поэтому подсказку, которую нельзя
+    потерять, обработчик отправляет до долгой работы или показывает
+    результат правкой сообщения.
+
+    Для отслеживаемых callback-ов измеряется время до первого ответа —
+    сколько пользователь видит индикатор загрузки на кнопке.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, _Callback]" = OrderedDict()
+
+    def track(self, callback_query_id: str, chat_id: Optional[int]) -> None:
+        """Начать отслеживание callback-а (при получении апдейта)"""
+        self._items[callback_query_id] = _Callback(chat_id, time.monotonic(), False)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def is_answered(self, callback_query_id: str) -> bool:
+        item = self._items.get(callback_query_id)
+        return item is not None and item.answered
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Any:
+        if not isinstance(method, AnswerCallbackQuery):
+            return await make_request(bot, method)
+
+        item = self._items.get(method.callback_query_id)
+        if item is None:
+            return await make_request(bot, method)
+
+        if item.answered:
+            if method.show_alert and method.text and item.chat_id is not None:
+                metrics.inc("callback_answers_total", result="alert_as_message")
+                await make_request(bot, SendMessage(chat_id=item.chat_id, text=method.text, parse_mode=None))
+            elif method.text:
+                metrics.inc("callback_answers_total", result="toast_dropped")
+                logger.debug(f"Подсказка после раннего ответа отброшена: {method.text!r}")
+            else:
+                metrics.inc("callback_answers_total", result="duplicate")
+            return True
+
+        # Отмечаем до запроса: параллельный второй ответ уже считается повтором
+        self._items[method.callback_query_id] = item._replace(answered=True)
+        try:
+            result = await make_request(bot, method)
+        except BaseException:
+            self._items[method.callback_query_id] = item
+            raise
+        metrics.inc("callback_answers_total", result="sent")
+        metrics.observe("callback_ack_seconds", time.monotonic() - item.received_at)
+        return result
+
+
+callback_answers = CallbackAnswers()
\ No newline at end of file
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import logging
+import math
+import sys
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.crud import OperationCRUD
+from app.database.redis import redis_client
+from app.utils.metrics import metrics
+from app.utils.quick_add import normalize
+
+logger = logging.getLogger(__name__)
+
+
+def features(text: Optional[str]) -> List[str]:
+    """
+    Признаки описания: слова целиком и символьные триграммы слов.
+    Строки интернируются: одни и те же триграммы встречаются в моделях
+    всех пользователей и хранятся в памяти один раз.
+    """
+    result = []
+    for word in normalize(text or "").split():
+        word = word.strip(".,!?:;\"'«»()#")
+        if not word or word[0].isdigit():
+            continue
+        result.append(sys.intern(word))
+        padded = f" {word} "
+        result.extend(sys.intern(padded[i:i + 3]) for i in range(len(padded) - 2))
+    return result
+
+
+class CategoryModel:
+    """
+    Мультиномиальный наивный байесовский классификатор «описание → категория»
+    одного пользователя.
+
+    Хранит только счетчики: число операций по категориям и число признаков
+    по категориям. Обучение — увеличение счетчиков, предсказание — сумма
+    логарифмов по признакам описания для каждой категории. Размер ограничен
+    max_entries: при переполнении все счетчики делятся пополам, редкие
+    признаки исчезают, а недавние операции весят больше старых.
+    """
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self.docs: Dict[int, int] = {}
+        self.counts: Dict[int, Dict[str, int]] = {}
+        self.totals: Dict[int, int] = {}
+        self.vocabulary: Dict[str, int] = {}  # признак -> в скольких категориях встречается
+        self.entries = 0
+
+    def learn(self, text: Optional[str], category_id: int) -> None:
+        self.docs[category_id] = self.docs.get(category_id, 0) + 1
+        counts = self.counts.setdefault(category_id, {})
+        for feature in features(text):
+            if feature not in counts:
+                counts[feature] = 0
+                self.entries += 1
+                self.vocabulary[feature] = self.vocabulary.get(feature, 0) + 1
+            counts[feature] += 1
+            self.totals[category_id] = self.totals.get(category_id, 0) + 1
+        if self.entries > self.max_entries:
+            self._decay()
+
+    def _decay(self) -> None:
+        docs = {category_id: n // 2 for category_id, n in self.docs.items() if n // 2}
+        counts = {
+            category_id: {feature: n // 2 for feature, n in counts.items() if n // 2}
+            for category_id, counts in self.counts.items()
+        }
+        self._load(docs, counts)
+
+    def _load(self, docs: Dict[int, int], counts: Dict[int, Dict[str, int]]) -> None:
+        self.docs = docs
+        self.counts = {category_id: table for category_id, table in counts.items() if table}
+        self.totals = {category_id: sum(table.values()) for category_id, table in self.counts.items()}
+        self.vocabulary = {}
+        for table in self.counts.values():
+            for feature in table:
+                self.vocabulary[feature] = self.vocabulary.get(feature, 0) + 1
+        self.entries = sum(len(table) for table in self.counts.values())
+
+    def scores(self, text: Optional[str], category_ids: Iterable[int]) -> Dict[int, float]:
+        """Логарифмы апостериорных вероятностей (без нормировки) для категорий"""
+        text_features = [feature for feature in features(text) if feature in self.vocabulary]
+        vocabulary_size = len(self.vocabulary) + 1
+        total_docs = sum(self.docs.values()) + len(self.docs) + 1
+        result = {}
+        for category_id in category_ids:
+            score = math.log((self.docs.get(category_id, 0) + 1) / total_docs)
+            if text_features:
+                counts = self.counts.get(category_id, {})
+                denominator = self.totals.get(category_id, 0) + vocabulary_size
+                for feature in text_features:
+                    score += math.log((counts.get(feature, 0) + 1) / denominator)
+            result[category_id] = score
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps({"docs": self.docs, "counts": self.counts}, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str, max_entries: int = 2000) -> "CategoryModel":
+        data = json.loads(raw)
+        model = cls(max_entries)
+        model._load(
+            {int(category_id): n for category_id, n in data["docs"].items()},
+            {
+                int(category_id): {sys.intern(feature): n for feature, n in table.items()}
+                for category_id, table in data["counts"].items()
+            },
+        )
+        return model
+
+
+class Categorizer:
+    """
+    Модели автокатегоризации пользователей.
+
+    Модели живут в памяти процесса (LRU) и сохраняются снимком в Redis
+    с небольшой задержкой после обучения, чтобы серия операций давала
+    одну запись. Если снимка нет, модель обучается на последних
+    операциях пользователя из БД.
+
+    Память ограничена и числом моделей (max_users), и общим числом
+    счетчиков во всех моделях (max_total_entries): счетчик со своим
+    признаком занимает порядка сотни байт, и одного max_users × max_entries
+    мало, чтобы держать процесс в разумных пределах.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        max_users: int = 2000,
+        max_entries: int = 2000,
+        max_total_entries: int = 500_000,
+        flush_delay: float = 5.0,
+        ttl: int = 180 * 24 * 3600,
+    ):
+        self.redis = redis
+        self.max_users = max_users
+        self.max_entries = max_entries
+        self.max_total_entries = max_total_entries
+        self.flush_delay = flush_delay
+        self.ttl = ttl
+        self._models: "OrderedDict[int, CategoryModel]" = OrderedDict()
+        self._entries = 0  # сумма model.entries по всем моделям в памяти
+        self._dirty: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"category_model:{user_id}"
+
+    async def get(self, db: AsyncSession, user_id: int) -> CategoryModel:
+        model, _ = await self._get(db, user_id)
+        return model
+
+    async def _get(self, db: AsyncSession, user_id: int) -> Tuple[CategoryModel, bool]:
+        """Модель пользователя и признак того, что она только что обучена по БД"""
+        model = self._models.get(user_id)
+        if model is not None:
+            self._models.move_to_end(user_id)
+            return model, False
+
+        model = await self._load_snapshot(user_id)
+        if model is None:
+            metrics.inc("category_model_loads_total", source="db")
+            model = CategoryModel(self.max_entries)
+            # История от старых операций к новым, чтобы сжатие сохраняло свежие
+            for description, category_id in reversed(await OperationCRUD.get_category_history(db, user_id)):
+                model.learn(description, category_id)
+            self._schedule_flush(user_id)
+            trained = True
+        else:
+            metrics.inc("category_model_loads_total", source="snapshot")
+            trained = False
+
+        self._models[user_id] = model
+        self._entries += model.entries
+        self._evict()
+        return model, trained
+
+    def _evict(self) -> None:
+        # Последнюю (только что использованную) модель не вытесняем
+        while len(self._models) > 1 and (
+            len(self._models) > self.max_users or self._entries > self.max_total_entries
+        ):
+            evicted, model = self._models.popitem(last=False)
+            self._entries -= model.entries
+            self._dirty.discard(evicted)
+            metrics.inc("category_model_evictions_total")
+
+    async def learn(self, db: AsyncSession, user_id: int, text: Optional[str], category_id: int) -> None:
+        """
+        Учесть сохраненную операцию. Обучение необязательно для ответа
+        пользователю, поэтому ошибки только логируются: операция уже записана.
+
+        Вызывается после коммита, поэтому модель, только что обученная
+        по истории из БД, уже учла эту операцию и повторно ее не учитывает.
+        """
+        try:
+            model, trained = await self._get(db, user_id)
+        except Exception as e:
+            logger.warning(f"Модель категорий не обучена: {e}")
+            return
+        if trained:
+            return
+        entries = model.entries
+        model.learn(text, category_id)
+        if user_id in self._models:
+            self._entries += model.entries - entries
+            self._evict()
+        self._schedule_flush(user_id)
+
+    async def rank(self, db: AsyncSession, user_id: int, text: Optional[str], categories: Sequence) -> List:
+        """
+        Категории по убыванию вероятности для описания (без описания — по частоте).
+        Порядок — лишь подсказка, поэтому при ошибке модели категории
+        возвращаются в исходном порядке.
+        """
+        try:
+            model = await self.get(db, user_id)
+            scores = model.scores(text, [category.id for category in categories])
+        except Exception as e:
+            logger.warning(f"Категории не отсортированы моделью: {e}")
+            return list(categories)
+        return sorted(categories, key=lambda category: -scores[category.id])
+
+    async def _load_snapshot(self, user_id: int) -> Optional[CategoryModel]:
+        try:
+            raw = await self.redis.get(self._key(user_id))
+        except (RedisError, OSError) as e:
+            logger.warning(f"Снимок модели категорий недоступен: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            return CategoryModel.from_json(raw, self.max_entries)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Поврежденный снимок модели категорий {user_id}: {e}")
+            return None
+
+    def _schedule_flush(self, user_id: int) -> None:
+        if user_id in self._dirty:
+            return  # запись уже запланирована
+        self._dirty.add(user_id)
+        task = asyncio.get_running_loop().create_task(self._flush(user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, user_id: int) -> None:
+        await asyncio.sleep(self.flush_delay)
+        if user_id not in self._dirty:
+            return
+        self._dirty.discard(user_id)
+        model = self._models.get(user_id)
+        if model is None:
+            return
+        try:
+            await self.redis.set(self._key(user_id), model.to_json(), ex=self.ttl)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Не удалось сохранить модель категорий: {e}")
+
+
+categorizer = Categorizer(redis_client)
\ No newline at end of file
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+from app.database.crud import CategoryCRUD
+from app.database.database import get_async_session
+from app.database.versions import DataVersions, catalog_versions
+from app.services.circuit_breaker import is_db_failure
+from app.utils.metrics import metrics
+from app.utils.quick_add import normalize
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryRecord(NamedTuple):
+    id: int
+    name: str
+    icon: Optional[str]
+    is_income: bool
+    is_default: bool
+
+
+class CategoryCatalog:
+    """
+    Справочник активных категорий в памяти процесса.
+
+    Категории общие для всех пользователей и меняются редко, поэтому
+    поиск по id и по названию не обращается к БД. Записи — кортежи
+    (NamedTuple), словари заменяются целиком при перезагрузке и доступны
+    только для чтения, так что читатели никогда не видят частично
+    обновленный справочник.
+
+    Перезагрузка — при изменении глобальной версии справочника в Redis
+    (CategoryCRUD увеличивает ее после коммита новой категории) или по ttl.
+    """
+
+    def __init__(self, versions: DataVersions, ttl: float = 300.0, miss_reload_interval: float = 1.0):
+        self.versions = versions
+        self.ttl = ttl
+        self.miss_reload_interval = miss_reload_interval
+        self.by_id: Mapping[int, CategoryRecord] = MappingProxyType({})
+        self.by_name: Mapping[str, int] = MappingProxyType({})
+        self.loaded_at: Optional[float] = None
+        self.version: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self) -> None:
+        """Загрузить справочник из БД; параллельные вызовы выполняют одну загрузку"""
+        started = time.monotonic()
+        async with self._lock:
+            if self.loaded_at is not None and self.loaded_at >= started:
+                return  # пока ждали блокировку, справочник уже загрузили
+            version = await self.versions.get(0)
+            async with get_async_session() as db:
+                rows = await CategoryCRUD.get_catalog(db)
+            by_id = {row.id: CategoryRecord(row.id, row.name, row.icon, row.is_income, row.is_default) for row in rows}
+            self.by_id = MappingProxyType(by_id)
+            self.by_name = MappingProxyType({normalize(record.name): record.id for record in by_id.values()})
+            self.version = version
+            self.loaded_at = time.monotonic()
+        metrics.set("category_catalog_size", len(by_id))
+        metrics.inc("category_catalog_loads_total")
+
+    def get(self, category_id: int) -> Optional[CategoryRecord]:
+        return self.by_id.get(category_id)
+
+    def get_by_name(self, name: str) -> Optional[CategoryRecord]:
+        category_id = self.by_name.get(normalize(name))
+        return self.by_id.get(category_id) if category_id is not None else None
+
+    async def get_or_load(self, category_id: int) -> Optional[CategoryRecord]:
+        """
+        Категория по id. Если ее нет (создана другим процессом до
+        ближайшей перезагрузки), справочник перезагружается — не чаще
+        раза в miss_reload_interval, чтобы несуществующие id не нагружали БД.
+        """
+        record = self.by_id.get(category_id)
+        if record is None:
+            metrics.inc("category_catalog_misses_total")
+            if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.miss_reload_interval:
+                await self.refresh()
+                record = self.by_id.get(category_id)
+        return record
+
+    async def is_stale(self) -> bool:
+        if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.ttl:
+            return True
+        version = await self.versions.get(0)
+        return version is not None and version != self.version
+
+
+category_catalog = CategoryCatalog(catalog_versions)
+
+
+async def run_catalog_refresher(catalog: CategoryCatalog, interval: float = 5.0) -> None:
+    """Фоновая задача: проверяет версию справочника и перезагружает его при изменении"""
+    while True:
+        try:
+            if await catalog.is_stale():
+                await catalog.refresh()
+        except Exception as e:
+            if not is_db_failure(e):
+                logger.exception(f"Ошибка загрузки справочника категорий: {e}")
+        await asyncio.sleep(interval)
\ No newline at end of file
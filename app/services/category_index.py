@@ -0,0 +1,172 @@
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.crud import CategoryCRUD
+from app.database.versions import DataVersions, category_versions
+from app.utils.metrics import metrics
+from app.utils.quick_add import normalize
+
+# Стандартные синонимы базовых категорий; выученные синонимы пользователя
+# добавляются к ним и имеют приоритет
+DEFAULT_ALIASES = {
+    "Еда": ("еда", "обед", "ужин", "завтрак", "перекус"),
+    "Продукты": ("продукт", "магазин", "пятерочк", "перекрест", "ашан"),
+    "Кафе и Рестораны": ("кафе", "ресторан", "кофе", "бар", "пицц", "суши"),
+    "Транспорт": ("такси", "метро", "автобус", "бензин", "заправк", "парковк", "проезд"),
+    "Жилье": ("аренд", "квартплат", "жкх", "коммунал", "ипотек"),
+    "Связь": ("интернет", "телефон", "мобильн", "связь"),
+    "Здоровье": ("аптек", "врач", "лекарств", "стоматолог", "анализ"),
+    "Одежда": ("одежд", "обувь", "кроссовк", "куртк"),
+    "Развлечения": ("кино", "концерт", "театр", "игр"),
+    "Образование": ("курс", "книг", "учеб", "репетитор"),
+    "Подписки": ("подписк", "netflix", "spotify", "яндекс плюс"),
+    "Красота": ("парикмахер", "маникюр", "салон", "стрижк"),
+    "Дети": ("детск", "садик", "игрушк"),
+    "Кредит": ("кредит", "долг"),
+    "Зарплата": ("зарплат", "зп", "аванс", "оклад", "преми"),
+    "Подработка": ("подработк", "фриланс", "халтур"),
+    "Инвестиции": ("дивиденд", "купон", "процент"),
+    "Возврат": ("возврат", "кешбэк", "кэшбэк", "кешбек"),
+}
+
+
+class CategoryMatch(NamedTuple):
+    category_id: int
+    is_income: bool
+    keyword: str
+
+
+class KeywordIndex:
+    """
+    Автомат Ахо — Корасик над нормализованными ключевыми словами.
+
+    Поиск проходит описание один раз, независимо от числа ключевых слов.
+    Ключевое слово должно начинаться с начала слова описания, а конец
+    не проверяется: «обеда» и «такси,» находят «обед» и «такси».
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, int, bool]]):
+        # Узел: переходы, ссылка на суффикс, выходы (ключевое слово, категория, тип)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, int, bool]]] = [[]]
+
+        for keyword, category_id, is_income in keywords:
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append((keyword, category_id, is_income))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                if node:
+                    fail = self._fail[node]
+                    while fail and char not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> List[Tuple[int, str, int, bool]]:
+        """Совпадения (позиция начала, ключевое слово, категория, тип) с начала слов"""
+        matches = []
+        node = 0
+        for end, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for keyword, category_id, is_income in self._out[node]:
+                start = end - len(keyword) + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    matches.append((start, keyword, category_id, is_income))
+        return matches
+
+
+def build_keywords(categories, aliases) -> List[Tuple[str, int, bool]]:
+    """Ключевые слова индекса: названия категорий, стандартные и выученные синонимы"""
+    by_id = {category.id: category for category in categories}
+    keywords: Dict[str, Tuple[int, bool]] = {}
+    for category in categories:
+        for alias in DEFAULT_ALIASES.get(category.name, ()):
+            keywords[alias] = (category.id, category.is_income)
+        keywords[normalize(category.name)] = (category.id, category.is_income)
+    for alias, category_id in aliases:
+        category = by_id.get(category_id)
+        if category is not None:
+            keywords[normalize(alias)] = (category.id, category.is_income)
+    return [(keyword, category_id, is_income) for keyword, (category_id, is_income) in keywords.items()]
+
+
+class CategoryIndexes:
+    """
+    Индексы категорий быстрого ввода по пользователям.
+
+    Индекс строится из категорий и синонимов пользователя и пересобирается
+    только когда меняется версия категорий в Redis (CategoryCRUD увеличивает
+    ее при изменении категорий и синонимов). Обычный запрос стоит одного GET
+    версии. Размер кэша ограничен, старые индексы вытесняются по LRU.
+    """
+
+    def __init__(self, versions: DataVersions, max_size: int = 10000):
+        self.versions = versions
+        self.max_size = max_size
+        self._items: "OrderedDict[int, Tuple[Optional[int], KeywordIndex]]" = OrderedDict()
+
+    async def get(self, db: AsyncSession, user_id: int) -> KeywordIndex:
+        version = await self.versions.get(user_id)
+        item = self._items.get(user_id)
+        if item is not None and version is not None and item[0] == version:
+            self._items.move_to_end(user_id)
+            metrics.inc("category_index_total", result="hit")
+            return item[1]
+
+        metrics.inc("category_index_total", result="build")
+        categories = await CategoryCRUD.get_user_categories(db, user_id)
+        aliases = await CategoryCRUD.get_aliases(db, user_id)
+        index = KeywordIndex(build_keywords(categories, aliases))
+        if version is not None:
+            self._items[user_id] = (version, index)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return index
+
+    async def resolve(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        description: str,
+        sign: Optional[str] = None,
+    ) -> Optional[CategoryMatch]:
+        """
+        Найти категорию по описанию операции.
+        Знак «+» ограничивает поиск доходами, «-» — расходами; без знака
+        тип операции определяет найденная категория. Среди совпадений
+        выбирается самое раннее, а при равенстве — самое длинное ключевое слово.
+        """
+        if not description:
+            return None
+        index = await self.get(db, user_id)
+        matches = index.find(normalize(description))
+        if sign is not None:
+            matches = [match for match in matches if match[3] == (sign == "+")]
+        if not matches:
+            return None
+        start, keyword, category_id, is_income = min(
+            matches, key=lambda match: (match[0], -len(match[1]))
+        )
+        return CategoryMatch(category_id, is_income, keyword)
+
+
+category_indexes = CategoryIndexes(category_versions)
\ No newline at end of file
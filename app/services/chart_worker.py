@@ -0,0 +1,74 @@
+"""
+Код, выполняемый в процессах пула отрисовки графиков.
+
+Модуль не импортирует ничего из приложения, а matplotlib загружается
+только в init_worker, поэтому основной процесс его не импортирует.
+"""
+import io
+import os
+from typing import Dict, List
+
+_pyplot = None
+
+INCOME_COLOR = "#2e9e5b"
+EXPENSE_COLOR = "#d9534f"
+
+
+def init_worker() -> None:
+    """Инициализатор процесса: загрузить matplotlib и прогреть шрифты"""
+    global _pyplot
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    _pyplot = plt
+    # Первая отрисовка строит кэш шрифтов — делаем ее заранее
+    figure = plt.figure(figsize=(1, 1))
+    figure.savefig(io.BytesIO(), format="png")
+    plt.close(figure)
+
+
+def worker_pid() -> int:
+    """Пустая задача, чтобы пул запустил все процессы заранее"""
+    return os.getpid()
+
+
+def render_chart(kind: str, title: str, labels: List[str], series: Dict[str, List[float]]) -> bytes:
+    """Отрисовать график и вернуть PNG"""
+    plt = _pyplot
+    figure, axes = plt.subplots(figsize=(8, 4.5), dpi=100)
+    try:
+        if kind == "trends":
+            _draw_trends(axes, labels, series)
+        elif kind == "categories":
+            _draw_categories(axes, labels, series)
+        else:
+            raise ValueError(f"Неизвестный тип графика: {kind}")
+
+        axes.set_title(title)
+        axes.spines[["top", "right"]].set_visible(False)
+        figure.tight_layout()
+
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        plt.close(figure)
+
+
+def _draw_trends(axes, labels: List[str], series: Dict[str, List[float]]) -> None:
+    """Доходы и расходы по периодам: сгруппированные столбцы"""
+    width = 0.4
+    positions = range(len(labels))
+    axes.bar([p - width / 2 for p in positions], series.get("income", []), width, label="Доходы", color=INCOME_COLOR)
+    axes.bar([p + width / 2 for p in positions], series.get("expense", []), width, label="Расходы", color=EXPENSE_COLOR)
+    axes.set_xticks(list(positions), labels, rotation=45, ha="right")
+    axes.legend(frameon=False)
+    axes.grid(axis="y", alpha=0.3)
+
+
+def _draw_categories(axes, labels: List[str], series: Dict[str, List[float]]) -> None:
+    """Расходы по категориям: горизонтальные столбцы, крупные сверху"""
+    values = series.get("expense", [])
+    axes.barh(labels[::-1], values[::-1], color=EXPENSE_COLOR)
+    axes.grid(axis="x", alpha=0.3)
\ No newline at end of file
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from app.services import chart_worker
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RenderedChart(NamedTuple):
+    digest: str  # sha256 от данных и параметров графика
+    png: bytes
+
+
+def chart_digest(kind: str, title: str, labels: List[str], series: Dict[str, List[float]]) -> str:
+    """Хэш содержимого графика: одинаковые данные дают одинаковую картинку"""
+    spec = json.dumps(
+        {"kind": kind, "title": title, "labels": labels, "series": series},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(spec.encode("utf-8")).hexdigest()
+
+
+class ChartService:
+    """
+    Отрисовка графиков в пуле процессов.
+
+    matplotlib работает только в процессах пула (см. chart_worker), поэтому
+    отрисовка не блокирует event loop. Процессы запускаются и прогреваются
+    при старте. Готовые PNG кэшируются по хэшу данных (LRU), одновременные
+    запросы одного графика ждут одну отрисовку.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        self.cache_size = cache_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def start(self, workers: int = 2) -> None:
+        """Запустить пул и дождаться инициализации всех процессов"""
+        # Пул создается при старте, до появления рабочих потоков,
+        # поэтому процессы можно безопасно получать через fork (по умолчанию в Linux)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=chart_worker.init_worker,
+        )
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, chart_worker.worker_pid) for _ in range(workers)
+        ))
+        logger.info(f"Пул отрисовки графиков запущен: {len(set(pids))} процессов")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(
+        self,
+        kind: str,
+        title: str,
+        labels: List[str],
+        series: Dict[str, List[float]],
+    ) -> RenderedChart:
+        """Получить PNG графика из кэша или отрисовать в пуле"""
+        digest = chart_digest(kind, title, labels, series)
+
+        png = self._cache.get(digest)
+        if png is not None:
+            self._cache.move_to_end(digest)
+            metrics.inc("chart_cache_total", result="hit")
+            return RenderedChart(digest, png)
+
+        pending = self._pending.get(digest)
+        if pending is not None:
+            metrics.inc("chart_cache_total", result="pending")
+            return RenderedChart(digest, await asyncio.shield(pending))
+
+        metrics.inc("chart_cache_total", result="miss")
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, chart_worker.render_chart, kind, title, labels, series
+        )
+        self._pending[digest] = future
+        metrics.set("chart_queue_depth", len(self._pending))
+        started = time.perf_counter()
+        try:
+            png = await asyncio.shield(future)
+        finally:
+            self._pending.pop(digest, None)
+            metrics.set("chart_queue_depth", len(self._pending))
+        metrics.observe("chart_render_seconds", time.perf_counter() - started, kind=kind)
+
+        self._cache[digest] = png
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return RenderedChart(digest, png)
+
+
+chart_service = ChartService()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from enum import IntEnum
+from typing import Awaitable, Callable, Optional
+
+import asyncpg
+from sqlalchemy import exc as sa_exc
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseUnavailable(Exception):
+    """База данных недоступна: автомат разомкнут, запрос отклонен без ожидания пула"""
+
+
+class DatabaseConnectError(Exception):
+    """Не удалось подключиться к БД: сеть, DNS или таймаут подключения"""
+
+
+# Ошибки asyncpg, означающие потерю или отказ соединения
+_ASYNCPG_CONNECTION_ERRORS = (
+    asyncpg.exceptions.PostgresConnectionError,
+    asyncpg.exceptions.CannotConnectNowError,
+    asyncpg.exceptions.AdminShutdownError,
+    asyncpg.exceptions.CrashShutdownError,
+    asyncpg.exceptions.TooManyConnectionsError,
+)
+
+
+class CircuitState(IntEnum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+def is_db_failure(error: BaseException) -> bool:
+    """
+    Ошибка говорит о недоступности БД, а не о некорректном запросе.
+    Учитываются только ошибки SQLAlchemy и asyncpg: сетевые ошибки
+    Redis или Telegram к БД не относятся.
+    """
+    if isinstance(error, (DatabaseUnavailable, DatabaseConnectError)):
+        return True
+    if isinstance(error, _ASYNCPG_CONNECTION_ERRORS):
+        return True
+    if isinstance(error, (sa_exc.OperationalError, sa_exc.InterfaceError, sa_exc.TimeoutError)):
+        return True
+    if isinstance(error, sa_exc.DBAPIError):
+        # orig — исключение адаптера SQLAlchemy, исходная ошибка asyncpg в его __cause__
+        return error.connection_invalidated or isinstance(error.orig.__cause__, _ASYNCPG_CONNECTION_ERRORS)
+    return False
+
+
+class CircuitBreaker:
+    """
+    Автомат защиты для обращений к БД.
+
+    - CLOSED: запросы идут как обычно, считаем подряд идущие сбои
+    - OPEN: после failure_threshold сбоев запросы сразу отклоняются
+      с DatabaseUnavailable
+    - HALF_OPEN: через reset_timeout один вызывающий выполняет пробный
+      запрос; успех замыкает автомат, ошибка снова размыкает
+
+    Args:
+        name: Имя автомата для логов и метрик
+        probe: Корутина-проверка доступности (например, SELECT 1)
+        failure_threshold: Число подряд идущих сбоев до размыкания
+        reset_timeout: Сколько секунд ждать перед пробным запросом
+        probe_timeout: Таймаут пробного запроса
+    """
+
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], Awaitable[None]],
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        probe_timeout: float = 3.0,
+    ):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_lock = asyncio.Lock()
+        metrics.set("circuit_state", int(self.state), name=self.name)
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == CircuitState.CLOSED
+
+    async def before_call(self) -> None:
+        """Проверить автомат перед обращением к БД"""
+        if self.state == CircuitState.CLOSED:
+            return
+
+        if self.state == CircuitState.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            await self._try_half_open()
+
+        if self.state != CircuitState.CLOSED:
+            metrics.inc("circuit_rejected_total", name=self.name)
+            raise DatabaseUnavailable(f"{self.name}: circuit {self.state.name.lower()}")
+
+    def record_success(self) -> None:
+        self.failures = 0
+
+    def record_failure(self, error: BaseException) -> None:
+        """Учесть ошибку; ошибки, не связанные с доступностью БД, игнорируются"""
+        if isinstance(error, DatabaseUnavailable) or not is_db_failure(error):
+            return
+        self.failures += 1
+        metrics.inc("circuit_failures_total", name=self.name)
+        if self.state == CircuitState.CLOSED and self.failures >= self.failure_threshold:
+            self._set_state(CircuitState.OPEN)
+            logger.error(f"Circuit {self.name} разомкнут после {self.failures} сбоев: {error}")
+
+    async def _try_half_open(self) -> None:
+        if self._probe_lock.locked():
+            return  # пробный запрос уже выполняет другой вызывающий
+        async with self._probe_lock:
+            self._set_state(CircuitState.HALF_OPEN)
+            try:
+                await asyncio.wait_for(self.probe(), timeout=self.probe_timeout)
+            except Exception as e:
+                self._set_state(CircuitState.OPEN)
+                logger.warning(f"Circuit {self.name}: пробный запрос не прошел ({e})")
+            else:
+                self.failures = 0
+                self._set_state(CircuitState.CLOSED)
+                logger.info(f"Circuit {self.name} снова замкнут")
+
+    def _set_state(self, state: CircuitState) -> None:
+        self.state = state
+        if state == CircuitState.OPEN:
+            self.opened_at = time.monotonic()
+        metrics.set("circuit_state", int(state), name=self.name)
\ No newline at end of file
@@ -0,0 +1,109 @@
+import hashlib
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, Message
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.database.redis import redis_client
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def content_digest(data: bytes) -> str:
+    """Хэш содержимого файла для ключа кэша"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class FileIdCache:
+    """
+    Кэш «хэш содержимого → file_id Telegram».
+
+    Файл с тем же содержимым отправляется по file_id без повторной
+    загрузки. Если Telegram отклонил сохраненный file_id, файл
+    загружается заново и кэш обновляется. file_id привязан к боту,
+    поэтому id бота входит в ключ.
+    """
+
+    def __init__(self, redis: Redis, ttl: int = 30 * 24 * 3600):
+        self.redis = redis
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(bot: Bot, digest: str) -> str:
+        return f"tg_file:{bot.id}:{digest}"
+
+    async def _get(self, key: str) -> Optional[str]:
+        try:
+            return await self.redis.get(key)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Кэш file_id недоступен: {e}")
+            return None
+
+    async def _set(self, key: str, file_id: str) -> None:
+        try:
+            await self.redis.set(key, file_id, ex=self.ttl)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Кэш file_id недоступен: {e}")
+
+    async def send_photo(
+        self,
+        bot: Bot,
+        chat_id: int,
+        digest: str,
+        data: bytes,
+        filename: str,
+        **kwargs
+    ) -> Message:
+        """Отправить фото по file_id из кэша или загрузить и запомнить"""
+        key = self._key(bot, digest)
+        file_id = await self._get(key)
+        if file_id:
+            try:
+                message = await bot.send_photo(chat_id, file_id, **kwargs)
+                metrics.inc("telegram_file_cache_total", kind="photo", result="hit")
+                return message
+            except TelegramBadRequest as e:
+                logger.info(f"file_id отклонен, загружаем заново: {e}")
+                metrics.inc("telegram_file_cache_total", kind="photo", result="stale")
+
+        message = await bot.send_photo(chat_id, BufferedInputFile(data, filename=filename), **kwargs)
+        metrics.inc("telegram_file_cache_total", kind="photo", result="upload")
+        metrics.inc("telegram_upload_bytes_total", len(data), kind="photo")
+        # Самый большой вариант фото — исходное изображение
+        await self._set(key, message.photo[-1].file_id)
+        return message
+
+    async def send_document(
+        self,
+        bot: Bot,
+        chat_id: int,
+        data: bytes,
+        filename: str,
+        digest: Optional[str] = None,
+        **kwargs
+    ) -> Message:
+        """Отправить документ по file_id из кэша или загрузить и запомнить"""
+        key = self._key(bot, digest or content_digest(data))
+        file_id = await self._get(key)
+        if file_id:
+            try:
+                message = await bot.send_document(chat_id, file_id, **kwargs)
+                metrics.inc("telegram_file_cache_total", kind="document", result="hit")
+                return message
+            except TelegramBadRequest as e:
+                logger.info(f"file_id отклонен, загружаем заново: {e}")
+                metrics.inc("telegram_file_cache_total", kind="document", result="stale")
+
+        message = await bot.send_document(chat_id, BufferedInputFile(data, filename=filename), **kwargs)
+        metrics.inc("telegram_file_cache_total", kind="document", result="upload")
+        metrics.inc("telegram_upload_bytes_total", len(data), kind="document")
+        await self._set(key, message.document.file_id)
+        return message
+
+
+file_id_cache = FileIdCache(redis_client)
\ No newline at end of file
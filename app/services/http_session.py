@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import Any
+
+from aiogram.client.session.aiohttp import AiohttpSession
+
+logger = logging.getLogger(__name__)
+
+
+class TunedAiohttpSession(AiohttpSession):
+    """
+    AiohttpSession с настраиваемым пулом соединений к Bot API.
+
+    Args:
+        limit: Общий размер пула соединений
+        limit_per_host: Лимит соединений на один хост (0 — без ограничения)
+        keepalive_timeout: Сколько секунд держать простаивающее соединение
+        dns_cache_ttl: Время жизни DNS-кэша в секундах (0 — кэш выключен)
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 60.0,
+        dns_cache_ttl: int = 3600,
+        **kwargs: Any,
+    ):
+        super().__init__(limit=limit, **kwargs)
+        # Публичного способа передать параметры TCPConnector в aiogram нет,
+        # поэтому дополняем _connector_init; версия aiogram закреплена в
+        # requirements.txt, при обновлении проверить, что атрибут на месте
+        if not isinstance(getattr(self, "_connector_init", None), dict):
+            raise RuntimeError("AiohttpSession._connector_init недоступен в этой версии aiogram")
+        self._connector_init.update(
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            use_dns_cache=dns_cache_ttl > 0,
+            ttl_dns_cache=dns_cache_ttl or None,
+        )
+
+
+def _orjson_dumps(obj: Any) -> str:
+    import orjson
+    return orjson.dumps(obj).decode()
+
+
+def create_bot_session(settings) -> AiohttpSession:
+    """
+    Создать HTTP-сессию для Bot.
+    При use_orjson сериализация запросов и разбор webhook-апдейтов
+    (SimpleRequestHandler берет bot.session.json_loads) идут через orjson.
+    """
+    json_kwargs = {}
+    if settings.use_orjson:
+        try:
+            import orjson
+        except ImportError:
+            logger.warning("orjson не установлен, используется стандартный json")
+        else:
+            json_kwargs = {"json_loads": orjson.loads, "json_dumps": _orjson_dumps}
+
+    return TunedAiohttpSession(
+        limit=settings.bot_connection_limit,
+        limit_per_host=settings.bot_connection_limit_per_host,
+        keepalive_timeout=settings.bot_keepalive_timeout,
+        dns_cache_ttl=settings.bot_dns_cache_ttl,
+        timeout=settings.bot_request_timeout,
+        **json_kwargs,
+    )
+
+
+def setup_event_loop(use_uvloop: bool) -> None:
+    """Включить uvloop в качестве цикла событий, если он запрошен и установлен"""
+    if not use_uvloop:
+        return
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("uvloop не установлен, используется стандартный asyncio")
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Используется uvloop")
\ No newline at end of file
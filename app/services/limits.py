@@ -0,0 +1,119 @@
+import logging
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.crud import OperationCRUD, NotificationCRUD
+from app.database.models import User
+from app.database.redis import redis_client
+from app.database.versions import limit_counters
+from app.utils.formatting import format_amount
+from app.utils.metrics import metrics
+from app.utils.periods import Period, current_period
+
+logger = logging.getLogger(__name__)
+
+def local_periods(tz_name: Optional[str], now: datetime) -> Tuple[Period, Period]:
+    """Текущие локальные день и месяц пользователя в часовом поясе tz_name"""
+    return current_period(tz_name, "day", now), current_period(tz_name, "month", now)
+
+
+def counter_key(user_id: int, period: Period) -> str:
+    """Ключ счетчика в Redis; живет до локальной полуночи (конца месяца)"""
+    return limit_counters.key(user_id, period.key)
+
+
+def limit_message(period_key: str, level: str, spent: Decimal, limit: Decimal) -> str:
+    """Текст предупреждения о лимите"""
+    title = "Дневной" if period_key.startswith("day:") else "Месячный"
+    if level == "crossed":
+        return f"⚠️ {title} лимит превышен: потрачено {format_amount(spent)} из {format_amount(limit)}"
+    percent = spent / limit * 100
+    return f"🔔 {title} лимит почти исчерпан: потрачено {format_amount(spent)} из {format_amount(limit)} ({percent:.0f}%)"
+
+
+class SpendingLimits:
+    """
+    Счетчики расходов для дневного и месячного лимита в Redis.
+
+    Каждый расход увеличивает оба счетчика одним конвейером
+    (INCRBYFLOAT + EXPIREAT). Если счетчика не было (новый день или
+    Redis очищен), он пересчитывается из SQL. Записи расходов в обход
+    record_expense сбрасывают счетчики (limit_counters), и они тоже
+    пересчитываются. Ошибки Redis не мешают сохранению операции:
+    лимиты носят предупреждающий характер.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def record_expense(
+        self,
+        db: AsyncSession,
+        user: User,
+        amount: Decimal,
+        now: Optional[datetime] = None
+    ) -> List[str]:
+        """Учесть уже сохраненный расход и вернуть предупреждения о превышении лимитов"""
+        if not user.daily_limit and not user.monthly_limit:
+            return []
+
+        now = now or datetime.now(timezone.utc)
+        day, month = local_periods(user.timezone, now)
+        day_key, month_key = counter_key(user.id, day), counter_key(user.id, month)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.exists(day_key, month_key)
+                pipe.incrbyfloat(day_key, float(amount))
+                pipe.expireat(day_key, day.end)
+                pipe.incrbyfloat(month_key, float(amount))
+                pipe.expireat(month_key, month.end)
+                existed, day_total, _, month_total, _ = await pipe.execute()
+
+            if existed < 2:
+                # Счетчик только что создан: восстанавливаем его из SQL
+                # (операция уже закоммичена и попадет в сумму)
+                day_total, month_total = await self.rebuild(db, user, now)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Счетчики лимитов недоступны: {e}")
+            return []
+
+        amount = Decimal(str(amount))
+        warnings = []
+        for period, limit, total in (
+            (day, user.daily_limit, Decimal(str(day_total))),
+            (month, user.monthly_limit, Decimal(str(month_total))),
+        ):
+            # Предупреждаем один раз — в момент пересечения лимита
+            if limit and total - amount <= limit < total:
+                metrics.inc("spending_limit_crossed_total", period=period.key.split(":")[0])
+                warnings.append(limit_message(period.key, "crossed", total, limit))
+                # Планировщик уведомлений не должен повторять это предупреждение
+                await NotificationCRUD.mark_sent(db, user.id, period.key, "crossed", total, limit)
+        return warnings
+
+    async def rebuild(
+        self,
+        db: AsyncSession,
+        user: User,
+        now: Optional[datetime] = None
+    ) -> Tuple[Decimal, Decimal]:
+        """Пересчитать счетчики пользователя из SQL (например, после очистки Redis)"""
+        now = now or datetime.now(timezone.utc)
+        day, month = local_periods(user.timezone, now)
+        day_total, month_total = await OperationCRUD.get_expense_totals_since(
+            db, user.id, day.start, month.start
+        )
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(counter_key(user.id, day), str(day_total), exat=day.end)
+            pipe.set(counter_key(user.id, month), str(month_total), exat=month.end)
+            await pipe.execute()
+        metrics.inc("spending_limit_rebuilds_total")
+        return day_total, month_total
+
+
+spending_limits = SpendingLimits(redis_client)
\ No newline at end of file
@@ -0,0 +1,142 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import (
+    DeleteMessage,
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    SendMessage,
+    TelegramMethod,
+)
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from app.utils.metrics import metrics
+
+MessageKey = Union[Tuple[Union[int, str], int], str]
+
+NOT_MODIFIED = "message is not modified"
+
+
+def _serialize(value: Any) -> bytes:
+    if value is None:
+        return b""
+    if isinstance(value, list):
+        return b"".join(_serialize(item) for item in value)
+    if hasattr(value, "model_dump_json"):
+        return value.model_dump_json(exclude_none=True).encode()
+    return str(value).encode()  # parse_mode или Default(...) из настроек бота
+
+
+def render_fingerprint(method: Union[EditMessageText, SendMessage]) -> bytes:
+    """Отпечаток того, что видит пользователь: текст, разметка и клавиатура"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (method.text, method.parse_mode, method.entities, method.link_preview_options, method.reply_markup):
+        digest.update(_serialize(part))
+        digest.update(b"\0")
+    return digest.digest()
+
+
+class EditDeduplicator(BaseRequestMiddleware):
+    """
+    Пропуск правок сообщений, которые ничего не меняют.
+
+    Навигация по меню часто перерисовывает экран тем же содержимым
+    (повторное открытие баланса, «Назад» на тот же экран). Для каждого
+    сообщения хранится отпечаток последнего отрисованного текста с
+    клавиатурой; editMessageText с тем же отпечатком не отправляется,
+    а ответ «message is not modified» от Telegram не считается ошибкой.
+    В обоих случаях обработчик получает True и продолжает работу
+    (например, отвечает на callback).
+
+    Другие изменения сообщения (подпись, медиа, только клавиатура,
+    удаление) сбрасывают отпечаток. Хранилище локальное (LRU с ttl):
+    все правки сообщений бота проходят через этот процесс.
+    """
+
+    def __init__(self, max_size: int = 50000, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[MessageKey, Tuple[bytes, float]]" = OrderedDict()
+
+    @staticmethod
+    def _key(method: TelegramMethod) -> Optional[MessageKey]:
+        inline_message_id = getattr(method, "inline_message_id", None)
+        if inline_message_id:
+            return inline_message_id
+        chat_id, message_id = getattr(method, "chat_id", None), getattr(method, "message_id", None)
+        if chat_id is None or message_id is None:
+            return None
+        return chat_id, message_id
+
+    def _get(self, key: MessageKey) -> Optional[bytes]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        fingerprint, saved_at = item
+        if time.monotonic() - saved_at > self.ttl:
+            del self._items[key]
+            return None
+        return fingerprint
+
+    def _remember(self, key: Optional[MessageKey], fingerprint: bytes) -> None:
+        if key is None:
+            return
+        self._items[key] = (fingerprint, time.monotonic())
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def _forget(self, key: Optional[MessageKey]) -> None:
+        if key is not None:
+            self._items.pop(key, None)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Any:
+        if isinstance(method, EditMessageText):
+            return await self._edit_text(make_request, bot, method)
+
+        if isinstance(method, SendMessage):
+            result = await make_request(bot, method)
+            # Первая перерисовка только что отправленного экрана тоже может быть пустой
+            if isinstance(result, Message) and (
+                method.reply_markup is None or isinstance(method.reply_markup, InlineKeyboardMarkup)
+            ):
+                self._remember((result.chat.id, result.message_id), render_fingerprint(method))
+            return result
+
+        if isinstance(method, (EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup, DeleteMessage)):
+            self._forget(self._key(method))
+        return await make_request(bot, method)
+
+    async def _edit_text(self, make_request: NextRequestMiddlewareType, bot: Bot, method: EditMessageText) -> Any:
+        key = self._key(method)
+        fingerprint = render_fingerprint(method)
+        if key is not None and self._get(key) == fingerprint:
+            metrics.inc("message_edits_total", result="skipped")
+            return True
+
+        # До ответа Telegram содержимое сообщения неизвестно
+        self._forget(key)
+        try:
+            result = await make_request(bot, method)
+        except TelegramBadRequest as e:
+            if NOT_MODIFIED not in e.message:
+                raise
+            metrics.inc("message_edits_total", result="not_modified")
+            self._remember(key, fingerprint)
+            return True
+
+        metrics.inc("message_edits_total", result="sent")
+        self._remember(key, fingerprint)
+        return result
\ No newline at end of file
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
+
+from app.database.crud import NotificationCRUD
+from app.database.database import get_async_session
+from app.services.circuit_breaker import is_db_failure
+from app.services.limits import local_periods, limit_message
+from app.services.send_queue import broadcast_priority
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Отметки старше этого срока относятся к закрытым периодам и не нужны
+NOTIFICATION_RETENTION = timedelta(days=62)
+
+
+async def enqueue_limit_notifications(near_ratio: float = 0.8) -> int:
+    """
+    Поставить в очередь уведомления о лимитах для всех пользователей.
+    Один запрос на часовой пояс: границы локального дня и месяца у всех
+    пользователей пояса совпадают.
+    """
+    now = datetime.now(timezone.utc)
+    async with get_async_session() as db:
+        timezones = await NotificationCRUD.get_notification_timezones(db)
+
+    queued = 0
+    for tz_name in timezones:
+        day, month = local_periods(tz_name, now)
+        async with get_async_session() as db:
+            queued += await NotificationCRUD.enqueue_limit_notifications(
+                db, tz_name, day.key, day.start, month.key, month.start, near_ratio
+            )
+    return queued
+
+
+async def send_limit_notifications(bot: Bot, batch_size: int = 500) -> int:
+    """
+    Разослать накопившиеся уведомления пачками. Пачка отмечается
+    отправленной до рассылки, поэтому в памяти не больше batch_size
+    уведомлений, а перезапуск не приводит к повторной отправке.
+    """
+    sent = 0
+    while True:
+        async with get_async_session() as db:
+            batch = await NotificationCRUD.claim_pending(db, batch_size)
+        if not batch:
+            return sent
+
+        # Темп отправки задает очередь Telegram; рассылка уступает ответам пользователям
+        with broadcast_priority():
+            for telegram_id, period_key, level, spent, limit_amount in batch:
+                try:
+                    await bot.send_message(telegram_id, limit_message(period_key, level, spent, limit_amount))
+                    sent += 1
+                    metrics.inc("limit_notifications_sent_total", level=level)
+                except TelegramForbiddenError:
+                    metrics.inc("limit_notifications_failed_total", reason="forbidden")
+                except TelegramAPIError as e:
+                    metrics.inc("limit_notifications_failed_total", reason="api")
+                    logger.warning(f"Не удалось отправить уведомление {telegram_id}: {e}")
+
+
+async def run_limit_notifier(bot: Bot, interval: float = 300.0, near_ratio: float = 0.8) -> None:
+    """Фоновая задача: проверяет лимиты всех пользователей и рассылает уведомления"""
+    purged_on = None
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            queued = await enqueue_limit_notifications(near_ratio)
+            sent = await send_limit_notifications(bot)
+            if queued or sent:
+                logger.info(f"Уведомления о лимитах: в очереди {queued}, отправлено {sent}")
+
+            today = datetime.now(timezone.utc).date()
+            if purged_on != today:
+                async with get_async_session() as db:
+                    await NotificationCRUD.purge_limit_notifications(
+                        db, datetime.now(timezone.utc) - NOTIFICATION_RETENTION
+                    )
+                purged_on = today
+        except Exception as e:
+            if not is_db_failure(e):
+                logger.exception(f"Ошибка рассылки уведомлений о лимитах: {e}")
\ No newline at end of file
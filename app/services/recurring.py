@@ -0,0 +1,41 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from app.database.crud import OperationCRUD
+from app.database.database import get_async_session
+from app.services.circuit_breaker import is_db_failure
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+async def materialize_recurring(max_steps: int = 366) -> int:
+    """
+    Создать наступившие повторения всех шаблонов. Если отставание больше
+    max_steps повторений на шаблон, вызов повторяется, пока все не догонит.
+    """
+    created = 0
+    while True:
+        async with get_async_session() as db:
+            batch = await OperationCRUD.materialize_recurring(db, datetime.now(timezone.utc), max_steps)
+        if batch is None:
+            logger.debug("Повторяющиеся операции генерирует другой процесс")
+            return created
+        metrics.inc("recurring_materialized_total", batch)
+        created += batch
+        if batch == 0:
+            return created
+
+
+async def run_recurring_materializer(interval: float = 300.0) -> None:
+    """Фоновая задача: генерирует повторяющиеся операции"""
+    while True:
+        try:
+            created = await materialize_recurring()
+            if created:
+                logger.info(f"Создано повторяющихся операций: {created}")
+        except Exception as e:
+            if not is_db_failure(e):
+                logger.exception(f"Ошибка генерации повторяющихся операций: {e}")
+        await asyncio.sleep(interval)
\ No newline at end of file
@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, Tuple
+
+from app.database.versions import DataVersions, data_versions
+from app.utils.metrics import metrics
+
+
+class _Report(NamedTuple):
+    version: int
+    built_at: float  # time.monotonic() при построении
+    expires_at: datetime  # конец периода отчета
+    payload: Any
+
+
+class ReportCache:
+    """
+    Кэш готовых отчетов (агрегаты и итоговый текст) в памяти процесса.
+
+    Ключ — пользователь Telegram и отчет; запись действительна, пока не
+    изменилась версия данных пользователя и не закончился период отчета.
+    Пользователь из БД и сессия нужны только для построения, поэтому
+    повторное открытие отчета без изменений данных стоит одного GET
+    версии в Redis. Размер ограничен (LRU), а ttl ограничивает
+    устаревание, если версию не удалось увеличить из-за сбоя Redis.
+    """
+
+    def __init__(self, versions: DataVersions, max_size: int = 10000, ttl: float = 600.0):
+        self.versions = versions
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[Tuple[int, str], _Report]" = OrderedDict()
+        # telegram_id -> id пользователя в БД (не меняется)
+        self._user_ids: "OrderedDict[int, int]" = OrderedDict()
+
+    async def get_or_build(
+        self,
+        telegram_id: int,
+        report: str,
+        load_user: Callable[[], Awaitable[Any]],
+        build: Callable[[Any], Awaitable[Tuple[datetime, Any]]],
+    ) -> Optional[Any]:
+        """
+        Вернуть отчет из кэша или построить его.
+        load_user() вызывается только при промахе; build(user) возвращает
+        конец периода отчета и сам отчет. None — пользователь не найден.
+        """
+        key = (telegram_id, report)
+        user_id = self._user_ids.get(telegram_id)
+        version = await self.versions.get(user_id) if user_id is not None else None
+        item = self._items.get(key)
+        if (
+            item is not None
+            and version is not None
+            and item.version == version
+            and time.monotonic() - item.built_at < self.ttl
+            and datetime.now(timezone.utc) < item.expires_at
+        ):
+            self._items.move_to_end(key)
+            metrics.inc("report_cache_total", report=report, result="hit")
+            return item.payload
+
+        user = await load_user()
+        if user is None:
+            return None
+        if user_id is None:
+            self._remember_user(telegram_id, user.id)
+            version = await self.versions.get(user.id)
+        if version is None:
+            # Без версии нельзя отличить свежий отчет от устаревшего
+            metrics.inc("report_cache_total", report=report, result="bypass")
+            _, payload = await build(user)
+            return payload
+
+        metrics.inc("report_cache_total", report=report, result="miss")
+        # Версия прочитана до построения: запись во время построения
+        # увеличит ее, и отчет не будет выдан как свежий
+        expires_at, payload = await build(user)
+        self._items[key] = _Report(version, time.monotonic(), expires_at, payload)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+        metrics.set("report_cache_size", len(self._items))
+        return payload
+
+    def _remember_user(self, telegram_id: int, user_id: int) -> None:
+        self._user_ids[telegram_id] = user_id
+        self._user_ids.move_to_end(telegram_id)
+        while len(self._user_ids) > self.max_size:
+            self._user_ids.popitem(last=False)
+
+
+report_cache = ReportCache(data_versions)
\ No newline at end of file
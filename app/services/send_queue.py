@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Полосы приоритета: интерактивные ответы всегда обгоняют рассылки
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BROADCAST = 1
+LANE_NAMES = ("interactive", "broadcast")
+
+_send_priority: ContextVar[int] = ContextVar("send_priority", default=PRIORITY_INTERACTIVE)
+
+ChatId = Union[int, str]
+
+
+@contextmanager
+def broadcast_priority():
+    """
+    Отправлять запросы внутри блока в полосе рассылок.
+    Использование:
+        with broadcast_priority():
+            await bot.send_message(chat_id, text)
+    """
+    token = _send_priority.set(PRIORITY_BROADCAST)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("chat_id", "future", "enqueued_at")
+
+    def __init__(self, chat_id: ChatId, future: asyncio.Future):
+        self.chat_id = chat_id
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class SendQueue(BaseRequestMiddleware):
+    """
+    Очередь исходящих запросов к Bot API.
+
+    - глобальный token bucket (rate запросов в секунду, burst — запас)
+    - минимальный интервал между сообщениями в один чат
+      (отдельно для личных чатов и групп)
+    - пауза по retry_after из ответа 429 и повтор запроса
+    - две полосы приоритета: interactive и broadcast
+
+    Запросы без chat_id (answerCallbackQuery, getMe, setWebhook) не
+    ставятся в очередь, но уважают глобальную паузу после 429.
+    """
+
+    def __init__(
+        self,
+        rate: float = 30.0,
+        burst: int = 30,
+        chat_interval: float = 0.3,
+        group_interval: float = 3.0,
+        max_retries: int = 3,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.chat_interval = chat_interval
+        self.group_interval = group_interval
+        self.max_retries = max_retries
+
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._chat_ready_at: Dict[ChatId, float] = {}
+        self._global_ready_at = 0.0
+        self._lanes: tuple[Deque[_Waiter], ...] = (deque(), deque())
+        self._wakeup = asyncio.Event()
+        self._pump_task: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        """Количество запросов, ожидающих отправки"""
+        return sum(len(lane) for lane in self._lanes)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        chat_id = getattr(method, "chat_id", None)
+        lane = _send_priority.get()
+        attempt = 0
+
+        while True:
+            if chat_id is None:
+                await self._wait_global_pause()
+            else:
+                await self._acquire(chat_id, lane)
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                metrics.inc("telegram_retry_after_total", method=type(method).__name__)
+                self._defer(chat_id, e.retry_after)
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                logger.warning(
+                    f"429 от Telegram ({type(method).__name__}, chat={chat_id}), "
+                    f"повтор через {e.retry_after}s (попытка {attempt})"
+                )
+
+    def _defer(self, chat_id: Optional[ChatId], retry_after: float) -> None:
+        """Запомнить паузу, которую запросил Telegram"""
+        ready_at = time.monotonic() + retry_after
+        if chat_id is None:
+            self._global_ready_at = max(self._global_ready_at, ready_at)
+        else:
+            self._chat_ready_at[chat_id] = max(self._chat_ready_at.get(chat_id, 0.0), ready_at)
+        self._wakeup.set()
+
+    async def _wait_global_pause(self) -> None:
+        delay = self._global_ready_at - time.monotonic()
+        if delay > 0:
+            metrics.observe("telegram_send_throttle_seconds", delay, lane="direct")
+            await asyncio.sleep(delay)
+
+    async def _acquire(self, chat_id: ChatId, lane: int) -> None:
+        """Дождаться своей очереди на отправку"""
+        waiter = _Waiter(chat_id, asyncio.get_running_loop().create_future())
+        self._lanes[lane].append(waiter)
+        metrics.set("telegram_send_queue_depth", len(self._lanes[lane]), lane=LANE_NAMES[lane])
+
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        self._wakeup.set()
+
+        await waiter.future
+        metrics.observe(
+            "telegram_send_throttle_seconds",
+            time.monotonic() - waiter.enqueued_at,
+            lane=LANE_NAMES[lane],
+        )
+
+    async def _pump(self) -> None:
+        """Фоновая задача: выпускает ожидающие запросы по мере появления токенов"""
+        while self.depth:
+            self._wakeup.clear()
+            delay = self._release_ready(time.monotonic())
+            for lane, waiters in enumerate(self._lanes):
+                metrics.set("telegram_send_queue_depth", len(waiters), lane=LANE_NAMES[lane])
+            if delay is None:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+        # Чистим устаревшие отметки по чатам, чтобы словарь не рос бесконечно
+        now = time.monotonic()
+        self._chat_ready_at = {k: v for k, v in self._chat_ready_at.items() if v > now}
+
+    def _release_ready(self, now: float) -> Optional[float]:
+        """
+        Выпустить все запросы, которые можно отправить прямо сейчас.
+        Возвращает время (в секундах) до следующей проверки или None,
+        если очередь нужно пересмотреть немедленно.
+        """
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+        wait: Optional[float] = None
+        for waiters in self._lanes:
+            for waiter in list(waiters):
+                if waiter.future.done():
+                    # Ожидающий отменен (например, истек таймаут запроса)
+                    waiters.remove(waiter)
+                    continue
+
+                if self._tokens < 1:
+                    return (1 - self._tokens) / self.rate
+
+                ready_at = max(self._chat_ready_at.get(waiter.chat_id, 0.0), self._global_ready_at)
+                if ready_at > now:
+                    wait = ready_at - now if wait is None else min(wait, ready_at - now)
+                    continue
+
+                waiters.remove(waiter)
+                self._tokens -= 1
+                self._chat_ready_at[waiter.chat_id] = now + self._interval_for(waiter.chat_id)
+                waiter.future.set_result(None)
+
+        return wait if self.depth else None
+
+    def _interval_for(self, chat_id: ChatId) -> float:
+        # Отрицательные id и @username — группы и каналы
+        if isinstance(chat_id, str) or chat_id < 0:
+            return self.group_interval
+        return self.chat_interval
\ No newline at end of file
@@ -0,0 +1,47 @@
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+
+
+class ScreenSnapshot(NamedTuple):
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup]
+    parse_mode: Optional[str]
+    saved_at: float
+
+
+class ScreenSnapshots:
+    """
+    Последние успешно отрисованные экраны чтения (баланс, история, категории).
+    Используются как запасной ответ, пока база данных недоступна.
+    Размер ограничен, старые записи вытесняются по LRU.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._items: "OrderedDict[tuple[int, str], ScreenSnapshot]" = OrderedDict()
+
+    def save(
+        self,
+        telegram_id: int,
+        screen: str,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        parse_mode: Optional[str] = None,
+    ) -> None:
+        key = (telegram_id, screen)
+        self._items[key] = ScreenSnapshot(text, reply_markup, parse_mode, time.time())
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def get(self, telegram_id: int, screen: str) -> Optional[ScreenSnapshot]:
+        snapshot = self._items.get((telegram_id, screen))
+        if snapshot is not None:
+            self._items.move_to_end((telegram_id, screen))
+        return snapshot
+
+
+screen_snapshots = ScreenSnapshots()
\ No newline at end of file
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from app.database.crud import OperationCRUD
+from app.database.database import get_async_session
+from app.schemas.operation import OperationCreate
+from app.services.circuit_breaker import is_db_failure
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SpooledOperation(NamedTuple):
+    idempotency_key: uuid.UUID
+    telegram_id: int
+    operation: OperationCreate
+
+
+class OperationSpool:
+    """
+    Локальная очередь операций на случай недоступности БД.
+
+    Хранится в SQLite в режиме WAL с synchronous=FULL: каждая запись
+    сбрасывается на диск до того, как пользователь увидит ответ.
+    Каждая операция получает ключ идемпотентности, поэтому повторная
+    выгрузка после сбоя не создает дубликатов. Операции, которые БД
+    отвергает (удаленная категория, неизвестный пользователь), переносятся
+    в таблицу dead_operations, чтобы не блокировать выгрузку остальных.
+    """
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._size = 0
+
+    def open(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS spooled_operations (
+                idempotency_key TEXT PRIMARY KEY,
+                telegram_id INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dead_operations (
+                idempotency_key TEXT PRIMARY KEY,
+                telegram_id INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                failed_at REAL NOT NULL,
+                error TEXT NOT NULL
+            )
+            """
+        )
+        self._size = self._conn.execute("SELECT count(*) FROM spooled_operations").fetchone()[0]
+        metrics.set("spool_depth", self._size)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def size(self) -> int:
+        """Число операций в очереди (счетчик в памяти, без обращения к SQLite)"""
+        return self._size
+
+    def _append(self, telegram_id: int, operation: OperationCreate) -> uuid.UUID:
+        key = uuid.uuid4()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO spooled_operations (idempotency_key, telegram_id, payload, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (str(key), telegram_id, operation.model_dump_json(), time.time()),
+            )
+            self._size += 1
+        return key
+
+    def _peek(self, limit: int) -> List[SpooledOperation]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idempotency_key, telegram_id, payload FROM spooled_operations "
+                "ORDER BY created_at LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            SpooledOperation(uuid.UUID(key), telegram_id, OperationCreate.model_validate_json(payload))
+            for key, telegram_id, payload in rows
+        ]
+
+    def _remove(self, keys: List[uuid.UUID]) -> None:
+        with self._lock:
+            cursor = self._conn.executemany(
+                "DELETE FROM spooled_operations WHERE idempotency_key = ?",
+                [(str(key),) for key in keys],
+            )
+            self._size -= cursor.rowcount
+
+    def _dead_letter(self, failed: Sequence[Tuple[uuid.UUID, str]]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO dead_operations "
+                    "(idempotency_key, telegram_id, payload, created_at, failed_at, error) "
+                    "SELECT idempotency_key, telegram_id, payload, created_at, ?, ? "
+                    "FROM spooled_operations WHERE idempotency_key = ?",
+                    [(time.time(), error, str(key)) for key, error in failed],
+                )
+                cursor = self._conn.executemany(
+                    "DELETE FROM spooled_operations WHERE idempotency_key = ?",
+                    [(str(key),) for key, _ in failed],
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._size -= cursor.rowcount
+
+    async def append(self, telegram_id: int, operation: OperationCreate) -> uuid.UUID:
+        """Записать операцию в очередь (с fsync)"""
+        key = await asyncio.to_thread(self._append, telegram_id, operation)
+        metrics.inc("spool_appended_total")
+        metrics.set("spool_depth", self._size)
+        return key
+
+    async def peek(self, limit: int) -> List[SpooledOperation]:
+        return await asyncio.to_thread(self._peek, limit)
+
+    async def remove(self, keys: List[uuid.UUID]) -> None:
+        await asyncio.to_thread(self._remove, keys)
+        metrics.set("spool_depth", self._size)
+
+    async def dead_letter(self, failed: Sequence[Tuple[uuid.UUID, str]], reason: str) -> None:
+        """Перенести операции, которые БД не принимает, в dead_operations"""
+        await asyncio.to_thread(self._dead_letter, failed)
+        metrics.inc("spool_dead_letter_total", len(failed), reason=reason)
+        metrics.set("spool_depth", self._size)
+        for key, error in failed:
+            logger.error(f"Операция {key} из локальной очереди перенесена в dead_operations: {error}")
+
+
+operation_spool = OperationSpool()
+
+
+async def replay_spool(spool: OperationSpool, batch_size: int = 500) -> int:
+    """
+    Выгрузить очередь в БД пачками.
+    Каждая пачка — один INSERT ... ON CONFLICT DO NOTHING по ключу
+    идемпотентности; записи удаляются из очереди только после коммита.
+    Если пачку отвергла сама БД (а не ее недоступность), операции
+    записываются по одной, и отвергнутые переносятся в dead_operations.
+    """
+    replayed = 0
+    while True:
+        batch = await spool.peek(batch_size)
+        if not batch:
+            return replayed
+        try:
+            inserted, unknown_users = await _replay_batch(batch)
+        except Exception as e:
+            if is_db_failure(e):
+                raise
+            logger.warning(f"Пачка из локальной очереди отвергнута ({e}), запись по одной")
+            inserted, unknown_users = await _replay_one_by_one(spool, batch)
+
+        if unknown_users:
+            await spool.dead_letter([(key, "пользователь не найден") for key in unknown_users], reason="unknown_user")
+        await spool.remove([item.idempotency_key for item in batch])
+        metrics.inc("spool_replayed_total", inserted)
+        replayed += len(batch)
+
+
+async def _replay_batch(batch: List[SpooledOperation]) -> Tuple[int, list]:
+    async with get_async_session() as db:
+        return await OperationCRUD.create_spooled(db, batch)
+
+
+async def _replay_one_by_one(spool: OperationSpool, batch: List[SpooledOperation]) -> Tuple[int, list]:
+    inserted, unknown_users, failed = 0, [], []
+    for item in batch:
+        try:
+            count, unknown = await _replay_batch([item])
+        except Exception as e:
+            if is_db_failure(e):
+                raise
+            failed.append((item.idempotency_key, str(e)))
+            continue
+        inserted += count
+        unknown_users += unknown
+    if failed:
+        await spool.dead_letter(failed, reason="rejected")
+    return inserted, unknown_users
+
+
+async def run_spool_replayer(spool: OperationSpool, interval: float = 15.0) -> None:
+    """Фоновая задача: периодически пытается выгрузить очередь"""
+    while True:
+        await asyncio.sleep(interval)
+        if spool.size() == 0:
+            continue
+        try:
+            replayed = await replay_spool(spool)
+            logger.info(f"Из локальной очереди выгружено операций: {replayed}")
+        except Exception as e:
+            if not is_db_failure(e):
+                logger.exception(f"Ошибка выгрузки локальной очереди: {e}")
\ No newline at end of file
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+
+from app.database.crud import OperationCRUD
+from app.database.database import get_async_session
+from app.services.circuit_breaker import is_db_failure
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_legacy_tags(batch_size: int = 1000, pause: float = 0.05) -> int:
+    """
+    Перенести все старые JSON-теги в tag_list и вернуть число пачек. Каждая пачка — отдельная
+    короткая транзакция, между пачками небольшая пауза, чтобы не мешать
+    обычной нагрузке. Строки, заблокированные другими транзакциями,
+    пропускаются и переносятся при следующем проходе.
+    """
+    after_id = 0
+    batches = 0
+    while True:
+        async with get_async_session() as db:
+            last_id = await OperationCRUD.backfill_tag_batch(db, after_id, batch_size)
+        if last_id is None:
+            return batches
+        metrics.inc("tag_backfill_batches_total")
+        batches += 1
+        after_id = last_id
+        await asyncio.sleep(pause)
+
+
+async def run_tag_backfill(retry_interval: float = 300.0, recheck_interval: float = 5.0) -> None:
+    """
+    Фоновая задача: переносит старые теги и завершается, когда не
+    осталось ни одной строки с tags. Строки, пропущенные из-за блокировок
+    (SKIP LOCKED), переносятся повторными проходами.
+    """
+    batches = 0
+    while True:
+        try:
+            batches += await backfill_legacy_tags()
+            async with get_async_session() as db:
+                remaining = await OperationCRUD.count_legacy_tags(db)
+            if not remaining:
+                if batches:
+                    logger.info(f"Перенос тегов завершен, пачек: {batches}")
+                return
+            logger.info(f"Перенос тегов: осталось строк {remaining}, повтор через {recheck_interval} с")
+            delay = recheck_interval
+        except Exception as e:
+            if not is_db_failure(e):
+                logger.exception(f"Ошибка переноса тегов: {e}")
+            delay = retry_interval
+        await asyncio.sleep(delay)
\ No newline at end of file
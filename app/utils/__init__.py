@@ -1,7 +1,7 @@
-from .formatting import two_cols, format_categories_text, format_amount
-
-__all__ = [
-    'two_cols',
-    'format_categories_text', 
-    'format_amount'
+from .formatting import two_cols, format_categories_text, format_amount
+
+__all__ = [
+    'two_cols',
+    'format_categories_text', 
+    'format_amount'
 ]
\ No newline at end of file
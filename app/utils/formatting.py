@@ -1,81 +1,241 @@
-from html import escape
-from typing import List
-from app.database.models import Category
-
-
-def two_cols(categories: List[Category], col_width: int = 25) -> str:
-    """
-    Форматирует список категорий в два столбца для Telegram.
-    
-    Args:
-        categories: Список категорий
-        col_width: Ширина левого столбца (по умолчанию 20)
-    
-    Returns:
-        Строка с категориями в формате <pre>...</pre> для HTML
-    
-    Example:
-        💳 Возврат              🎁 Подарок
-        💼 Зарплата            💰 Подработка
-    """
-    if not categories:
-        return ""
-    
-    lines = []
-    # Идём по парам: 0-1, 2-3, 4-5 ...
-    for i in range(0, len(categories), 2):
-        left = f"{categories[i].icon} {categories[i].name}"
-        right = (
-            f"{categories[i+1].icon} {categories[i+1].name}"
-            if i + 1 < len(categories) else ""
-        )
-        
-        # Экранируем HTML символы для безопасности
-        left = escape(left)
-        right = escape(right)
-        
-        # Выравниваем левый столбец и добавляем правый
-        lines.append(f"{left.ljust(col_width)}{right}")
-    
-    return "<code>" + "\n".join(lines) + "</code>"
-
-
-def format_categories_text(income_categories: List[Category], expense_categories: List[Category]) -> str:
-    """
-    Форматирует полный текст со всеми категориями пользователя.
-    
-    Args:
-        income_categories: Список категорий доходов
-        expense_categories: Список категорий расходов
-    
-    Returns:
-        Отформатированный текст для отправки в Telegram
-    """
-    text = "📊 <b>Ваши категории:</b>\n\n"
-    
-    if income_categories:
-        text += "💰 <b>Доходы:</b>\n"
-        text += two_cols(income_categories) + "\n\n"
-    
-    if expense_categories:
-        text += "💸 <b>Расходы:</b>\n"
-        text += two_cols(expense_categories)
-    
-    return text
-
-
-def format_amount(amount: float, currency: str = "₽") -> str:
-    """
-    Форматирует сумму для отображения.
-    
-    Args:
-        amount: Сумма
-        currency: Валюта (по умолчанию рубли)
-    
-    Returns:
-        Отформатированная строка с суммой
-    
-    Example:
-        1234.56 -> "1 234,56 ₽"
-    """
-    return f"{amount:,.2f} {currency}".replace(",", " ").replace(".", ",")
\ No newline at end of file
+from datetime import datetime, tzinfo
+from html import escape
+from typing import Any, Dict, List
+from app.database.models import Category
+from app.utils.sparkline import sparkline, bar_chart
+
+
+def two_cols(categories: List[Category], col_width: int = 25) -> str:
+    """
+    Форматирует список категорий в два столбца для Telegram.
+    
+    Args:
+        categories: Список категорий
+        col_width: Ширина левого столбца (по умолчанию 20)
+    
+    Returns:
+        Строка с категориями в формате <pre>...</pre> для HTML
+    
+    Example:
+        💳 Возврат              🎁 Подарок
+        💼 Зарплата            💰 Подработка
+    """
+    if not categories:
+        return ""
+    
+    lines = []
+    # Идём по парам: 0-1, 2-3, 4-5 ...
+    for i in range(0, len(categories), 2):
+        left = f"{categories[i].icon} {categories[i].name}"
+        right = (
+            f"{categories[i+1].icon} {categories[i+1].name}"
+            if i + 1 < len(categories) else ""
+        )
+        
+        # Экранируем HTML символы для безопасности
+        left = escape(left)
+        right = escape(right)
+        
+        # Выравниваем левый столбец и добавляем правый
+        lines.append(f"{left.ljust(col_width)}{right}")
+    
+    return "<code>" + "\n".join(lines) + "</code>"
+
+
+def format_categories_text(income_categories: List[Category], expense_categories: List[Category]) -> str:
+    """
+    Форматирует полный текст со всеми категориями пользователя.
+    
+    Args:
+        income_categories: Список категорий доходов
+        expense_categories: Список категорий расходов
+    
+    Returns:
+        Отформатированный текст для отправки в Telegram
+    """
+    text = "📊 <b>Ваши категории:</b>\n\n"
+    
+    if income_categories:
+        text += "💰 <b>Доходы:</b>\n"
+        text += two_cols(income_categories) + "\n\n"
+    
+    if expense_categories:
+        text += "💸 <b>Расходы:</b>\n"
+        text += two_cols(expense_categories)
+    
+    return text
+
+
+def format_amount(amount: float, currency: str = "₽") -> str:
+    """
+    Форматирует сумму для отображения.
+    
+    Args:
+        amount: Сумма
+        currency: Валюта (по умолчанию рубли)
+    
+    Returns:
+        Отформатированная строка с суммой
+    
+    Example:
+        1234.56 -> "1 234,56 ₽"
+    """
+    return f"{amount:,.2f} {currency}".replace(",", " ").replace(".", ",")
+
+BUDGET_PERIOD_NAMES = {
+    "daily": "день",
+    "weekly": "неделя",
+    "monthly": "месяц",
+}
+
+def format_progress_bar(percent: float, width: int = 10) -> str:
+    """Полоса прогресса из блоков, заполнение ограничено 100%"""
+    filled = min(width, max(0, round(percent / 100 * width)))
+    return "█" * filled + "░" * (width - filled)
+
+def format_budget_overview(overview: List[Dict[str, Any]]) -> str:
+    """
+    Форматирует прогресс бюджетов для экрана «Бюджеты».
+    
+    Args:
+        overview: Результат BudgetCRUD.get_budget_overview
+    
+    Returns:
+        Отформатированный текст (HTML)
+    """
+    if not overview:
+        return "🎯 <b>Бюджеты</b>\n\nУ вас пока нет активных бюджетов."
+    
+    text = "🎯 <b>Бюджеты</b>\n"
+    for item in overview:
+        title = f"{item['icon']} {escape(item['category_name'])}" if item["category_name"] else "📦 Все расходы"
+        period = BUDGET_PERIOD_NAMES.get(item["period"], item["period"])
+        status = "🔴" if item["remaining"] < 0 else "🟡" if item["percent"] >= 80 else "🟢"
+        
+        text += f"\n{status} <b>{title}</b> ({period})\n"
+        text += f"<code>{format_progress_bar(item['percent'])}</code> {item['percent']:.0f}%\n"
+        text += f"Потрачено {format_amount(item['spent'])} из {format_amount(item['limit'])}"
+        if item["remaining"] >= 0:
+            text += f", осталось {format_amount(item['remaining'])}\n"
+        else:
+            text += f", перерасход {format_amount(-item['remaining'])}\n"
+    
+    return text
+
+MONTH_NAMES_SHORT = ["янв", "фев", "мар", "апр", "май", "июн", "июл", "авг", "сен", "окт", "ноя", "дек"]
+
+def format_month_label(moment: datetime) -> str:
+    """Короткая подпись месяца для графиков: «окт 24»"""
+    return f"{MONTH_NAMES_SHORT[moment.month - 1]} {moment:%y}"
+
+def format_trends(labels: List[str], income: List[float], expense: List[float]) -> str:
+    """
+    Текстовый отчет по трендам: спарклайны доходов и расходов
+    и столбчатая диаграмма расходов по периодам.
+    
+    Args:
+        labels: Подписи периодов
+        income: Доходы по периодам
+        expense: Расходы по периодам
+    
+    Returns:
+        Отформатированный текст (HTML)
+    """
+    text = f"📈 <b>Тренды за {len(labels)} мес.</b>\n\n"
+    text += "<code>"
+    text += f"Доходы  {sparkline(income)}\n"
+    text += f"Расходы {sparkline(expense)}"
+    text += "</code>\n\n"
+    
+    text += "💸 <b>Расходы по месяцам:</b>\n"
+    rows = [(label, value, f"{value:,.0f}".replace(",", " ")) for label, value in zip(labels, expense)]
+    text += f"<code>{escape(bar_chart(rows))}</code>\n\n"
+    
+    text += f"Доходы: {format_amount(sum(income))}\n"
+    text += f"Расходы: {format_amount(sum(expense))}"
+    return text
+
+def format_tag_report(labels: List[str], totals: Dict[str, List[float]], limit: int = 10) -> str:
+    """
+    Расходы по тегам: спарклайн по месяцам и сумма за весь период.
+    
+    Args:
+        labels: Подписи месяцев
+        totals: Тег -> расходы по месяцам (в порядке labels)
+        limit: Сколько тегов показать
+    
+    Returns:
+        Отформатированный текст (HTML)
+    """
+    text = f"🏷 <b>Расходы по тегам за {len(labels)} мес.</b>\n"
+    text += f"<i>{escape(labels[0])} — {escape(labels[-1])}</i>\n\n"
+    
+    ranked = sorted(totals.items(), key=lambda item: sum(item[1]), reverse=True)
+    rows = [(f"#{tag}", sum(values), format_amount(sum(values))) for tag, values in ranked[:limit]]
+    text += f"<code>{escape(bar_chart(rows))}</code>\n\n"
+    
+    for tag, values in ranked[:limit]:
+        text += f"<code>{sparkline(values)}</code> #{escape(tag)}\n"
+    if len(ranked) > limit:
+        text += f"\n…и еще тегов: {len(ranked) - limit}"
+    return text
+
+def format_period_report(title: str, stats: Dict[str, Any]) -> str:
+    """
+    Форматирует отчет за период.
+    
+    Args:
+        title: Название периода («Октябрь 2024»)
+        stats: Результат OperationCRUD.get_statistics_by_period
+    
+    Returns:
+        Отформатированный текст (HTML)
+    """
+    text = f"📊 <b>{escape(title)}</b>\n\n"
+    if not stats["operations_count"]:
+        return text + "Операций за период нет."
+    
+    text += f"💰 Доходы: <b>{format_amount(stats['total_income'])}</b>\n"
+    text += f"💸 Расходы: <b>{format_amount(stats['total_expense'])}</b>\n"
+    text += f"📈 Баланс: <b>{format_amount(stats['balance'])}</b>\n"
+    text += f"🧾 Операций: {stats['operations_count']}\n"
+    
+    expenses = sorted(
+        ((name, item) for name, item in stats["categories"].items() if item["expense"]),
+        key=lambda entry: entry[1]["expense"],
+        reverse=True
+    )
+    if expenses:
+        text += "\n💸 <b>Расходы по категориям:</b>\n"
+        for name, item in expenses[:10]:
+            share = item["expense"] / stats["total_expense"] * 100
+            text += f"{item['icon']} {escape(name)}: {format_amount(item['expense'])} ({share:.0f}%)\n"
+    
+    return text
+
+def format_search_results(query: str, rows: List[Any], tz: tzinfo, offset: int = 0) -> str:
+    """
+    Форматирует страницу результатов поиска.
+    
+    Args:
+        query: Исходный текст запроса
+        rows: Строки OperationCRUD.search_operations
+        tz: Часовой пояс пользователя для дат
+        offset: Сколько результатов показано на предыдущих страницах
+    
+    Returns:
+        Отформатированный текст (HTML)
+    """
+    text = f"🔍 <b>Поиск:</b> {escape(query)}\n\n"
+    if not rows:
+        return text + ("Больше ничего не найдено." if offset else "Ничего не найдено.")
+    
+    for number, row in enumerate(rows, start=offset + 1):
+        sign = "+" if row.type == "income" else "−"
+        category = f"{row.category_icon or ''} {escape(row.category_name or 'Без категории')}".strip()
+        text += f"{number}. <b>{row.occurred_at.astimezone(tz):%d.%m.%Y}</b> {sign}{format_amount(row.amount)}\n"
+        text += f"   📁 {category}"
+        if row.description:
+            text += f" — {escape(row.description)}"
+        text += "\n"
+    return text
\ No newline at end of file
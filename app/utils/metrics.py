@@ -0,0 +1,74 @@
+import threading
+from typing import Dict, Tuple
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """
+    Простой реестр метрик процесса.
+
+    Хранит счетчики, gauge-значения и суммарные наблюдения (count/sum/max)
+    и отдает их в текстовом формате Prometheus для эндпоинта /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, _Labels], float] = {}
+        self._gauges: Dict[Tuple[str, _Labels], float] = {}
+        self._summaries: Dict[Tuple[str, _Labels], list] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> Tuple[str, _Labels]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, /, **labels) -> None:
+        """Увеличить счетчик"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, /, **labels) -> None:
+        """Установить текущее значение gauge"""
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, /, **labels) -> None:
+        """Записать наблюдение (например, длительность в секундах)"""
+        key = self._key(name, labels)
+        with self._lock:
+            summary = self._summaries.setdefault(key, [0, 0.0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = max(summary[2], value)
+
+    def get(self, name: str, /, **labels) -> float:
+        """Текущее значение счетчика или gauge"""
+        key = self._key(name, labels)
+        with self._lock:
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    def render(self) -> str:
+        """Выгрузка всех метрик в текстовом формате Prometheus"""
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), (count, total, peak) in sorted(self._summaries.items()):
+                suffix = _format_labels(labels)
+                lines.append(f"{name}_count{suffix} {count}")
+                lines.append(f"{name}_sum{suffix} {total}")
+                lines.append(f"{name}_max{suffix} {peak}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: _Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+# Общий реестр приложения
+metrics = MetricsRegistry()
\ No newline at end of file
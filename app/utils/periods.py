@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+DEFAULT_TIMEZONE = "Europe/Moscow"
+
+PERIODS = ("day", "week", "month", "year")
+
+MONTH_NAMES = [
+    "Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
+    "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь",
+]
+
+
+class Period(NamedTuple):
+    key: str  # 'day:2024-05-01', 'week:2024-W18', 'month:2024-05', 'year:2024'
+    start: datetime  # локальная полночь начала периода (aware)
+    end: datetime  # начало следующего периода
+    title: str
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """Объект часового пояса; некорректное значение заменяется поясом по умолчанию"""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def _midnight(day: date, tz: ZoneInfo) -> datetime:
+    # Полночь строится заново для каждой даты, чтобы учесть переход на летнее время
+    return datetime.combine(day, datetime.min.time(), tz)
+
+
+@lru_cache(maxsize=4096)
+def period_for_date(tz_name: Optional[str], period: str, today: date) -> Period:
+    """
+    Границы локального периода, в который попадает дата today.
+    Результат кэшируется: у всех пользователей одного пояса в один день
+    границы совпадают.
+    """
+    tz = get_zone(tz_name)
+
+    if period == "day":
+        start, end = today, today + timedelta(days=1)
+        return Period(f"day:{start:%Y-%m-%d}", _midnight(start, tz), _midnight(end, tz), f"Сегодня, {start:%d.%m}")
+
+    if period == "week":
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=7)
+        year, week, _ = start.isocalendar()
+        title = f"Неделя {start:%d.%m}–{end - timedelta(days=1):%d.%m}"
+        return Period(f"week:{year}-W{week:02d}", _midnight(start, tz), _midnight(end, tz), title)
+
+    if period == "month":
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        title = f"{MONTH_NAMES[start.month - 1]} {start.year}"
+        return Period(f"month:{start:%Y-%m}", _midnight(start, tz), _midnight(end, tz), title)
+
+    if period == "year":
+        start = today.replace(month=1, day=1)
+        end = start.replace(year=start.year + 1)
+        return Period(f"year:{start:%Y}", _midnight(start, tz), _midnight(end, tz), f"{start.year} год")
+
+    raise ValueError(f"Неизвестный период: {period}")
+
+
+def current_period(tz_name: Optional[str], period: str, now: Optional[datetime] = None) -> Period:
+    """Текущий локальный период пользователя"""
+    now = now or datetime.now(timezone.utc)
+    return period_for_date(tz_name, period, now.astimezone(get_zone(tz_name)).date())
+
+
+def months_back(tz_name: Optional[str], months: int, now: Optional[datetime] = None) -> datetime:
+    """Локальное начало месяца, отстоящего на months - 1 назад от текущего"""
+    start = current_period(tz_name, "month", now).start.date()
+    year, month = divmod(start.year * 12 + start.month - 1 - (months - 1), 12)
+    return _midnight(date(year, month + 1, 1), get_zone(tz_name))
\ No newline at end of file
@@ -0,0 +1,96 @@
+from decimal import Decimal, InvalidOperation
+from typing import NamedTuple, Optional, Tuple
+
+# Множители суффиксов суммы: «1.5к», «2k», «3тыс», «1млн»
+AMOUNT_SUFFIXES = {
+    "к": 1000, "k": 1000, "тыс": 1000, "т": 1000,
+    "м": 1_000_000, "млн": 1_000_000, "m": 1_000_000,
+}
+# Обозначения валюты после суммы игнорируются
+CURRENCY_SUFFIXES = {"р", "руб", "₽", "rub"}
+
+MAX_AMOUNT = Decimal("9999999999.99")
+
+
+class ParsedOperation(NamedTuple):
+    amount: Decimal
+    sign: Optional[str]  # '+', '-' или None, если знак не указан
+    description: str
+    tags: Tuple[str, ...]
+
+
+def normalize(text: str) -> str:
+    """Нормализация для поиска по ключевым словам"""
+    return text.lower().replace("ё", "е")
+
+
+def parse_quick_add(text: str) -> Optional[ParsedOperation]:
+    """
+    Разобрать сообщение быстрого ввода за один проход:
+    «1200 обед», «+5000 зарплата», «обед 350,50», «-1.5к такси #работа».
+    
+    Сумма — первое число в сообщении (запятая или точка как десятичный
+    разделитель, пробелы между группами разрядов, суффиксы «к»/«тыс»/«млн»,
+    знак «+» для дохода). Слова с # становятся тегами, остальное — описанием.
+    Возвращает None, если суммы нет или она некорректна.
+    """
+    amount = None
+    sign = None
+    words = []
+    tags = []
+
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i]
+        if char.isspace():
+            i += 1
+            continue
+
+        if amount is None and (char.isdigit() or (char in "+-" and i + 1 < n and text[i + 1].isdigit())):
+            if char in "+-":
+                sign = char
+                i += 1
+            # Цифры, разделитель дробной части и пробелы между группами разрядов
+            start = i
+            separator_seen = False
+            while i < n:
+                c = text[i]
+                if c.isdigit():
+                    i += 1
+                elif c in ".," and not separator_seen and i + 1 < n and text[i + 1].isdigit():
+                    separator_seen = True
+                    i += 1
+                elif c == " " and not separator_seen and len(text[i + 1:i + 4]) == 3 and text[i + 1:i + 4].isdigit() and not text[i + 4:i + 5].isdigit():
+                    i += 1
+                else:
+                    break
+            number = text[start:i].replace(" ", "").replace(",", ".")
+            # Суффикс сразу после числа: «к», «тыс», «р»
+            suffix_start = i
+            while i < n and (text[i].isalpha() or text[i] == "₽"):
+                i += 1
+            suffix = text[suffix_start:i].lower()
+            multiplier = AMOUNT_SUFFIXES.get(suffix, 1)
+            if suffix and suffix not in AMOUNT_SUFFIXES and suffix not in CURRENCY_SUFFIXES:
+                # Слово, приклеенное к числу («100обед»), — часть описания
+                words.append(text[suffix_start:i])
+            try:
+                amount = Decimal(number) * multiplier
+            except InvalidOperation:
+                return None
+            continue
+
+        start = i
+        while i < n and not text[i].isspace():
+            i += 1
+        word = text[start:i]
+        if word.startswith("#") and len(word) > 1:
+            tags.append(normalize(word[1:]))
+        elif amount is not None and not words and normalize(word) in CURRENCY_SUFFIXES:
+            continue  # «1200 р обед»
+        else:
+            words.append(word)
+
+    if amount is None or amount <= 0 or amount > MAX_AMOUNT:
+        return None
+    return ParsedOperation(amount.quantize(Decimal("0.01")), sign, " ".join(words), tuple(tags))
\ No newline at end of file
@@ -0,0 +1,117 @@
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.utils.periods import MONTH_NAMES, get_zone, period_for_date
+from app.utils.quick_add import normalize
+from app.utils.tags import normalize_tags
+
+DATE_RE = re.compile(r"^(\d{1,2})\.(\d{1,2})(?:\.(\d{4}))?$")
+YEAR_RE = re.compile(r"^(20\d\d)$")
+
+# Предлоги, которые остаются от фильтров («такси в марте», «за 2024»)
+FILTER_PREPOSITIONS = {"в", "во", "за", "с", "со", "по"}
+
+
+def _month_forms() -> Dict[str, int]:
+    """Формы названий месяцев: «март», «марта», «марте», «январь», «января», «январе»"""
+    forms = {}
+    for number, name in enumerate(MONTH_NAMES, start=1):
+        name = name.lower()
+        if name.endswith(("ь", "й")):
+            base = name[:-1]
+            variants = (name, base + "я", base + "е")
+        else:
+            variants = (name, name + "а", name + "е")
+        for variant in variants:
+            forms[variant] = number
+    return forms
+
+
+MONTH_FORMS = _month_forms()
+
+
+class SearchQuery(NamedTuple):
+    text: str
+    start: Optional[datetime]
+    end: Optional[datetime]  # не включительно
+    category: Optional[str]  # начало названия категории (нормализованное)
+    tags: Tuple[str, ...]  # все теги должны быть у операции
+
+
+def _parse_date(token: str, today: date) -> Optional[date]:
+    match = DATE_RE.match(token)
+    if not match:
+        return None
+    day, month, year = int(match.group(1)), int(match.group(2)), match.group(3)
+    try:
+        parsed = date(int(year) if year else today.year, month, day)
+    except ValueError:
+        return None
+    # Дата без года — последняя прошедшая
+    if not year and parsed > today:
+        parsed = parsed.replace(year=today.year - 1)
+    return parsed
+
+
+def parse_search_query(text: str, tz_name: Optional[str], now: Optional[datetime] = None) -> SearchQuery:
+    """
+    Разобрать запрос поиска: слова для поиска и фильтры.
+
+    Фильтры:
+    - месяц словом («март», «в марте») и, необязательно, год («март 2024»);
+      месяц без года — последний наступивший
+    - год отдельно («2024»)
+    - дата или диапазон дат: «12.03», «01.03.2024-15.03.2024»
+    - категория: «@кафе» (начало названия)
+    - теги: «#отпуск»
+    """
+    tz = get_zone(tz_name)
+    today = (now or datetime.now(timezone.utc)).astimezone(tz).date()
+
+    words = []
+    month = year = None
+    start_day = end_day = None
+    category = None
+    tags = []
+
+    for token in text.split():
+        normalized = normalize(token).strip(".,!?;:")
+        if token.startswith("@") and len(token) > 1:
+            category = normalize(token[1:])
+        elif token.startswith("#") and len(token) > 1:
+            tags.append(token)
+        elif normalized in MONTH_FORMS:
+            month = MONTH_FORMS[normalized]
+        elif YEAR_RE.match(normalized):
+            year = int(normalized)
+        elif "-" in normalized or ".." in normalized:
+            first, _, last = normalized.replace("..", "-").partition("-")
+            first_day, last_day = _parse_date(first, today), _parse_date(last, today)
+            if first_day and last_day:
+                start_day, end_day = first_day, last_day + timedelta(days=1)
+            else:
+                words.append(token)
+        elif _parse_date(normalized, today):
+            start_day = _parse_date(normalized, today)
+            end_day = start_day + timedelta(days=1)
+        else:
+            words.append(token)
+
+    if start_day is None and month is not None:
+        month_year = year or (today.year if month <= today.month else today.year - 1)
+        period = period_for_date(tz_name, "month", date(month_year, month, 1))
+        start, end = period.start, period.end
+    elif start_day is None and year is not None:
+        period = period_for_date(tz_name, "year", date(year, 1, 1))
+        start, end = period.start, period.end
+    elif start_day is not None:
+        start = datetime.combine(start_day, datetime.min.time(), tz)
+        end = datetime.combine(end_day, datetime.min.time(), tz)
+    else:
+        start = end = None
+
+    if start is not None or category is not None or tags:
+        words = [word for word in words if normalize(word) not in FILTER_PREPOSITIONS]
+
+    return SearchQuery(" ".join(words), start, end, category, tuple(normalize_tags(tags)))
\ No newline at end of file
@@ -0,0 +1,78 @@
+import unicodedata
+from typing import List, Sequence, Tuple
+
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+BAR_EIGHTHS = " ▏▎▍▌▋▊▉█"
+
+ZERO_WIDTH = {"\u200d", "\ufe0e", "\ufe0f"}  # ZWJ и селекторы вариантов
+
+
+def display_width(text: str) -> int:
+    """
+    Ширина строки в моноширинном шрифте Telegram.
+    
+    В отличие от len() учитывает широкие символы и эмодзи (2 клетки),
+    комбинируемые символы, селекторы вариантов и ZWJ-последовательности
+    (0 клеток), например «⚙️» и «👨‍👩‍👧» занимают по 2 клетки.
+    """
+    width = 0
+    joined = False
+    for index, char in enumerate(text):
+        if char in ZERO_WIDTH or unicodedata.combining(char):
+            # Узкий символ с VS16 отображается как эмодзи — шириной 2
+            if char == "\ufe0f" and index and unicodedata.east_asian_width(text[index - 1]) not in ("W", "F"):
+                width += 1
+            joined = char == "\u200d"
+            continue
+        if joined:
+            # Часть ZWJ-последовательности рисуется вместе с предыдущим эмодзи
+            joined = False
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+    return width
+
+
+def pad(text: str, width: int) -> str:
+    """Дополнить строку пробелами до заданной ширины отображения"""
+    return text + " " * max(0, width - display_width(text))
+
+
+def sparkline(values: Sequence[float]) -> str:
+    """Строка-спарклайн из блоков ▁▂▃▄▅▆▇█, по символу на значение"""
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    if high == low:
+        return SPARK_BLOCKS[0 if high == 0 else len(SPARK_BLOCKS) // 2] * len(values)
+    scale = (len(SPARK_BLOCKS) - 1) / (high - low)
+    return "".join(SPARK_BLOCKS[round((value - low) * scale)] for value in values)
+
+
+def bar(value: float, maximum: float, width: int) -> str:
+    """Горизонтальная полоса с точностью до 1/8 символа"""
+    if maximum <= 0 or value <= 0:
+        return ""
+    eighths = round(value / maximum * width * 8)
+    full, rest = divmod(eighths, 8)
+    return "█" * full + (BAR_EIGHTHS[rest] if rest else "")
+
+
+def bar_chart(rows: List[Tuple[str, float, str]], width: int = 12) -> str:
+    """
+    Текстовая столбчатая диаграмма для блока <code>.
+    
+    Args:
+        rows: Строки (подпись, значение, подпись значения)
+        width: Длина самой длинной полосы в символах
+    
+    Returns:
+        Строки вида «подпись  ████▌ значение» с выровненными столбцами
+    """
+    if not rows:
+        return ""
+    label_width = max(display_width(label) for label, _, _ in rows)
+    maximum = max(value for _, value, _ in rows)
+    return "\n".join(
+        f"{pad(label, label_width)} {pad(bar(value, maximum, width), width)} {value_label}"
+        for label, value, value_label in rows
+    )
\ No newline at end of file
@@ -0,0 +1,34 @@
+import json
+from typing import Iterable, List, Optional
+
+from app.utils.quick_add import normalize
+
+MAX_TAG_LENGTH = 64
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Теги без «#», в нижнем регистре, без пустых и повторов (порядок сохраняется)"""
+    result = []
+    for tag in tags:
+        tag = normalize(str(tag)).strip().lstrip("#").strip()[:MAX_TAG_LENGTH]
+        if tag and tag not in result:
+            result.append(tag)
+    return result
+
+
+def parse_legacy_tags(raw: Optional[str]) -> List[str]:
+    """
+    Теги из старого текстового столбца operations.tags.
+    Ожидается JSON-список строк; если это не JSON, строка делится по запятым.
+    """
+    if not raw or not raw.strip():
+        return []
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return normalize_tags(raw.split(","))
+    if isinstance(value, str):
+        return normalize_tags(value.split(","))
+    if isinstance(value, list):
+        return normalize_tags(item for item in value if isinstance(item, (str, int, float)))
+    return []
\ No newline at end of file
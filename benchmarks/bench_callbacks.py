@@ -0,0 +1,111 @@
+"""
+Поиск обработчика callback-запроса: таблица префиксов CallbackDispatcher
+против цепочки фильтров F.data в обычном роутере aiogram.
+
+    python benchmarks/bench_callbacks.py [--number 2000] [--routes 10 100 1000]
+
+--number — число событий на замер при 10 маршрутах; при большем числе
+маршрутов оно пропорционально уменьшается.
+
+«До» — роутер с N обработчиками router.callback_query(F.data == ...),
+aiogram проверяет фильтры по порядку регистрации. «После» — те же N
+кнопок, зарегистрированные в CallbackDispatcher. Замеряется полный
+проход события через роутер (propagate_event) для первой, средней и
+последней зарегистрированной кнопки, а также для кнопки без обработчика.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config.settings создается при импорте и требует обязательные переменные
+for name, value in {
+    "BOT_TOKEN": "123456:BENCH",
+    "ADMIN_IDS": "1",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "finbot",
+    "DB_USER": "finbot",
+    "DB_PASSWORD": "finbot",
+    "REDIS_URL": "redis://localhost:6379/15",
+    "DOMAIN": "https://example.com",
+    "WEBHOOK_PATH": "/webhook",
+    "WEBHOOK_SECRET": "bench",
+}.items():
+    os.environ.setdefault(name, value)
+
+from aiogram import F, Router  # noqa: E402
+from aiogram.types import CallbackQuery, User  # noqa: E402
+
+from app.middlewares import callbacks as callbacks_module  # noqa: E402
+from app.middlewares.callbacks import CallbackDispatcher  # noqa: E402
+
+USER = User(id=1, is_bot=False, first_name="Bench")
+
+
+async def handler(callback: CallbackQuery) -> str:
+    return callback.data
+
+
+async def stale_answer(self, *args, **kwargs):
+    """Ответ на неизвестную кнопку без обращения к Bot API"""
+    return None
+
+
+def linear_router(count: int) -> Router:
+    router = Router(name=f"linear_{count}")
+    for i in range(count):
+        router.callback_query(F.data == f"button_{i}")(handler)
+    return router
+
+
+def dispatcher_router(count: int) -> Router:
+    dispatcher = CallbackDispatcher(name=f"dispatcher_{count}")
+    for i in range(count):
+        dispatcher.route(f"button_{i}")(handler)
+    return dispatcher.router
+
+
+async def measure(router: Router, data: str, number: int) -> float:
+    """Лучшее из пяти среднее время одного события в микросекундах"""
+    event = CallbackQuery(id="1", from_user=USER, chat_instance="1", data=data)
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(number):
+            await router.propagate_event("callback_query", event, raw_state=None)
+        best = min(best, (time.perf_counter() - started) / number)
+    return best * 1e6
+
+
+async def main(args: argparse.Namespace) -> None:
+    # Неизвестная кнопка не пишет в лог и не обращается к Bot API
+    callbacks_module.logger.disabled = True
+    CallbackQuery.answer = stale_answer
+
+    print(f"{'маршрутов':>9} {'кнопка':<10} {'до, мкс':>10} {'после, мкс':>11}")
+    for count in args.routes:
+        before_router, after_router = linear_router(count), dispatcher_router(count)
+        # Цепочка из 1000 фильтров медленная: число повторов уменьшается с N
+        number = max(20, args.number * 10 // count)
+        buttons = {
+            "первая": "button_0",
+            "средняя": f"button_{count // 2}",
+            "последняя": f"button_{count - 1}",
+            "нет": "stale_button",
+        }
+        for label, data in buttons.items():
+            before = await measure(before_router, data, number)
+            after = await measure(after_router, data, number)
+            print(f"{count:>9} {label:<10} {before:10.2f} {after:11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--routes", type=int, nargs="+", default=[10, 100, 1000])
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Накладные расходы внедрения зависимостей на один апдейт.
+
+    python benchmarks/bench_dependencies.py [--number 100000]
+
+Сравнивается вызов обработчика через HandlerObject aiogram напрямую и
+через DependencyMiddleware + @inject. Провайдеры заменены заглушками,
+поэтому измеряется только сам механизм, без БД.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config.settings создается при импорте и требует обязательные переменные
+for name, value in {
+    "BOT_TOKEN": "123456:BENCH",
+    "ADMIN_IDS": "1",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "finbot",
+    "DB_USER": "finbot",
+    "DB_PASSWORD": "finbot",
+    "REDIS_URL": "redis://localhost:6379/15",
+    "DOMAIN": "https://example.com",
+    "WEBHOOK_PATH": "/webhook",
+    "WEBHOOK_SECRET": "bench",
+}.items():
+    os.environ.setdefault(name, value)
+
+from aiogram.dispatcher.event.handler import HandlerObject  # noqa: E402
+
+from app.middlewares import dependencies  # noqa: E402
+from app.middlewares.dependencies import DependencyMiddleware, inject  # noqa: E402
+
+
+async def provide_db(deps):
+    return "session"
+
+
+async def provide_user(deps):
+    await deps.get("db")
+    return "user"
+
+
+dependencies.PROVIDERS.update(db=provide_db, user=provide_user)
+
+
+async def plain(event, state=None):
+    return state
+
+
+@inject
+async def no_dependencies(event, state=None):
+    return state
+
+
+@inject(auth=True)
+async def user_and_db(event, user, db, state=None):
+    return user, db
+
+
+async def measure(handler, number: int, middleware: bool) -> float:
+    """Среднее время одного апдейта в микросекундах"""
+    handler_object = HandlerObject(handler)
+    data = {"state": "fsm", "raw_state": None, "event_update": None, "bot": None}
+
+    async def call(event, data):
+        return await handler_object.call(event, **data)
+
+    dependency_middleware = DependencyMiddleware()
+    started = time.perf_counter()
+    for _ in range(number):
+        if middleware:
+            await dependency_middleware(call, "event", dict(data))
+        else:
+            await call("event", dict(data))
+    return (time.perf_counter() - started) / number * 1e6
+
+
+async def main(args: argparse.Namespace) -> None:
+    cases = {
+        "без DI": (plain, False),
+        "@inject без зависимостей": (no_dependencies, True),
+        "@inject(auth) user + db": (user_and_db, True),
+    }
+    for name, (handler, middleware) in cases.items():
+        await measure(handler, args.number // 10, middleware)  # прогрев
+        print(f"{name:<26} {await measure(handler, args.number, middleware):7.2f} мкс/апдейт")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100_000)
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Сравнение HTTP-сессий Bot API на локальном фейковом сервере.
+
+    python benchmarks/bench_http_session.py [--requests 5000] [--concurrency 100] [--rounds 3] [--uvloop]
+
+Сервер работает в отдельном процессе и отвечает на sendMessage без
+задержки, поэтому измеряются накладные расходы клиента: пул соединений,
+сериализация запроса и разбор ответа. Для каждой сессии берется лучший
+из нескольких прогонов.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+
+from app.services.http_session import TunedAiohttpSession, _orjson_dumps, setup_event_loop  # noqa: E402
+
+TOKEN = "123456:BENCHMARK"
+
+MESSAGE = {
+    "message_id": 1,
+    "date": 1700000000,
+    "chat": {"id": 42, "type": "private", "first_name": "Test"},
+    "from": {"id": 1, "is_bot": True, "first_name": "finbot"},
+    "text": "💰 Баланс: 12 345,67 ₽\n📈 Доходы: 50 000,00 ₽\n📉 Расходы: 37 654,33 ₽",
+}
+RESPONSE = json.dumps({"ok": True, "result": MESSAGE}).encode()
+
+
+async def send_message(request: web.Request) -> web.Response:
+    await request.read()
+    return web.Response(body=RESPONSE, content_type="application/json")
+
+
+def serve() -> None:
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", send_message)
+    web.run_app(app, host="127.0.0.1", port=8089, access_log=None, print=None)
+
+
+async def run(session: AiohttpSession, requests: int, concurrency: int) -> float:
+    session.api = TelegramAPIServer.from_base("http://127.0.0.1:8089")
+    bot = Bot(TOKEN, session=session)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await bot.send_message(42, f"Операция #{i} сохранена", reply_markup=None)
+
+    await one(0)  # прогрев: соединения и сессия
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    await session.close()
+    return elapsed
+
+
+def sessions():
+    yield "aiogram default", lambda: AiohttpSession()
+    yield "tuned", lambda: TunedAiohttpSession(limit=100, keepalive_timeout=60.0)
+    try:
+        import orjson
+    except ImportError:
+        return
+    yield "tuned + orjson", lambda: TunedAiohttpSession(
+        limit=100, keepalive_timeout=60.0, json_loads=orjson.loads, json_dumps=_orjson_dumps
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    for name, factory in sessions():
+        elapsed = min([await run(factory(), args.requests, args.concurrency) for _ in range(args.rounds)])
+        print(f"{name:<16} {args.requests / elapsed:8.0f} req/s  {elapsed / args.requests * 1e6:7.1f} µs/req")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--uvloop", action="store_true")
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=serve, daemon=True)
+    server.start()
+    time.sleep(1)
+    try:
+        setup_event_loop(args.uvloop)
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
@@ -0,0 +1,68 @@
+"""
+Стоимость отрисовки inline-клавиатур: сборка на каждый вызов против
+общих экземпляров (статические) и LRU-кэша (динамические).
+
+    python benchmarks/bench_keyboards.py [--number 20000]
+
+«До» — вызов исходной функции сборки (через __wrapped__), «после» —
+вызов функции из app.keyboards.inline.
+"""
+import argparse
+import inspect
+import os
+import sys
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config.settings создается при импорте и требует обязательные переменные
+for name, value in {
+    "BOT_TOKEN": "123456:BENCH",
+    "ADMIN_IDS": "1",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "finbot",
+    "DB_USER": "finbot",
+    "DB_PASSWORD": "finbot",
+    "REDIS_URL": "redis://localhost:6379/15",
+    "DOMAIN": "https://example.com",
+    "WEBHOOK_PATH": "/webhook",
+    "WEBHOOK_SECRET": "bench",
+}.items():
+    os.environ.setdefault(name, value)
+
+from app.keyboards import inline  # noqa: E402
+
+CATEGORIES = [SimpleNamespace(id=i, icon="🍔", name=f"Категория {i}") for i in range(1, 16)]
+KEY = inline.category_key(CATEGORIES)
+
+
+def main(args: argparse.Namespace) -> None:
+    cases = {
+        "main_menu_keyboard": (inline.main_menu_keyboard, ()),
+        "settings_menu_keyboard": (inline.settings_menu_keyboard, ()),
+        "currency_keyboard": (inline.currency_keyboard, ()),
+        "category_selection (15)": (inline._category_selection_keyboard, (KEY, "expense", 3, 1)),
+        "pagination_keyboard": (inline.pagination_keyboard, (3, 10, "history")),
+    }
+    print(f"{'клавиатура':<26} {'до, мкс':>10} {'после, мкс':>11}")
+    for name, (keyboard, call_args) in cases.items():
+        build = inspect.unwrap(keyboard)
+        before = min(timeit.repeat(lambda: build(*call_args), number=args.number // 10, repeat=5)) / (args.number // 10)
+        after = min(timeit.repeat(lambda: keyboard(*call_args), number=args.number, repeat=5)) / args.number
+        print(f"{name:<26} {before * 1e6:10.2f} {after * 1e6:11.3f}")
+
+    # Полный путь динамической клавиатуры: ключ по категориям + поиск в LRU
+    after = min(timeit.repeat(
+        lambda: inline.get_category_selection_keyboard(CATEGORIES, "expense", suggested_id=1),
+        number=args.number, repeat=5,
+    )) / args.number
+    print(f"{'get_category_selection':<26} {'':>10} {after * 1e6:11.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    main(parser.parse_args())
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Быстрый ввод без БД и Redis: разбор сообщения и поиск категории.
+
+    python benchmarks/bench_quick_add.py [--number 20000] [--aliases 200]
+
+Корпус фиксирован: сообщения вида «1200 обед», «+5000 зарплата»,
+«кофе 250 #работа». Индекс строится из базовых категорий, их
+стандартных синонимов и --aliases выученных синонимов. Для сравнения
+поиск категории замерен и простым перебором ключевых слов. Время
+записи в БД, загрузки пользователя и проверки лимитов сюда не входит.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config.settings создается при импорте и требует обязательные переменные
+for name, value in {
+    "BOT_TOKEN": "123456:BENCH",
+    "ADMIN_IDS": "1",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "finbot",
+    "DB_USER": "finbot",
+    "DB_PASSWORD": "finbot",
+    "REDIS_URL": "redis://localhost:6379/15",
+    "DOMAIN": "https://example.com",
+    "WEBHOOK_PATH": "/webhook",
+    "WEBHOOK_SECRET": "bench",
+}.items():
+    os.environ.setdefault(name, value)
+
+from app.services.category_index import DEFAULT_ALIASES, CategoryIndexes, KeywordIndex, build_keywords  # noqa: E402
+from app.utils.quick_add import normalize, parse_quick_add  # noqa: E402
+
+INCOME = {"Зарплата", "Подработка", "Инвестиции", "Возврат"}
+CATEGORIES = [
+    SimpleNamespace(id=i, name=name, is_income=name in INCOME)
+    for i, name in enumerate(DEFAULT_ALIASES, start=1)
+]
+
+CORPUS = [
+    "1200 обед",
+    "+5000 зарплата",
+    "кофе 250 #работа",
+    "-1.5к такси до дома #работа #поездки",
+    "1 200 продукты в пятерочке",
+    "350,50 ужин с друзьями",
+    "3тыс подарок маме",
+    "799₽ подписка spotify",
+    "+12 000 дивиденды по акциям",
+    "2k бензин на заправке",
+    "450 аптека",
+    "1500 стрижка",
+    "100500 что-то непонятное",
+    "+300 кешбэк за месяц",
+]
+
+
+class StubIndexes(CategoryIndexes):
+    """Индексы без БД и Redis: готовый индекс одного пользователя"""
+
+    def __init__(self, index: KeywordIndex):
+        super().__init__(versions=None)
+        self.index = index
+
+    async def get(self, db, user_id):
+        return self.index
+
+
+def linear_find(keywords, text):
+    """Перебор всех ключевых слов — то, что заменяет автомат"""
+    matches = []
+    for keyword, category_id, is_income in keywords:
+        start = text.find(keyword)
+        while start != -1:
+            if start == 0 or not text[start - 1].isalnum():
+                matches.append((start, keyword, category_id, is_income))
+            start = text.find(keyword, start + 1)
+    return matches
+
+
+def per_message(stmt, number: int) -> float:
+    """Лучшее время на одно сообщение корпуса в микросекундах"""
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number / len(CORPUS) * 1e6
+
+
+def main(args: argparse.Namespace) -> None:
+    aliases = [(f"синоним{i}", 1 + i % len(CATEGORIES)) for i in range(args.aliases)]
+    keywords = build_keywords(CATEGORIES, aliases)
+    index = KeywordIndex(keywords)
+    indexes = StubIndexes(index)
+
+    parsed = [parse_quick_add(text) for text in CORPUS]
+    assert all(item is not None for item in parsed)
+    descriptions = [normalize(item.description) for item in parsed]
+    # Автомат и перебор находят одни и те же совпадения (в разном порядке)
+    assert all(sorted(index.find(text)) == sorted(linear_find(keywords, text)) for text in descriptions)
+
+    number = max(1, args.number // len(CORPUS))
+    print(f"ключевых слов: {len(keywords)}, сообщений в корпусе: {len(CORPUS)}")
+    print(f"{'этап':<28} {'мкс/сообщение':>14}")
+
+    parse = per_message(lambda: [parse_quick_add(text) for text in CORPUS], number)
+    print(f"{'parse_quick_add':<28} {parse:14.2f}")
+
+    find = per_message(lambda: [index.find(text) for text in descriptions], number)
+    print(f"{'KeywordIndex.find':<28} {find:14.2f}")
+
+    linear = per_message(lambda: [linear_find(keywords, text) for text in descriptions], number)
+    print(f"{'перебор ключевых слов':<28} {linear:14.2f}")
+
+    async def resolve_corpus():
+        for item in parsed:
+            await indexes.resolve(None, 1, item.description, item.sign)
+
+    loop = asyncio.new_event_loop()
+    try:
+        resolve = per_message(lambda: loop.run_until_complete(resolve_corpus()), number)
+    finally:
+        loop.close()
+    print(f"{'CategoryIndexes.resolve':<28} {resolve:14.2f}")
+
+    build = min(timeit.repeat(lambda: KeywordIndex(keywords), number=100, repeat=5)) / 100 * 1e3
+    print(f"{'построение индекса, мс':<28} {build:14.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--aliases", type=int, default=200)
+    main(parser.parse_args())
\ No newline at end of file
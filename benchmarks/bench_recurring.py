@@ -0,0 +1,91 @@
+"""
+Генерация повторяющихся операций на большом числе шаблонов.
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_recurring.py [--templates 100000] [--days 10]
+
+ВНИМАНИЕ: схема в BENCH_DATABASE_URL пересоздается из моделей.
+
+Шаблоны (поровну daily, weekly, monthly) начинаются за --days дней до
+запуска. Первый прогон догоняет все пропущенные повторения, второй
+проверяет, что при отсутствии новых повторений проход по шаблонам дешев.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database.crud import OperationCRUD  # noqa: E402
+from app.database.models import Base, Operation  # noqa: E402
+
+SEED = """
+INSERT INTO users (telegram_id, first_name, is_active, timezone, currency, notification_enabled)
+SELECT g, 'bench', true, 'Europe/Moscow', 'RUB', false FROM generate_series(1, :users) AS g;
+
+INSERT INTO categories (name, is_income, is_default, is_active) VALUES ('bench', false, false, true);
+
+INSERT INTO operations (user_id, category_id, type, amount, occurred_at, is_recurring, recurring_period, tag_list)
+SELECT
+    1 + g % :users,
+    (SELECT id FROM categories WHERE name = 'bench'),
+    'expense',
+    100 + g % 900,
+    now() - make_interval(days => :days) + make_interval(secs => g % 86400),
+    true,
+    (ARRAY['daily', 'weekly', 'monthly'])[1 + g % 3],
+    '{}'
+FROM generate_series(1, :templates) AS g;
+"""
+
+
+async def main(args: argparse.Namespace) -> None:
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("BENCH_DATABASE_URL не задан")
+    engine = create_async_engine(url)
+    sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        if await conn.scalar(text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")):
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        else:
+            # Trigram-индекс генерации не касается; без contrib создаем схему без него
+            Operation.__table__.indexes.discard(
+                next(index for index in Operation.__table__.indexes if index.name == "ix_operations_description_trgm")
+            )
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SEED.split(";"):
+            if statement.strip():
+                await conn.execute(
+                    text(statement),
+                    {"users": max(1, args.templates // 20), "templates": args.templates, "days": args.days},
+                )
+        await conn.execute(text("ANALYZE"))
+
+    for run in ("catch-up", "nothing due"):
+        started = time.perf_counter()
+        async with sessionmaker() as db:
+            created = await OperationCRUD.materialize_recurring(db, datetime.now(timezone.utc))
+        elapsed = time.perf_counter() - started
+        print(f"{run:<12} {args.templates} шаблонов: {created} операций за {elapsed:.2f}s"
+              + (f" ({created / elapsed:,.0f} операций/s)" if created else ""))
+
+    async with sessionmaker() as db:
+        total = await db.scalar(select(func.count()).select_from(Operation).where(Operation.recurring_template_id.isnot(None)))
+    print(f"Всего сгенерировано: {total}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--templates", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Поиск по описаниям операций на большой таблице.
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_search.py [--rows 1000000] [--users 1000]
+
+ВНИМАНИЕ: схема в BENCH_DATABASE_URL пересоздается из моделей.
+
+Операции распределены по --users пользователям; замеряется одна страница
+/search для пользователя с наибольшим числом операций: текст (если
+установлен pg_trgm), фильтры по периоду, категории и тегу, а также
+глубокая страница по ключу. Для целевого объема запустить с --rows 10000000.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database.crud import OperationCRUD  # noqa: E402
+from app.database.models import Base, Operation  # noqa: E402
+
+SEED = """
+INSERT INTO users (telegram_id, first_name, is_active, timezone, currency, notification_enabled)
+SELECT g, 'bench', true, 'Europe/Moscow', 'RUB', false FROM generate_series(1, :users) AS g;
+
+INSERT INTO categories (name, is_income, is_default, is_active)
+SELECT name, false, false, true FROM unnest(ARRAY['Транспорт', 'Еда', 'Кафе и Рестораны', 'Продукты']) AS name;
+
+INSERT INTO operations (user_id, category_id, type, amount, description, occurred_at, is_recurring, tag_list)
+SELECT
+    1 + (g::bigint * 7919) % :users,
+    (SELECT min(id) FROM categories) + g % 4,
+    'expense',
+    100 + g % 900,
+    (ARRAY['такси домой', 'обед в кафе', 'продукты в пятерочке', 'кофе с собой', 'метро', 'бензин на заправке'])[1 + g % 6]
+        || ' ' || (g % 1000),
+    now() - make_interval(secs => g % (3 * 365 * 86400)),
+    false,
+    CASE WHEN g % 10 = 0 THEN ARRAY['работа'] ELSE '{}' END
+FROM generate_series(1, :rows) AS g;
+"""
+
+
+async def measure(sessionmaker, repeat: int, **kwargs) -> float:
+    """Медиана времени одной страницы (limit=10) в миллисекундах"""
+    timings = []
+    async with sessionmaker() as db:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await OperationCRUD.search_operations(db, limit=10, **kwargs)
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def main(args: argparse.Namespace) -> None:
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("BENCH_DATABASE_URL не задан")
+    engine = create_async_engine(url)
+    sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        has_trgm = await conn.scalar(text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'"))
+        if has_trgm:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        else:
+            # Без contrib поиск по тексту не работает; замеряем только фильтры
+            Operation.__table__.indexes.discard(
+                next(index for index in Operation.__table__.indexes if index.name == "ix_operations_description_trgm")
+            )
+        await conn.run_sync(Base.metadata.create_all)
+        started = time.perf_counter()
+        for statement in SEED.split(";"):
+            if statement.strip():
+                await conn.execute(text(statement), {"users": args.users, "rows": args.rows})
+        await conn.execute(text("ANALYZE"))
+        print(f"Загружено {args.rows} операций за {time.perf_counter() - started:.1f}s")
+        user_id = await conn.scalar(text(
+            "SELECT user_id FROM operations GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+        ))
+        per_user = await conn.scalar(text("SELECT count(*) FROM operations WHERE user_id = :u"), {"u": user_id})
+        deep = (await conn.execute(text(
+            "SELECT occurred_at, id FROM operations WHERE user_id = :u "
+            "ORDER BY occurred_at DESC, id DESC OFFSET :n LIMIT 1"
+        ), {"u": user_id, "n": per_user // 2})).one()
+
+    now = datetime.now(timezone.utc)
+    cases = {
+        "период (месяц)": dict(text="", start=now - timedelta(days=60), end=now - timedelta(days=30)),
+        "категория": dict(text="", category="кафе"),
+        "тег": dict(text="", tags=["работа"]),
+        "глубокая страница": dict(text="", after=tuple(deep)),
+    }
+    if has_trgm:
+        cases = {
+            "текст": dict(text="такси"),
+            "текст с опечаткой": dict(text="таксы"),
+            "текст + период": dict(text="кофе", start=now - timedelta(days=90)),
+            **cases,
+        }
+
+    print(f"Пользователь {user_id}: {per_user} операций, медиана из {args.repeat} запросов")
+    for name, kwargs in cases.items():
+        elapsed = await measure(sessionmaker, args.repeat, user_id=user_id, **kwargs)
+        print(f"{name:<20} {elapsed:8.2f} ms")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
@@ -1,76 +1,128 @@
-from pydantic import BaseModel
-from pydantic_settings import BaseSettings, SettingsConfigDict
-
-class DatabaseConfig(BaseModel):
-    """Настройки базы данных"""
-    host: str
-    port: int
-    name: str
-    user: str
-    password: str
-    
-    @property
-    def url(self) -> str:
-        return f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
-
-class BotConfig(BaseModel):
-    """Настройки бота"""
-    token: str
-    admin_ids: list[int]
-
-class Settings(BaseSettings):
-    """Основной класс настроек приложения"""
-    
-    # Токен бота (обязательный)
-    bot_token: str
-    
-    # ID администраторов
-    admin_ids: str
-    
-    # Настройки базы данных
-    db_host: str
-    db_port: int
-    db_name: str
-    db_user: str
-    db_password: str
-    
-    # Redis
-    redis_url: str
-    
-    # Общие настройки
-    debug: bool = False
-    log_level: str = "INFO"
-    
-    # Webhook настройки
-    use_webhook: bool = True
-    domain: str
-    webhook_path: str
-    webhook_secret: str
-    
-    model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        case_sensitive=False,
-        extra="ignore"
-    )
-    
-    @property
-    def database(self) -> DatabaseConfig:
-        return DatabaseConfig(
-            host=self.db_host,
-            port=self.db_port,
-            name=self.db_name,
-            user=self.db_user,
-            password=self.db_password
-        )
-    
-    @property
-    def bot(self) -> BotConfig:
-        admin_list = [int(id.strip()) for id in self.admin_ids.split(",") if id.strip().isdigit()]
-        return BotConfig(
-            token=self.bot_token,
-            admin_ids=admin_list
-        )
-
-# Создание экземпляра настроек
+from pydantic import BaseModel
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class DatabaseConfig(BaseModel):
+    """Настройки базы данных"""
+    host: str
+    port: int
+    name: str
+    user: str
+    password: str
+    
+    @property
+    def url(self) -> str:
+        return f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
+
+class BotConfig(BaseModel):
+    """Настройки бота"""
+    token: str
+    admin_ids: list[int]
+
+class Settings(BaseSettings):
+    """Основной класс настроек приложения"""
+    
+    # Токен бота (обязательный)
+    bot_token: str
+    
+    # ID администраторов
+    admin_ids: str
+    
+    # Настройки базы данных
+    db_host: str
+    db_port: int
+    db_name: str
+    db_user: str
+    db_password: str
+    
+    # Redis
+    redis_url: str
+    
+    # Общие настройки
+    debug: bool = False
+    log_level: str = "INFO"
+    
+    # Webhook настройки
+    use_webhook: bool = True
+    domain: str
+    webhook_path: str
+    webhook_secret: str
+    
+    # Ограничение исходящих запросов к Telegram
+    telegram_global_rate: float = 30.0
+    telegram_global_burst: int = 30
+    telegram_chat_interval: float = 0.3
+    telegram_group_interval: float = 3.0
+    telegram_max_retries: int = 3
+    
+    # Пропуск правок сообщений без изменений: отпечатки последних экранов
+    edit_fingerprint_cache_size: int = 50000
+    edit_fingerprint_ttl: float = 3600.0
+    
+    # Раннее подтверждение callback-ов, если обработчик не ответил сам
+    callback_ack_delay: float = 0.1
+    
+    # HTTP-сессия Bot API
+    bot_connection_limit: int = 100
+    bot_connection_limit_per_host: int = 0
+    bot_keepalive_timeout: float = 60.0
+    bot_dns_cache_ttl: int = 3600
+    bot_request_timeout: float = 60.0
+    use_orjson: bool = False
+    use_uvloop: bool = False
+    
+    # Автомат защиты БД: сбоев подряд до размыкания и пауза до пробного запроса
+    db_breaker_failures: int = 5
+    db_breaker_reset_timeout: float = 30.0
+    
+    # Контроль нагрузки
+    max_in_flight_updates: int = 200
+    shed_in_flight_updates: int = 100
+    shed_pool_wait_seconds: float = 0.5
+    
+    # Локальная очередь операций на время недоступности БД
+    spool_path: str = "/var/lib/finbot/operations_spool.db"
+    spool_replay_interval: float = 15.0
+    
+    # Сверка счетчиков бюджетов
+    budget_reconcile_interval: float = 3600.0
+    
+    # Уведомления о лимитах расходов
+    limit_notify_interval: float = 300.0
+    limit_near_ratio: float = 0.8
+    
+    # Генерация повторяющихся операций
+    recurring_interval: float = 300.0
+    
+    # Отрисовка графиков
+    chart_workers: int = 2
+    
+    # Справочник категорий в памяти: как часто проверять его версию
+    category_catalog_check_interval: float = 5.0
+    
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        extra="ignore"
+    )
+    
+    @property
+    def database(self) -> DatabaseConfig:
+        return DatabaseConfig(
+            host=self.db_host,
+            port=self.db_port,
+            name=self.db_name,
+            user=self.db_user,
+            password=self.db_password
+        )
+    
+    @property
+    def bot(self) -> BotConfig:
+        admin_list = [int(id.strip()) for id in self.admin_ids.split(",") if id.strip().isdigit()]
+        return BotConfig(
+            token=self.bot_token,
+            admin_ids=admin_list
+        )
+
+# Создание экземпляра настроек
 settings = Settings()
\ No newline at end of file
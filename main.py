@@ -1,202 +1,308 @@
-import asyncio
-import logging
-
-from aiohttp import web
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.fsm.storage.redis import RedisStorage
-from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
-from sqlalchemy import text
-
-from config import settings
-from app.database.database import init_database, close_database, engine
-from app.handlers.start import router as start_router
-from app.handlers.help import router as help_router
-from app.handlers.balance import router as balance_router
-from app.handlers.operations import router as operations_router
-from app.handlers.reports import router as reports_router
-from app.handlers.categories import router as categories_router
-from app.handlers.settings import router as settings_router
-from app.handlers.cancel import router as cancel_router
-
-from app.middlewares.auth import AuthMiddleware
-from app.middlewares.logging import LoggingMiddleware
-from app.middlewares.database import DatabaseMiddleware
-
-# Настройка логирования
-logging.basicConfig(
-    level=getattr(logging, settings.log_level),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("/var/log/finbot/app.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
-
-# Создание бота
-bot = Bot(
-    token=settings.bot.token,
-    default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-)
-
-# Настройка хранилища FSM
-try:
-    storage = RedisStorage.from_url(settings.redis_url)
-    logger.info("Используется Redis для хранения FSM")
-except Exception as e:
-    storage = MemoryStorage()
-    logger.warning(f"Redis недоступен ({e}), используется MemoryStorage")
-
-# Создание диспетчера
-dp = Dispatcher(storage=storage)
-
-def setup_handlers():
-    """Регистрация middleware и роутеров"""
-    # Middleware
-    dp.message.middleware(DatabaseMiddleware())
-    dp.callback_query.middleware(DatabaseMiddleware())
-    dp.message.middleware(AuthMiddleware())
-    dp.callback_query.middleware(AuthMiddleware())
-    dp.message.middleware(LoggingMiddleware())
-    dp.callback_query.middleware(LoggingMiddleware())
-    
-    # Роутеры
-    dp.include_router(start_router)
-    dp.include_router(categories_router)
-    dp.include_router(help_router)
-    dp.include_router(balance_router)
-    dp.include_router(operations_router)
-    dp.include_router(reports_router)
-    dp.include_router(settings_router)
-    dp.include_router(cancel_router)
-    
-    logger.info("Обработчики Telegram-бота зарегистрированы")
-
-# События жизненного цикла приложения
-async def on_startup(app: web.Application):
-    """Инициализация при запуске"""
-    logger.info("Инициализация базы данных")
-    await init_database()
-    
-    if settings.use_webhook:
-        webhook_url = f"{settings.domain}{settings.webhook_path}"
-        await bot.set_webhook(
-            url=webhook_url,
-            secret_token=settings.webhook_secret,
-            allowed_updates=dp.resolve_used_update_types(),
-            drop_pending_updates=True
-        )
-        logger.info(f"Webhook установлен: {webhook_url}")
-
-async def on_cleanup(app: web.Application):
-    """Очистка при завершении"""
-    logger.info("Завершение работы приложения")
-    await bot.delete_webhook(drop_pending_updates=True)
-    await close_database()
-    await storage.close()
-    await bot.session.close()
-
-def create_app() -> web.Application:
-    """Создание AioHTTP приложения"""
-    app = web.Application()
-    
-    # События жизненного цикла
-    app.on_startup.append(on_startup)
-    app.on_cleanup.append(on_cleanup)
-    
-    # Webhook обработчик
-    SimpleRequestHandler(
-        dispatcher=dp,
-        bot=bot,
-        secret_token=settings.webhook_secret
-    ).register(app, path=settings.webhook_path)
-    
-    # Health check эндпоинт
-    async def health_check(request):
-        """Проверка состояния сервиса"""
-        try:
-            me = await bot.get_me()
-            async with engine.begin() as conn:
-                await conn.execute(text("SELECT 1"))
-            
-            return web.json_response({
-                "status": "healthy",
-                "bot": {
-                    "id": me.id,
-                    "username": me.username,
-                    "first_name": me.first_name
-                },
-                "database": "connected"
-            })
-        except Exception as e:
-            logger.error(f"Health check failed: {e}")
-            return web.json_response(
-                {"status": "unhealthy", "error": str(e)}, 
-                status=500
-            )
-    
-    # Роутинг
-    app.router.add_get("/health", health_check)
-    app.router.add_get("/", lambda r: web.Response(text="FinBot is running!"))
-    
-    return app
-
-async def run_webhook():
-    """Запуск в режиме webhook"""
-    logger.info("Запуск в режиме webhook")
-    
-    app = create_app()
-    setup_application(app, dp, bot=bot)
-    
-    runner = web.AppRunner(app)
-    await runner.setup()
-    
-    site = web.TCPSite(runner, "127.0.0.1", 8000)
-    await site.start()
-    
-    logger.info(f"Webhook сервер запущен на 127.0.0.1:8000")
-    logger.info(f"Webhook URL: {settings.domain}{settings.webhook_path}")
-    
-    # Держим сервер запущенным
-    await asyncio.Event().wait()
-
-async def run_polling():
-    """Запуск в режиме polling"""
-    logger.info("Запуск в режиме polling")
-    
-    await bot.delete_webhook(drop_pending_updates=True)
-    await init_database()
-    
-    try:
-        await dp.start_polling(
-            bot,
-            allowed_updates=dp.resolve_used_update_types(),
-            drop_pending_updates=True
-        )
-    finally:
-        await close_database()
-        await storage.close()
-        await bot.session.close()
-
-async def main():
-    """Основная функция запуска"""
-    # Регистрация обработчиков
-    setup_handlers()
-    
-    # Выбор режима запуска
-    if settings.use_webhook:
-        await run_webhook()
-    else:
-        await run_polling()
-
-if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        logger.info("Получен сигнал завершения (SIGINT)")
-    except Exception as e:
-        logger.exception(f"Критическая ошибка: {e}")
+import asyncio
+import logging
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from sqlalchemy import text
+
+from config import settings
+from app.database.database import init_database, close_database, engine
+from app.database.redis import close_redis
+from app.handlers.start import router as start_router, unknown_command_router
+from app.handlers.help import router as help_router
+from app.handlers.balance import router as balance_router
+from app.handlers.operations import router as operations_router
+from app.handlers.reports import router as reports_router
+from app.handlers.categories import router as categories_router
+from app.handlers.settings import router as settings_router
+from app.handlers.cancel import router as cancel_router
+from app.handlers.search import router as search_router
+from app.handlers.quick_add import router as quick_add_router
+
+from app.middlewares.admission import AdmissionMiddleware
+from app.middlewares.callbacks import callbacks
+from app.middlewares.callback_ack import CallbackAckMiddleware
+from app.middlewares.degraded import DegradedModeMiddleware
+from app.middlewares.dependencies import DependencyMiddleware
+from app.middlewares.logging import LoggingMiddleware
+from app.services.notifications import run_limit_notifier
+from app.services.recurring import run_recurring_materializer
+from app.services.tags import run_tag_backfill
+from app.services.category_catalog import category_catalog, run_catalog_refresher
+from app.services.http_session import create_bot_session, setup_event_loop
+from app.services.message_edits import EditDeduplicator
+from app.services.callback_answers import callback_answers
+from app.services.budgets import run_budget_reconciler
+from app.services.charts import chart_service
+from app.services.send_queue import SendQueue
+from app.services.spool import operation_spool, run_spool_replayer
+from app.utils.metrics import metrics
+
+# Настройка логирования
+logging.basicConfig(
+    level=getattr(logging, settings.log_level),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("/var/log/finbot/app.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Создание бота
+bot = Bot(
+    token=settings.bot.token,
+    session=create_bot_session(settings),
+    default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+)
+
+# Правки сообщений без изменений не отправляются; подключается до очереди,
+# чтобы пропущенные правки не расходовали лимиты
+bot.session.middleware(EditDeduplicator(
+    max_size=settings.edit_fingerprint_cache_size,
+    ttl=settings.edit_fingerprint_ttl,
+))
+
+# Один ответ на callback: повторные answer() после раннего подтверждения не отправляются
+bot.session.middleware(callback_answers)
+
+# Очередь исходящих запросов с учетом лимитов Telegram
+send_queue = SendQueue(
+    rate=settings.telegram_global_rate,
+    burst=settings.telegram_global_burst,
+    chat_interval=settings.telegram_chat_interval,
+    group_interval=settings.telegram_group_interval,
+    max_retries=settings.telegram_max_retries,
+)
+bot.session.middleware(send_queue)
+
+# Настройка хранилища FSM
+try:
+    storage = RedisStorage.from_url(settings.redis_url)
+    logger.info("Используется Redis для хранения FSM")
+except Exception as e:
+    storage = MemoryStorage()
+    logger.warning(f"Redis недоступен ({e}), используется MemoryStorage")
+
+# Создание диспетчера
+dp = Dispatcher(storage=storage)
+
+def setup_handlers():
+    """Регистрация middleware и роутеров"""
+    # Middleware
+    # Outer: таймер раннего подтверждения запускается до всех фильтров и middleware
+    dp.callback_query.outer_middleware(CallbackAckMiddleware(callback_answers, delay=settings.callback_ack_delay))
+    admission = AdmissionMiddleware(
+        max_in_flight=settings.max_in_flight_updates,
+        shed_in_flight=settings.shed_in_flight_updates,
+        shed_pool_wait=settings.shed_pool_wait_seconds,
+    )
+    dp.message.middleware(admission)
+    dp.callback_query.middleware(admission)
+    dp.message.middleware(DegradedModeMiddleware())
+    dp.callback_query.middleware(DegradedModeMiddleware())
+    # Сессия БД и пользователь — по запросу обработчика (@inject)
+    dependencies = DependencyMiddleware(settings)
+    dp.message.middleware(dependencies)
+    dp.callback_query.middleware(dependencies)
+    dp.message.middleware(LoggingMiddleware())
+    dp.callback_query.middleware(LoggingMiddleware())
+    
+    # Роутеры
+    dp.include_router(start_router)
+    dp.include_router(categories_router)
+    dp.include_router(help_router)
+    dp.include_router(balance_router)
+    dp.include_router(operations_router)
+    dp.include_router(reports_router)
+    dp.include_router(settings_router)
+    dp.include_router(cancel_router)
+    dp.include_router(search_router)
+    # Все callback-и: таблица маршрутов по префиксу данных кнопки
+    dp.include_router(callbacks.router)
+    # Принимают любые команды и любой текст, поэтому подключаются последними
+    dp.include_router(unknown_command_router)
+    dp.include_router(quick_add_router)
+    
+    logger.info("Обработчики Telegram-бота зарегистрированы")
+
+# Фоновые задачи
+background_tasks: list[asyncio.Task] = []
+
+async def start_background_tasks():
+    """Запуск фоновых задач"""
+    operation_spool.open(settings.spool_path)
+    await chart_service.start(workers=settings.chart_workers)
+    try:
+        await category_catalog.refresh()
+    except Exception as e:
+        # Справочник загрузит фоновая задача, когда БД станет доступна
+        logger.warning(f"Справочник категорий не загружен: {e}")
+    background_tasks.append(asyncio.create_task(
+        run_spool_replayer(operation_spool, interval=settings.spool_replay_interval)
+    ))
+    background_tasks.append(asyncio.create_task(
+        run_budget_reconciler(interval=settings.budget_reconcile_interval)
+    ))
+    background_tasks.append(asyncio.create_task(
+        run_limit_notifier(bot, interval=settings.limit_notify_interval, near_ratio=settings.limit_near_ratio)
+    ))
+    background_tasks.append(asyncio.create_task(
+        run_recurring_materializer(interval=settings.recurring_interval)
+    ))
+    background_tasks.append(asyncio.create_task(run_tag_backfill()))
+    background_tasks.append(asyncio.create_task(
+        run_catalog_refresher(category_catalog, interval=settings.category_catalog_check_interval)
+    ))
+
+async def stop_background_tasks():
+    """Остановка фоновых задач"""
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    operation_spool.close()
+    chart_service.shutdown()
+
+# События жизненного цикла приложения
+async def on_startup(app: web.Application):
+    """Инициализация при запуске"""
+    logger.info("Инициализация базы данных")
+    await init_database()
+    await start_background_tasks()
+    
+    if settings.use_webhook:
+        webhook_url = f"{settings.domain}{settings.webhook_path}"
+        await bot.set_webhook(
+            url=webhook_url,
+            secret_token=settings.webhook_secret,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=True
+        )
+        logger.info(f"Webhook установлен: {webhook_url}")
+
+async def on_cleanup(app: web.Application):
+    """Очистка при завершении"""
+    logger.info("Завершение работы приложения")
+    await bot.delete_webhook(drop_pending_updates=True)
+    await stop_background_tasks()
+    await close_database()
+    await close_redis()
+    await storage.close()
+    await bot.session.close()
+
+def create_app() -> web.Application:
+    """Создание AioHTTP приложения"""
+    app = web.Application()
+    
+    # События жизненного цикла
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    
+    # Webhook обработчик
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.webhook_secret
+    ).register(app, path=settings.webhook_path)
+    
+    # Health check эндпоинт
+    async def health_check(request):
+        """Проверка состояния сервиса"""
+        try:
+            me = await bot.get_me()
+            async with engine.begin() as conn:
+                await conn.execute(text("SELECT 1"))
+            
+            return web.json_response({
+                "status": "healthy",
+                "bot": {
+                    "id": me.id,
+                    "username": me.username,
+                    "first_name": me.first_name
+                },
+                "database": "connected"
+            })
+        except Exception as e:
+            logger.error(f"Health check failed: {e}")
+            return web.json_response(
+                {"status": "unhealthy", "error": str(e)}, 
+                status=500
+            )
+    
+    async def metrics_endpoint(request):
+        """Метрики в формате Prometheus"""
+        return web.Response(text=metrics.render(), content_type="text/plain")
+    
+    # Роутинг
+    app.router.add_get("/health", health_check)
+    app.router.add_get("/metrics", metrics_endpoint)
+    app.router.add_get("/", lambda r: web.Response(text="FinBot is running!"))
+    
+    return app
+
+async def run_webhook():
+    """Запуск в режиме webhook"""
+    logger.info("Запуск в режиме webhook")
+    
+    app = create_app()
+    setup_application(app, dp, bot=bot)
+    
+    runner = web.AppRunner(app)
+    await runner.setup()
+    
+    site = web.TCPSite(runner, "127.0.0.1", 8000)
+    await site.start()
+    
+    logger.info(f"Webhook сервер запущен на 127.0.0.1:8000")
+    logger.info(f"Webhook URL: {settings.domain}{settings.webhook_path}")
+    
+    # Держим сервер запущенным
+    await asyncio.Event().wait()
+
+async def run_polling():
+    """Запуск в режиме polling"""
+    logger.info("Запуск в режиме polling")
+    
+    await bot.delete_webhook(drop_pending_updates=True)
+    await init_database()
+    await start_background_tasks()
+    
+    try:
+        await dp.start_polling(
+            bot,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=True
+        )
+    finally:
+        await stop_background_tasks()
+        await close_database()
+        await close_redis()
+        await storage.close()
+        await bot.session.close()
+
+async def main():
+    """Основная функция запуска"""
+    # Регистрация обработчиков
+    setup_handlers()
+    
+    # Выбор режима запуска
+    if settings.use_webhook:
+        await run_webhook()
+    else:
+        await run_polling()
+
+if __name__ == "__main__":
+    setup_event_loop(settings.use_uvloop)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Получен сигнал завершения (SIGINT)")
+    except Exception as e:
+        logger.exception(f"Критическая ошибка: {e}")
         raise
\ No newline at end of file
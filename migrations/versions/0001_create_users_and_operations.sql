@@ -1,28 +1,28 @@
--- Создаём схему public, если ещё нет
-CREATE SCHEMA IF NOT EXISTS public;
-
--- Таблица пользователей
-CREATE TABLE IF NOT EXISTS public.users (
-    id SERIAL PRIMARY KEY,
-    telegram_id BIGINT NOT NULL UNIQUE,
-    first_name TEXT NOT NULL,
-    last_name TEXT,
-    username TEXT,
-    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
-
--- Таблица операций
-CREATE TABLE IF NOT EXISTS public.operations (
-    id SERIAL PRIMARY KEY,
-    user_id INTEGER NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
-    type TEXT NOT NULL CHECK (type IN ('income','expense')),
-    amount NUMERIC(12,2) NOT NULL CHECK (amount > 0),
-    category TEXT NOT NULL,
-    description TEXT,
-    occurred_at TIMESTAMPTZ NOT NULL,
-    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
-
--- Индексы для ускорения выборок
-CREATE INDEX IF NOT EXISTS idx_operations_user_id ON public.operations(user_id);
+-- Создаём схему public, если ещё нет
+CREATE SCHEMA IF NOT EXISTS public;
+
+-- Таблица пользователей
+CREATE TABLE IF NOT EXISTS public.users (
+    id SERIAL PRIMARY KEY,
+    telegram_id BIGINT NOT NULL UNIQUE,
+    first_name TEXT NOT NULL,
+    last_name TEXT,
+    username TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Таблица операций
+CREATE TABLE IF NOT EXISTS public.operations (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    type TEXT NOT NULL CHECK (type IN ('income','expense')),
+    amount NUMERIC(12,2) NOT NULL CHECK (amount > 0),
+    category TEXT NOT NULL,
+    description TEXT,
+    occurred_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Индексы для ускорения выборок
+CREATE INDEX IF NOT EXISTS idx_operations_user_id ON public.operations(user_id);
 CREATE INDEX IF NOT EXISTS idx_operations_occurred_at ON public.operations(occurred_at);
\ No newline at end of file
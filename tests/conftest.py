@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+# Корень репозитория: пакеты app и config импортируются без установки
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config.settings создается при импорте и требует обязательные переменные
+for name, value in {
+    "BOT_TOKEN": "123456:TEST",
+    "ADMIN_IDS": "1",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "finbot_test",
+    "DB_USER": "finbot",
+    "DB_PASSWORD": "finbot",
+    "REDIS_URL": "redis://localhost:6379/15",
+    "DOMAIN": "https://example.com",
+    "WEBHOOK_PATH": "/webhook",
+    "WEBHOOK_SECRET": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def pg_sessionmaker():
+    """
+    Сессии к тестовой PostgreSQL (TEST_DATABASE_URL, postgresql+asyncpg://...).
+    База должна быть в UTF8: поиск сравнивает lower() кириллических строк.
+    Схема пересоздается из моделей для каждого теста. NullPool: каждый
+    тест работает в своем asyncio.run, соединения между ними не переносятся.
+    """
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL не задан")
+
+    from app.database.models import Base, Operation
+
+    engine = create_async_engine(url, poolclass=NullPool)
+
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            has_trgm = await conn.scalar(text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'"))
+            if has_trgm:
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                await conn.run_sync(Base.metadata.create_all)
+                return
+            # Сборка PostgreSQL без contrib: схема без trigram-индекса
+            trgm_index = next(index for index in Operation.__table__.indexes if index.name == "ix_operations_description_trgm")
+            Operation.__table__.indexes.discard(trgm_index)
+            try:
+                await conn.run_sync(Base.metadata.create_all)
+            finally:
+                Operation.__table__.indexes.add(trgm_index)
+
+    asyncio.run(create_schema())
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+@pytest.fixture
+def sql_statements(pg_sessionmaker):
+    """SQL-запросы, отправленные в тестовую БД (для проверки числа запросов)"""
+    engine = pg_sessionmaker.kw["bind"].sync_engine
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
\ No newline at end of file
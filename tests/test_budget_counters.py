@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, update
+
+from app.database.crud import BudgetCRUD, OperationCRUD
+from app.database.models import Budget, BudgetSpend, Category, Operation, User
+from app.schemas.operation import OperationCreate
+
+
+async def seed(sessionmaker):
+    """Пользователь, категория и общий месячный бюджет"""
+    async with sessionmaker() as db:
+        user = User(telegram_id=1, first_name="Test")
+        category = Category(name="Еда", icon="🍔")
+        db.add_all([user, category])
+        await db.flush()
+        db.add(Budget(
+            user_id=user.id,
+            limit_amount=Decimal("10000"),
+            period="monthly",
+            start_date=datetime.now(timezone.utc) - timedelta(days=400),
+        ))
+        await db.commit()
+        return user.id, category.id
+
+
+async def add_expense(sessionmaker, user_id, category_id, amount):
+    async with sessionmaker() as db:
+        await OperationCRUD.create(db, OperationCreate(
+            amount=amount, type="expense", occurred_at=datetime.now(timezone.utc), category_id=category_id
+        ), user_id)
+
+
+async def spent(sessionmaker):
+    async with sessionmaker() as db:
+        return await db.scalar(select(BudgetSpend.spent))
+
+
+@pytest.mark.parametrize("committed_before", [Decimal("0"), Decimal("100")])
+def test_increment_committed_during_reconcile_survives(pg_sessionmaker, committed_before):
+    async def main():
+        user_id, category_id = await seed(pg_sessionmaker)
+        if committed_before:
+            await add_expense(pg_sessionmaker, user_id, category_id, float(committed_before))
+
+        # Запись операции, не закоммиченная к началу сверки
+        writer = pg_sessionmaker()
+        operation = Operation(
+            user_id=user_id, category_id=category_id, type="expense",
+            amount=Decimal("50"), occurred_at=datetime.now(timezone.utc),
+        )
+        writer.add(operation)
+        await writer.flush()
+        await BudgetCRUD.track_operation(writer, operation)
+
+        async def reconcile():
+            async with pg_sessionmaker() as db:
+                return await BudgetCRUD.reconcile_spend_counters(db)
+
+        task = asyncio.create_task(reconcile())
+        await asyncio.sleep(0.5)
+        # Сверка ждет блокировку строки счетчика, которую держит запись
+        assert not task.done()
+        await writer.commit()
+        await writer.close()
+        await task
+
+        return await spent(pg_sessionmaker)
+
+    assert asyncio.run(main()) == Decimal("50") + Decimal(committed_before)
+
+
+def test_reconcile_repairs_drift(pg_sessionmaker):
+    async def main():
+        user_id, category_id = await seed(pg_sessionmaker)
+        await add_expense(pg_sessionmaker, user_id, category_id, 120.0)
+        async with pg_sessionmaker() as db:
+            await db.execute(update(BudgetSpend).values(spent=Decimal("999")))
+            await db.commit()
+        async with pg_sessionmaker() as db:
+            repaired = await BudgetCRUD.reconcile_spend_counters(db)
+        async with pg_sessionmaker() as db:
+            unchanged = await BudgetCRUD.reconcile_spend_counters(db)
+        return repaired, unchanged, await spent(pg_sessionmaker)
+
+    assert asyncio.run(main()) == (1, 0, Decimal("120"))
\ No newline at end of file
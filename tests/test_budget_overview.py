@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.database.crud import BudgetCRUD
+from app.database.models import Budget, Category, Operation, User
+
+
+async def seed(sessionmaker):
+    now = datetime.now(timezone.utc)
+    async with sessionmaker() as db:
+        user = User(telegram_id=1, first_name="Test")
+        food, taxi, fun = Category(name="Еда"), Category(name="Такси"), Category(name="Кино")
+        db.add_all([user, food, taxi, fun])
+        await db.flush()
+        long_ago = now - timedelta(days=400)
+        db.add_all([
+            Budget(user_id=user.id, category_id=food.id, limit_amount=Decimal("1000"), period="monthly", start_date=long_ago),
+            Budget(user_id=user.id, category_id=taxi.id, limit_amount=Decimal("500"), period="monthly", start_date=long_ago),
+            # Бюджет начался только что: расходы до start_date не учитываются
+            Budget(user_id=user.id, category_id=fun.id, limit_amount=Decimal("300"), period="monthly", start_date=now),
+            Budget(user_id=user.id, category_id=None, limit_amount=Decimal("2000"), period="monthly", start_date=long_ago),
+            Budget(user_id=user.id, category_id=food.id, limit_amount=Decimal("1"), period="monthly", start_date=long_ago, is_active=False),
+        ])
+        earlier = now - timedelta(seconds=1)
+        for category, amount in ((food, "250"), (food, "150"), (taxi, "600"), (fun, "100")):
+            db.add(Operation(user_id=user.id, category_id=category.id, type="expense", amount=Decimal(amount), occurred_at=earlier))
+        db.add(Operation(user_id=user.id, category_id=food.id, type="income", amount=Decimal("5000"), occurred_at=earlier))
+        await db.commit()
+        return user.id
+
+
+def test_overview_is_one_statement(pg_sessionmaker, sql_statements):
+    async def main():
+        user_id = await seed(pg_sessionmaker)
+        async with pg_sessionmaker() as db:
+            sql_statements.clear()
+            return await BudgetCRUD.get_budget_overview(db, user_id)
+
+    overview = asyncio.run(main())
+    assert len(sql_statements) == 1
+
+    by_name = {item["category_name"]: item for item in overview}
+    assert len(overview) == 4
+    assert by_name["Еда"]["spent"] == Decimal("400")
+    assert by_name["Еда"]["remaining"] == Decimal("600")
+    assert by_name["Такси"]["percent"] == 120.0
+    assert by_name["Кино"]["spent"] == 0
+    assert by_name[None]["spent"] == Decimal("1100")
\ No newline at end of file
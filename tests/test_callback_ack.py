@@ -0,0 +1,155 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramNetworkError
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from app.middlewares.callback_ack import CallbackAckMiddleware
+from app.services.callback_answers import CallbackAnswers
+from app.utils.metrics import metrics
+
+CHAT_ID = 42
+
+
+class FakeBotAPI:
+    """Заглушка Bot API: записывает методы и по заказу падает"""
+
+    def __init__(self, failures=0):
+        self.methods = []
+        self.failures = failures
+
+    async def __call__(self, bot, method):
+        if self.failures:
+            self.failures -= 1
+            raise TelegramNetworkError(method=method, message="timeout")
+        self.methods.append(method)
+        return True
+
+
+class StubCallback:
+    """CallbackQuery, ответы которого проходят через CallbackAnswers, как в сессии бота"""
+
+    def __init__(self, answers, api, callback_id="1"):
+        self.id = callback_id
+        self.message = SimpleNamespace(chat=SimpleNamespace(id=CHAT_ID))
+        self.answers = answers
+        self.api = api
+
+    async def answer(self, text=None, show_alert=None):
+        method = AnswerCallbackQuery(callback_query_id=self.id, text=text, show_alert=show_alert)
+        return await self.answers(self.api, None, method)
+
+
+@pytest.fixture
+def setup():
+    answers, api = CallbackAnswers(), FakeBotAPI()
+    return answers, api, CallbackAckMiddleware(answers, delay=0.05)
+
+
+def handle(middleware, callback, handler):
+    return asyncio.run(middleware(handler, callback, {}))
+
+
+def sent(api):
+    return [(type(method).__name__, method.text) for method in api.methods]
+
+
+def test_fast_handler_answers_itself(setup):
+    answers, api, middleware = setup
+
+    async def handler(callback, data):
+        await callback.answer("Отменено")
+
+    handle(middleware, StubCallback(answers, api), handler)
+    assert sent(api) == [("AnswerCallbackQuery", "Отменено")]
+
+
+def test_handler_without_answer_is_acked_once(setup):
+    answers, api, middleware = setup
+
+    async def handler(callback, data):
+        await asyncio.sleep(0.1)
+
+    handle(middleware, StubCallback(answers, api), handler)
+    assert sent(api) == [("AnswerCallbackQuery", None)]
+
+
+def test_slow_handler_toast_is_dropped(setup):
+    answers, api, middleware = setup
+    dropped = metrics.get("callback_answers_total", result="toast_dropped")
+    early = metrics.get("callback_early_acks_total")
+
+    async def handler(callback, data):
+        await asyncio.sleep(0.1)
+        await callback.answer("✅ Готово")
+        await callback.answer()
+
+    handle(middleware, StubCallback(answers, api), handler)
+    assert sent(api) == [("AnswerCallbackQuery", None)]
+    assert metrics.get("callback_answers_total", result="toast_dropped") == dropped + 1
+    assert metrics.get("callback_early_acks_total") == early + 1
+
+
+def test_alert_after_early_ack_becomes_message(setup):
+    answers, api, middleware = setup
+
+    async def handler(callback, data):
+        await asyncio.sleep(0.1)
+        await callback.answer("❌ Ошибка", show_alert=True)
+
+    handle(middleware, StubCallback(answers, api), handler)
+    assert sent(api) == [("AnswerCallbackQuery", None), ("SendMessage", "❌ Ошибка")]
+    assert api.methods[1].chat_id == CHAT_ID
+
+
+def test_callback_ack_loading_is_the_only_answer(setup):
+    answers, api, middleware = setup
+
+    async def handler(callback, data):
+        await data["callback_ack"].loading("⏳ Строю график…")
+        await asyncio.sleep(0.1)
+        await callback.answer()
+
+    handle(middleware, StubCallback(answers, api), handler)
+    assert sent(api) == [("AnswerCallbackQuery", "⏳ Строю график…")]
+
+
+def test_failed_handler_is_still_acked(setup):
+    answers, api, middleware = setup
+
+    async def handler(callback, data):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        handle(middleware, StubCallback(answers, api), handler)
+    assert sent(api) == [("AnswerCallbackQuery", None)]
+
+
+def test_failed_answer_can_be_retried():
+    answers, api = CallbackAnswers(), FakeBotAPI(failures=1)
+    callback = StubCallback(answers, api)
+    answers.track(callback.id, CHAT_ID)
+
+    async def main():
+        with pytest.raises(TelegramNetworkError):
+            await callback.answer("Отменено")
+        assert not answers.is_answered(callback.id)
+        await callback.answer("Отменено")
+        await callback.answer("Повтор")
+
+    asyncio.run(main())
+    assert answers.is_answered(callback.id)
+    assert sent(api) == [("AnswerCallbackQuery", "Отменено")]
+
+
+def test_untracked_callbacks_and_other_methods_pass_through():
+    answers, api = CallbackAnswers(), FakeBotAPI()
+
+    async def main():
+        for _ in range(2):
+            await answers(api, None, AnswerCallbackQuery(callback_query_id="untracked"))
+        await answers(api, None, SendMessage(chat_id=CHAT_ID, text="test"))
+
+    asyncio.run(main())
+    assert sent(api) == [("AnswerCallbackQuery", None), ("AnswerCallbackQuery", None), ("SendMessage", "test")]
\ No newline at end of file
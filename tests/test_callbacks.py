@@ -0,0 +1,95 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.keyboards.callbacks import EditCategory, SelectCategory
+from app.middlewares.callbacks import ANY_STATE, STALE_BUTTON_TEXT, CallbackDispatcher
+
+ADDING = "OperationStates:waiting_for_category"
+
+
+async def handler(callback, **kwargs):
+    return None
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = CallbackDispatcher(name="test_callbacks")
+    # Маршрут для любого состояния зарегистрирован раньше маршрута с состоянием
+    dispatcher.route("help")(handler)
+    dispatcher.route(SelectCategory)(handler)
+    dispatcher.route(SelectCategory, state=ADDING)(handler)
+    dispatcher.route("confirm_save", state=ADDING)(handler)
+    dispatcher.route("menu", state=None)(handler)
+    return dispatcher
+
+
+def matched(dispatcher, data, raw_state=None):
+    found = dispatcher.match(data, raw_state)
+    if found is None:
+        return None
+    route, callback_data = found
+    return route.state, callback_data
+
+
+def test_plain_button(dispatcher):
+    assert matched(dispatcher, "help") == (ANY_STATE, None)
+    assert matched(dispatcher, "help", ADDING) == (ANY_STATE, None)
+
+
+@pytest.mark.parametrize("data", [
+    "unknown",
+    "unknown:1",
+    "help:1",  # кнопка без аргументов с аргументами
+    "select_category",  # не хватает аргументов
+    "select_category:abc:",  # неверный тип
+    "select_category:1:transfer",  # недопустимое значение
+    "select_category:1:income:extra",
+    "",
+])
+def test_stale_or_unknown_data(dispatcher, data):
+    assert dispatcher.match(data, ADDING) is None
+
+
+def test_state_route_takes_precedence(dispatcher):
+    data = SelectCategory(category_id=5, operation_type="income").pack()
+    assert matched(dispatcher, data, ADDING) == (ADDING, SelectCategory(category_id=5, operation_type="income"))
+    assert matched(dispatcher, data, None) == (ANY_STATE, SelectCategory(category_id=5, operation_type="income"))
+    assert matched(dispatcher, data, "Other:state")[0] == ANY_STATE
+
+
+def test_state_only_routes(dispatcher):
+    assert matched(dispatcher, "confirm_save", ADDING) == (ADDING, None)
+    assert matched(dispatcher, "confirm_save", None) is None
+    assert matched(dispatcher, "menu", None) == (None, None)
+    assert matched(dispatcher, "menu", ADDING) is None
+
+
+def test_routes_unpack_with_their_own_factory():
+    dispatcher = CallbackDispatcher(name="test_factories")
+    dispatcher.route("edit_category", state=ADDING)(handler)
+    dispatcher.route(EditCategory)(handler)
+    assert matched(dispatcher, "edit_category", ADDING) == (ADDING, None)
+    assert matched(dispatcher, "edit_category:7", None) == (ANY_STATE, EditCategory(category_id=7))
+    # Данные подходят префиксу, но не фабрике маршрута для этого состояния
+    assert matched(dispatcher, "edit_category:7", ADDING) is None
+
+
+def test_duplicate_route_is_rejected(dispatcher):
+    with pytest.raises(ValueError):
+        dispatcher.route(SelectCategory, state=ADDING)(handler)
+
+
+def test_unrouted_button_is_answered(dispatcher):
+    answers = []
+
+    async def answer(text):
+        answers.append(text)
+
+    async def next_handler(event, data):
+        raise AssertionError("обработчик не должен вызываться")
+
+    event = SimpleNamespace(data="select_category:oops", answer=answer)
+    asyncio.run(dispatcher._resolve(next_handler, event, {"raw_state": None}))
+    assert answers == [STALE_BUTTON_TEXT]
\ No newline at end of file
@@ -0,0 +1,97 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import categorizer as categorizer_module
+from app.services.categorizer import Categorizer, CategoryModel
+
+
+class StubRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+@pytest.fixture
+def history(monkeypatch):
+    """История операций пользователей в БД, от новых к старым"""
+    rows = {}
+
+    async def get_category_history(db, user_id, limit=1000):
+        if user_id in rows and rows[user_id] is None:
+            raise ConnectionError("database is down")
+        return rows.get(user_id, [])
+
+    monkeypatch.setattr(categorizer_module.OperationCRUD, "get_category_history", get_category_history)
+    return rows
+
+
+def test_learn_after_training_from_history_counts_once(history):
+    # Операция уже сохранена и попала в историю, по которой обучается модель
+    history[1] = [("такси домой", 7), ("обед", 3)]
+
+    async def main():
+        categorizer = Categorizer(StubRedis(), flush_delay=0)
+        await categorizer.learn(None, 1, "такси домой", 7)
+        model = await categorizer.get(None, 1)
+        await categorizer.learn(None, 1, "такси на работу", 7)
+        return model
+
+    model = asyncio.run(main())
+    assert model.docs == {7: 2, 3: 1}
+    assert model.counts[7]["такси"] == 2
+
+
+def test_rank_falls_back_to_given_order(history):
+    history[1] = None
+    categories = [SimpleNamespace(id=3), SimpleNamespace(id=7)]
+
+    async def main():
+        categorizer = Categorizer(StubRedis())
+        return await categorizer.rank(None, 1, "такси", categories)
+
+    assert asyncio.run(main()) == categories
+
+
+def test_rank_orders_by_history(history):
+    history[1] = [("такси", 7), ("такси", 7), ("обед", 3)]
+    categories = [SimpleNamespace(id=3), SimpleNamespace(id=7)]
+
+    async def main():
+        categorizer = Categorizer(StubRedis(), flush_delay=0)
+        return await categorizer.rank(None, 1, "такси", categories)
+
+    assert [category.id for category in asyncio.run(main())] == [7, 3]
+
+
+def test_total_entries_are_bounded(history):
+    for user_id in range(1, 11):
+        history[user_id] = [(f"слово{user_id} покупка{i}", 1) for i in range(20)]
+
+    async def main():
+        categorizer = Categorizer(StubRedis(), max_total_entries=300, flush_delay=0)
+        for user_id in range(1, 11):
+            await categorizer.get(None, user_id)
+        await categorizer.learn(None, 10, "еще одна покупка", 1)
+        return categorizer
+
+    categorizer = asyncio.run(main())
+    assert 10 in categorizer._models
+    assert len(categorizer._models) < 10
+    assert categorizer._entries == sum(model.entries for model in categorizer._models.values())
+    assert categorizer._entries <= 300
+
+
+def test_snapshot_round_trip():
+    model = CategoryModel()
+    model.learn("кофе с собой", 2)
+    restored = CategoryModel.from_json(model.to_json())
+    assert restored.docs == model.docs
+    assert restored.counts == model.counts
+    assert restored.entries == model.entries
\ No newline at end of file
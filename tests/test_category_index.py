@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.category_index import CategoryIndexes, KeywordIndex, build_keywords
+
+CATEGORIES = [
+    SimpleNamespace(id=1, name="Еда", is_income=False),
+    SimpleNamespace(id=2, name="Кафе и Рестораны", is_income=False),
+    SimpleNamespace(id=3, name="Кредит", is_income=False),
+    SimpleNamespace(id=4, name="Инвестиции", is_income=True),
+    SimpleNamespace(id=5, name="Возврат", is_income=True),
+    SimpleNamespace(id=6, name="Транспорт", is_income=False),
+]
+
+
+class StubIndexes(CategoryIndexes):
+    """Индексы без БД и Redis: индекс строится из фиксированных категорий"""
+
+    def __init__(self, aliases=()):
+        super().__init__(versions=None)
+        self.index = KeywordIndex(build_keywords(CATEGORIES, aliases))
+
+    async def get(self, db, user_id):
+        return self.index
+
+
+def resolve(description, sign=None, aliases=()):
+    return asyncio.run(StubIndexes(aliases).resolve(None, 1, description, sign))
+
+
+def test_find_matches_word_starts_only():
+    index = KeywordIndex([("обед", 1, False), ("бед", 2, False)])
+    assert index.find("обеда") == [(0, "обед", 1, False)]
+    assert index.find("на обед, такси") == [(3, "обед", 1, False)]
+    assert index.find("победа") == []
+
+
+def test_find_overlapping_keywords():
+    index = KeywordIndex([("кофе", 1, False), ("кофейня", 2, False), ("фе", 3, False)])
+    assert sorted(index.find("кофейня")) == [(0, "кофе", 1, False), (0, "кофейня", 2, False)]
+
+
+def test_find_follows_suffix_links():
+    index = KeywordIndex([("abcd", 1, False), ("bce", 2, False)])
+    assert index.find("x bce") == [(2, "bce", 2, False)]
+    assert index.find("abce") == []
+
+
+def test_earliest_keyword_wins():
+    # «процент» стоит раньше «кредит», поэтому выбираются инвестиции
+    match = resolve("процент по кредиту")
+    assert (match.category_id, match.is_income, match.keyword) == (4, True, "процент")
+    assert resolve("кредит, процент").category_id == 3
+
+
+def test_longest_keyword_wins_at_same_position():
+    match = resolve("кафе", aliases=[("каф", 1)])
+    assert (match.category_id, match.keyword) == (2, "кафе")
+
+
+def test_sign_filters_by_type():
+    assert resolve("процент по кредиту", sign="-").category_id == 3
+    assert resolve("возврат за такси", sign="+").category_id == 5
+    assert resolve("возврат за такси", sign="-").category_id == 6
+    assert resolve("такси", sign="+") is None
+
+
+def test_learned_alias_overrides_default():
+    assert resolve("кофе").category_id == 2
+    assert resolve("кофе", aliases=[("кофе", 1)]).category_id == 1
+    # Синоним на чужую категорию игнорируется
+    assert resolve("кофе", aliases=[("кофе", 99)]).category_id == 2
+
+
+@pytest.mark.parametrize("description", ["", "подарок маме"])
+def test_no_match(description):
+    assert resolve(description) is None
\ No newline at end of file
@@ -0,0 +1,163 @@
+import asyncio
+
+import asyncpg
+import pytest
+from sqlalchemy import exc as sa_exc
+
+from app.services import circuit_breaker as circuit_breaker_module
+from app.services.circuit_breaker import (
+    CircuitBreaker,
+    CircuitState,
+    DatabaseConnectError,
+    DatabaseUnavailable,
+    is_db_failure,
+)
+
+
+def dbapi_error(error_class, cause):
+    orig = Exception("adapter error")
+    orig.__cause__ = cause
+    return error_class("SELECT 1", None, orig)
+
+
+@pytest.mark.parametrize("error", [
+    DatabaseUnavailable("open"),
+    DatabaseConnectError("refused"),
+    sa_exc.TimeoutError("pool timeout"),
+    dbapi_error(sa_exc.InterfaceError, asyncpg.exceptions.ConnectionDoesNotExistError()),
+    dbapi_error(sa_exc.DBAPIError, asyncpg.exceptions.AdminShutdownError()),
+    dbapi_error(sa_exc.DBAPIError, asyncpg.exceptions.TooManyConnectionsError()),
+])
+def test_database_failures(error):
+    assert is_db_failure(error)
+
+
+@pytest.mark.parametrize("error", [
+    OSError("redis socket"),
+    ConnectionResetError(),
+    asyncio.TimeoutError(),
+    dbapi_error(sa_exc.IntegrityError, asyncpg.exceptions.ForeignKeyViolationError()),
+    dbapi_error(sa_exc.DBAPIError, asyncpg.exceptions.DivisionByZeroError()),
+    ValueError("bad amount"),
+])
+def test_other_errors_are_not_database_failures(error):
+    assert not is_db_failure(error)
+
+class Clock:
+    """Заглушка time.monotonic для автомата"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker_module, "time", clock)
+    return clock
+
+
+class Probe:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.release = None  # asyncio.Event, если пробный запрос должен ждать
+
+    async def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        if self.fail:
+            raise DatabaseConnectError("refused")
+
+
+def breaker(probe, threshold=3):
+    return CircuitBreaker("test", probe, failure_threshold=threshold, reset_timeout=30.0)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_opens_after_consecutive_failures(clock):
+    circuit = breaker(Probe())
+    circuit.record_failure(DatabaseConnectError("refused"))
+    circuit.record_failure(DatabaseConnectError("refused"))
+    circuit.record_success()  # успех сбрасывает счетчик
+    circuit.record_failure(DatabaseConnectError("refused"))
+    circuit.record_failure(ValueError("bad amount"))  # не сбой БД
+    circuit.record_failure(DatabaseConnectError("refused"))
+    assert circuit.state == CircuitState.CLOSED
+
+    circuit.record_failure(DatabaseConnectError("refused"))
+    assert circuit.state == CircuitState.OPEN
+    assert circuit.opened_at == clock.now
+
+
+def test_open_circuit_rejects_without_probing(clock):
+    probe = Probe()
+    circuit = breaker(probe, threshold=1)
+    circuit.record_failure(DatabaseConnectError("refused"))
+
+    clock.now += 29.9
+    with pytest.raises(DatabaseUnavailable):
+        run(circuit.before_call())
+    assert probe.calls == 0
+
+
+def test_successful_probe_closes_circuit(clock):
+    probe = Probe()
+    circuit = breaker(probe, threshold=1)
+    circuit.record_failure(DatabaseConnectError("refused"))
+
+    clock.now += 30
+    run(circuit.before_call())
+    assert probe.calls == 1
+    assert circuit.state == CircuitState.CLOSED
+    assert circuit.failures == 0
+    run(circuit.before_call())
+    assert probe.calls == 1
+
+
+def test_failed_probe_reopens_circuit(clock):
+    probe = Probe()
+    probe.fail = True
+    circuit = breaker(probe, threshold=1)
+    circuit.record_failure(DatabaseConnectError("refused"))
+
+    clock.now += 30
+    with pytest.raises(DatabaseUnavailable):
+        run(circuit.before_call())
+    assert circuit.state == CircuitState.OPEN
+    assert circuit.opened_at == clock.now
+
+    # Следующая проба — только через reset_timeout после неудачной
+    clock.now += 10
+    with pytest.raises(DatabaseUnavailable):
+        run(circuit.before_call())
+    assert probe.calls == 1
+
+
+def test_half_open_lets_one_probe_through(clock):
+    probe = Probe()
+    circuit = breaker(probe, threshold=1)
+    circuit.record_failure(DatabaseConnectError("refused"))
+    clock.now += 30
+
+    async def main():
+        probe.release = asyncio.Event()
+        first = asyncio.create_task(circuit.before_call())
+        await asyncio.sleep(0)
+        assert circuit.state == CircuitState.HALF_OPEN
+        # Пока идет проба, остальные вызывающие отклоняются сразу
+        with pytest.raises(DatabaseUnavailable):
+            await circuit.before_call()
+        probe.release.set()
+        await first
+
+    run(main())
+    assert probe.calls == 1
+    assert circuit.state == CircuitState.CLOSED
\ No newline at end of file
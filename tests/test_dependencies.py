@@ -0,0 +1,73 @@
+import asyncio
+import inspect
+
+import pytest
+from aiogram import flags
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.flags import extract_flags_from_object
+
+from app.middlewares import dependencies
+from app.middlewares.dependencies import Dependencies, inject
+
+
+@pytest.fixture
+def resolved(monkeypatch):
+    """Заглушки провайдеров: считают, сколько раз зависимость создавалась"""
+    calls = []
+
+    async def provide_db(deps):
+        calls.append("db")
+        return "session"
+
+    async def provide_user(deps):
+        calls.append("user")
+        await deps.get("db")
+        return None if deps.event == "anonymous" else "user"
+
+    monkeypatch.setitem(dependencies.PROVIDERS, "db", provide_db)
+    monkeypatch.setitem(dependencies.PROVIDERS, "user", provide_user)
+    return calls
+
+
+def call(handler, event="event", **data):
+    """Вызов так, как его делает aiogram: через HandlerObject и все данные апдейта"""
+    data.setdefault("deps", Dependencies(event))
+    return asyncio.run(HandlerObject(handler).call(event, **data))
+
+
+@inject
+@flags.chat_action("typing")
+async def needs_db(event, db, state=None):
+    """Документация обработчика"""
+    return {"db": db, "state": state}
+
+
+def test_wrapper_signature_and_metadata():
+    assert inspect.signature(needs_db) == dependencies.INJECTED_SIGNATURE
+    assert not hasattr(needs_db, "__wrapped__")
+    assert needs_db.__name__ == "needs_db"
+    assert needs_db.__doc__ == "Документация обработчика"
+    assert extract_flags_from_object(needs_db) == {"chat_action": "typing"}
+    assert HandlerObject(needs_db).varkw
+
+
+def test_only_declared_dependencies_are_resolved(resolved):
+    assert call(needs_db, state="fsm", user="ignored") == {"db": "session", "state": "fsm"}
+    assert resolved == ["db"]
+
+
+def test_dependencies_are_memoized_per_update(resolved):
+    @inject
+    async def handler(event, user, db):
+        return user, db
+
+    assert call(handler) == ("user", "session")
+    assert resolved == ["user", "db"]
+
+
+def test_auth_skips_handler_without_user(resolved):
+    @inject(auth=True)
+    async def handler(event, user):
+        raise AssertionError("обработчик не должен вызываться")
+
+    assert call(handler, event="anonymous") is None
\ No newline at end of file
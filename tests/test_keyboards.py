@@ -0,0 +1,52 @@
+import inspect
+from types import SimpleNamespace
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendMessage
+from pydantic import ValidationError
+
+from app.keyboards import inline
+
+CATEGORIES = [SimpleNamespace(id=i, icon="🍔", name=f"Категория {i}") for i in range(1, 8)]
+
+
+def test_static_keyboard_is_shared_and_frozen():
+    markup = inline.main_menu_keyboard()
+    assert markup is inline.main_menu_keyboard()
+    assert isinstance(markup.inline_keyboard, tuple)
+    with pytest.raises(ValidationError):
+        markup.inline_keyboard[0][0].text = "изменено"
+    with pytest.raises(ValidationError):
+        markup.inline_keyboard = ()
+    with pytest.raises(AttributeError):
+        markup.inline_keyboard[0].append(None)
+
+
+def test_dynamic_keyboard_is_cached_by_content():
+    first = inline.get_category_selection_keyboard(CATEGORIES, "expense")
+    assert inline.get_category_selection_keyboard(list(CATEGORIES), "expense") is first
+    renamed = [SimpleNamespace(id=1, icon="🍔", name="Еда"), *CATEGORIES[1:]]
+    assert inline.get_category_selection_keyboard(renamed, "expense") is not first
+    assert isinstance(first, inline.FrozenInlineKeyboardMarkup)
+
+
+@pytest.mark.parametrize("keyboard, args", [
+    (inline.settings_menu_keyboard, ()),
+    (inline.quick_amounts_keyboard, ("expense",)),
+])
+def test_frozen_keyboard_is_sent_like_a_regular_one(keyboard, args):
+    """В запрос к Bot API уходит та же клавиатура, без пустых полей"""
+    bot = Bot("123456:TEST")
+    session = AiohttpSession()
+
+    def reply_markup(markup):
+        method = SendMessage(chat_id=1, text="t", reply_markup=markup)
+        return session.prepare_value(method.model_dump(warnings=False)["reply_markup"], bot=bot, files={})
+
+    frozen = keyboard(*args)
+    regular = inspect.unwrap(keyboard)(*args)
+    assert not isinstance(regular, inline.FrozenInlineKeyboardMarkup)
+    assert reply_markup(frozen) == reply_markup(regular)
+    assert frozen.model_dump_json(exclude_none=True) == regular.model_dump_json(exclude_none=True)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.database import versions
+from app.database.crud import OperationCRUD
+from app.database.models import Category, Operation, User
+from app.schemas.operation import OperationUpdate
+from app.services.limits import counter_key, local_periods
+
+
+class StubRedis:
+    def __init__(self, error=None):
+        self.deleted = []
+        self.error = error
+
+    async def delete(self, *keys):
+        if self.error:
+            raise self.error
+        self.deleted.extend(keys)
+        return len(keys)
+
+
+@pytest.mark.parametrize("tz_name", ["Pacific/Kiritimati", "Etc/GMT+12", "Europe/Moscow", "UTC"])
+@pytest.mark.parametrize("hour", [0, 11, 23])
+def test_reset_covers_current_counters_in_any_timezone(tz_name, hour):
+    now = datetime(2024, 2, 29, hour, 30, tzinfo=timezone.utc)
+    counters = versions.LimitCounters(StubRedis())
+    keys = counters.current_keys(7, now)
+    day, month = local_periods(tz_name, now)
+    assert counter_key(7, day) in keys
+    assert counter_key(7, month) in keys
+
+
+def test_reset_deletes_counters_and_tolerates_redis_errors():
+    redis = StubRedis()
+    asyncio.run(versions.LimitCounters(redis).bump([1, 2]))
+    assert set(redis.deleted) == versions.limit_counters.current_keys(1) | versions.limit_counters.current_keys(2)
+    assert all(key.startswith(("limits:1:", "limits:2:")) for key in redis.deleted)
+
+    asyncio.run(versions.LimitCounters(StubRedis(RedisConnectionError("down"))).bump([1]))
+
+
+def test_update_and_delete_reset_counters_after_commit(pg_sessionmaker, monkeypatch):
+    reset = []
+    monkeypatch.setattr(versions.limit_counters, "_schedule_bump", lambda user_ids: reset.append(set(user_ids)))
+
+    async def main():
+        async with pg_sessionmaker() as db:
+            user, category = User(telegram_id=1, first_name="Test"), Category(name="Еда")
+            db.add_all([user, category])
+            await db.flush()
+            operation = Operation(
+                user_id=user.id, category_id=category.id, type="expense", amount=Decimal("100"),
+                occurred_at=datetime.now(timezone.utc) - timedelta(minutes=1),
+            )
+            db.add(operation)
+            await db.commit()
+            assert reset == []
+
+            await OperationCRUD.update(db, operation, OperationUpdate(amount=Decimal("250")))
+            after_update = list(reset)
+            await OperationCRUD.delete(db, operation)
+            return user.id, after_update
+
+    user_id, after_update = asyncio.run(main())
+    assert after_update == [{user_id}]
+    assert reset == [{user_id}, {user_id}]
\ No newline at end of file
@@ -0,0 +1,168 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import (
+    DeleteMessage,
+    EditMessageCaption,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    SendMessage,
+)
+from aiogram.types import Chat, InlineKeyboardButton, InlineKeyboardMarkup, Message
+
+from app.services import message_edits as message_edits_module
+from app.services.message_edits import EditDeduplicator
+from app.utils.metrics import metrics
+
+CHAT_ID, MESSAGE_ID = 42, 7
+
+KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Назад", callback_data="back")]])
+
+
+class FakeBotAPI:
+    """Заглушка Bot API: записывает методы и по заказу отвечает «message is not modified»"""
+
+    def __init__(self):
+        self.methods = []
+        self.not_modified = False
+
+    async def __call__(self, bot, method):
+        self.methods.append(type(method).__name__)
+        if isinstance(method, EditMessageText) and self.not_modified:
+            raise TelegramBadRequest(
+                method=method,
+                message="Bad Request: message is not modified: specified new message content "
+                        "and reply markup are exactly the same as a current content",
+            )
+        if isinstance(method, SendMessage):
+            return Message(
+                message_id=MESSAGE_ID,
+                date=datetime.now(timezone.utc),
+                chat=Chat(id=CHAT_ID, type="private"),
+                text=method.text,
+            )
+        return True
+
+
+class Clock:
+    """Заглушка time.monotonic для ttl отпечатков"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(message_edits_module, "time", clock)
+    return clock
+
+
+def edit(text="Баланс: 100₽", reply_markup=KEYBOARD):
+    return EditMessageText(chat_id=CHAT_ID, message_id=MESSAGE_ID, text=text, reply_markup=reply_markup)
+
+
+def run(dedup, api, *methods):
+    async def main():
+        return [await dedup(api, None, method) for method in methods]
+
+    return asyncio.run(main())
+
+
+def edits(result):
+    return metrics.get("message_edits_total", result=result)
+
+
+def test_same_render_is_skipped(clock):
+    dedup, api = EditDeduplicator(), FakeBotAPI()
+    skipped, sent = edits("skipped"), edits("sent")
+
+    assert run(dedup, api, edit(), edit(), edit()) == [True, True, True]
+    assert api.methods == ["EditMessageText"]
+    assert edits("skipped") == skipped + 2
+    assert edits("sent") == sent + 1
+
+
+def test_changed_text_or_keyboard_is_sent(clock):
+    dedup, api = EditDeduplicator(), FakeBotAPI()
+    run(dedup, api, edit(), edit(text="Баланс: 200₽"), edit(text="Баланс: 200₽", reply_markup=None))
+    assert api.methods == ["EditMessageText"] * 3
+
+
+def test_sent_message_is_remembered(clock):
+    dedup, api = EditDeduplicator(), FakeBotAPI()
+    skipped = edits("skipped")
+    send = SendMessage(chat_id=CHAT_ID, text="Баланс: 100₽", reply_markup=KEYBOARD)
+
+    run(dedup, api, send, edit())
+    assert api.methods == ["SendMessage"]
+    assert edits("skipped") == skipped + 1
+
+
+def test_not_modified_is_success(clock):
+    dedup, api = EditDeduplicator(), FakeBotAPI()
+    api.not_modified = True
+    not_modified, skipped = edits("not_modified"), edits("skipped")
+
+    # Сообщение уже так выглядит (например, после перезапуска бота):
+    # ошибка не доходит до обработчика, а отпечаток запоминается
+    assert run(dedup, api, edit(), edit()) == [True, True]
+    assert api.methods == ["EditMessageText"]
+    assert edits("not_modified") == not_modified + 1
+    assert edits("skipped") == skipped + 1
+
+
+def test_other_bad_requests_are_raised(clock):
+    dedup, api = EditDeduplicator(), FakeBotAPI()
+
+    async def fail(bot, method):
+        raise TelegramBadRequest(method=method, message="Bad Request: message to edit not found")
+
+    with pytest.raises(TelegramBadRequest):
+        run(dedup, fail, edit())
+    run(dedup, api, edit())
+    assert api.methods == ["EditMessageText"]
+
+
+@pytest.mark.parametrize("change", [
+    EditMessageCaption(chat_id=CHAT_ID, message_id=MESSAGE_ID, caption="Подпись"),
+    EditMessageReplyMarkup(chat_id=CHAT_ID, message_id=MESSAGE_ID, reply_markup=None),
+    DeleteMessage(chat_id=CHAT_ID, message_id=MESSAGE_ID),
+], ids=["caption", "markup", "delete"])
+def test_other_changes_forget_fingerprint(clock, change):
+    dedup, api = EditDeduplicator(), FakeBotAPI()
+    run(dedup, api, edit(), change, edit())
+    assert api.methods == ["EditMessageText", type(change).__name__, "EditMessageText"]
+
+
+def test_other_messages_are_independent(clock):
+    dedup, api = EditDeduplicator(), FakeBotAPI()
+    other = EditMessageText(chat_id=CHAT_ID, message_id=MESSAGE_ID + 1, text="Баланс: 100₽", reply_markup=KEYBOARD)
+    run(dedup, api, edit(), other, DeleteMessage(chat_id=CHAT_ID, message_id=MESSAGE_ID + 1), edit())
+    assert api.methods == ["EditMessageText", "EditMessageText", "DeleteMessage"]
+
+
+def test_fingerprint_expires_after_ttl(clock):
+    dedup, api = EditDeduplicator(ttl=60), FakeBotAPI()
+    run(dedup, api, edit())
+    clock.now += 59
+    run(dedup, api, edit())
+    assert api.methods == ["EditMessageText"]
+
+    clock.now += 61
+    run(dedup, api, edit())
+    assert api.methods == ["EditMessageText", "EditMessageText"]
+
+
+def test_lru_limits_size(clock):
+    dedup, api = EditDeduplicator(max_size=2), FakeBotAPI()
+    first, second, third = (
+        EditMessageText(chat_id=CHAT_ID, message_id=message_id, text="Меню") for message_id in (1, 2, 3)
+    )
+    run(dedup, api, first, second, third, first)
+    assert api.methods == ["EditMessageText"] * 4
\ No newline at end of file
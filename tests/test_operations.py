@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from app.database.crud import OperationCRUD
+from app.database.models import Category, User
+from app.schemas.operation import OperationCreate
+
+
+def test_create_does_not_touch_the_database_after_commit(pg_sessionmaker):
+    """Сбой после коммита нельзя отличить от незаписанной операции, поэтому после коммита запросов нет"""
+    engine = pg_sessionmaker.kw["bind"].sync_engine
+    events = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        events.append(statement.split()[0])
+
+    def commit(conn):
+        events.append("COMMIT")
+
+    async def main():
+        async with pg_sessionmaker() as db:
+            user, category = User(telegram_id=1, first_name="Test"), Category(name="Еда")
+            db.add_all([user, category])
+            await db.commit()
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "commit", commit)
+        try:
+            async with pg_sessionmaker() as db:
+                operation = await OperationCRUD.create(db, OperationCreate(
+                    amount=350.0, type="expense", occurred_at=datetime.now(timezone.utc),
+                    category_id=category.id, description="обед",
+                ), user.id)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+            event.remove(engine, "commit", commit)
+        return operation
+
+    operation = asyncio.run(main())
+    assert events[-1] == "COMMIT"
+    assert "SELECT" in events  # значения по умолчанию прочитаны до коммита
+    # Значения по умолчанию из БД доступны без нового запроса
+    assert operation.created_at is not None
+    assert operation.tag_list == []
\ No newline at end of file
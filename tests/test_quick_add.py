@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from app.database.crud import OperationCRUD
+from app.handlers import quick_add as quick_add_module
+from app.middlewares import dependencies
+from app.middlewares.dependencies import Dependencies
+from app.services.category_index import CategoryMatch
+from app.database.models import BudgetSpend, Category, Operation, User, Budget
+from app.schemas.operation import OperationCreate
+from app.utils.quick_add import parse_quick_add
+
+
+@pytest.mark.parametrize("text, amount, sign, description, tags", [
+    ("1200 обед", "1200", None, "обед", ()),
+    ("+5000 зарплата", "5000", "+", "зарплата", ()),
+    ("обед 350,50", "350.50", None, "обед", ()),
+    ("-1.5к такси #работа", "1500", "-", "такси", ("работа",)),
+    ("1 200 кофе", "1200", None, "кофе", ()),
+    ("12 000 500 x", "12000500", None, "x", ()),
+    ("100обед", "100", None, "обед", ()),
+    ("1200 р обед", "1200", None, "обед", ()),
+    ("250₽ кофе", "250", None, "кофе", ()),
+    ("3тыс подарок", "3000", None, "подарок", ()),
+    ("2k", "2000", None, "", ()),
+    ("1.5млн квартира", "1500000", None, "квартира", ()),
+    ("кофе 250 #работа #Утро", "250", None, "кофе", ("работа", "утро")),
+    ("#тег 300", "300", None, "", ("тег",)),
+    ("1.999 x", "2.00", None, "x", ()),
+    # Текущее поведение на краях: точка без цифр после нее — слово описания,
+    # а второй десятичный разделитель заканчивает число
+    ("12.", "12", None, ".", ()),
+    ("1,5,6 x", "1.50", None, ",6 x", ()),
+    # Знак, отделенный пробелом, к сумме не относится
+    ("+ 100", "100", None, "+", ()),
+])
+def test_parse_quick_add(text, amount, sign, description, tags):
+    parsed = parse_quick_add(text)
+    assert parsed is not None
+    assert parsed.amount == Decimal(amount)
+    assert parsed.sign == sign
+    assert parsed.description == description
+    assert parsed.tags == tags
+
+
+@pytest.mark.parametrize("text", ["обед", "", "0 обед", "99999999999 x", "#тег"])
+def test_parse_quick_add_rejects(text):
+    assert parse_quick_add(text) is None
+
+
+def test_quick_create_is_one_statement(pg_sessionmaker, sql_statements):
+    async def main():
+        async with pg_sessionmaker() as db:
+            user = User(telegram_id=1, first_name="Test")
+            category = Category(name="Еда")
+            db.add_all([user, category])
+            await db.flush()
+            db.add(Budget(
+                user_id=user.id, limit_amount=Decimal("1000"), period="monthly",
+                start_date=datetime(2020, 1, 1, tzinfo=timezone.utc),
+            ))
+            await db.commit()
+
+        async with pg_sessionmaker() as db:
+            sql_statements.clear()
+            operation_id = await OperationCRUD.quick_create(db, OperationCreate(
+                amount=1200.0, type="expense", occurred_at=datetime.now(timezone.utc),
+                category_id=category.id, description="обед", tag_list=["работа"],
+            ), user.id)
+            statements = len(sql_statements)
+
+        async with pg_sessionmaker() as db:
+            operation = await db.get(Operation, operation_id)
+            spent = await db.scalar(BudgetSpend.__table__.select().with_only_columns(BudgetSpend.spent))
+            return statements, operation, spent
+
+    statements, operation, spent = asyncio.run(main())
+    assert statements == 1
+    assert operation.description == "обед"
+    assert operation.tag_list == ["работа"]
+    assert spent == Decimal("1200")
+
+
+def test_steps_after_commit_are_best_effort(monkeypatch):
+    """Сбой после коммита не оставляет состояние и не теряет ответ"""
+    events = []
+
+    async def provide_db(deps):
+        return "session"
+
+    async def provide_user(deps):
+        return SimpleNamespace(id=7)
+
+    async def resolve(db, user_id, description, sign=None):
+        return CategoryMatch(3, False, "обед")
+
+    async def quick_create(db, operation_data, user_id):
+        events.append("commit")
+        return 1
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("down")
+
+    class State:
+        async def clear(self):
+            events.append("clear")
+
+    class Message:
+        text = "1200 обед"
+
+        async def answer(self, text, **kwargs):
+            events.append(text)
+
+    monkeypatch.setitem(dependencies.PROVIDERS, "db", provide_db)
+    monkeypatch.setitem(dependencies.PROVIDERS, "user", provide_user)
+    monkeypatch.setattr(quick_add_module.category_indexes, "resolve", resolve)
+    monkeypatch.setattr(OperationCRUD, "quick_create", quick_create)
+    monkeypatch.setattr(quick_add_module.categorizer, "learn", fail)
+    monkeypatch.setattr(quick_add_module.category_catalog, "get_or_load", fail)
+    monkeypatch.setattr(quick_add_module.spending_limits, "record_expense", fail)
+
+    message = Message()
+    asyncio.run(HandlerObject(quick_add_module.quick_add).call(
+        message, state=State(), deps=Dependencies(message)
+    ))
+    assert events[:2] == ["commit", "clear"]
+    assert "Неизвестная категория" in events[2]
\ No newline at end of file
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from app.database.crud import RECURRING_LOCK_KEY, OperationCRUD
+from app.database.models import Budget, BudgetSpend, Category, Operation, User
+
+
+async def seed(sessionmaker, now):
+    async with sessionmaker() as db:
+        user = User(telegram_id=1, first_name="Test")
+        category = Category(name="Подписки")
+        db.add_all([user, category])
+        await db.flush()
+        db.add(Budget(
+            user_id=user.id, limit_amount=Decimal("100000"), period="monthly",
+            start_date=now - timedelta(days=400),
+        ))
+        for period, days_ago in (("daily", 3.5), ("weekly", 15), ("monthly", 65)):
+            db.add(Operation(
+                user_id=user.id, category_id=category.id, type="expense", amount=Decimal("10"),
+                occurred_at=now - timedelta(days=days_ago), is_recurring=True, recurring_period=period,
+            ))
+        await db.commit()
+
+
+async def generated(db):
+    return (await db.execute(
+        select(Operation.recurring_template_id, func.count())
+        .where(Operation.recurring_template_id.isnot(None))
+        .group_by(Operation.recurring_template_id)
+        .order_by(Operation.recurring_template_id)
+    )).all()
+
+
+def test_materialize_is_idempotent(pg_sessionmaker, sql_statements):
+    async def main():
+        now = datetime.now(timezone.utc)
+        await seed(pg_sessionmaker, now)
+        async with pg_sessionmaker() as db:
+            sql_statements.clear()
+            first = await OperationCRUD.materialize_recurring(db, now)
+            statements = len(sql_statements)
+        async with pg_sessionmaker() as db:
+            second = await OperationCRUD.materialize_recurring(db, now)
+        async with pg_sessionmaker() as db:
+            return first, statements, second, await generated(db)
+
+    first, statements, second, per_template = asyncio.run(main())
+    # daily: 3 повторения, weekly: 2, monthly: 2
+    assert first == 7
+    assert [count for _, count in per_template] == [3, 2, 2]
+    assert second == 0
+    # Advisory-блокировка и одна вставка вместе с обновлением счетчиков
+    assert statements == 2
+
+
+def test_max_steps_limits_catch_up(pg_sessionmaker):
+    async def main():
+        now = datetime.now(timezone.utc)
+        await seed(pg_sessionmaker, now)
+        batches = []
+        while True:
+            async with pg_sessionmaker() as db:
+                batch = await OperationCRUD.materialize_recurring(db, now, max_steps=1)
+            batches.append(batch)
+            if not batch:
+                return batches
+
+    # За вызов каждый шаблон продвигается не больше чем на max_steps повторений
+    assert asyncio.run(main()) == [3, 3, 1, 0]
+
+
+def test_busy_lock_skips_generation(pg_sessionmaker):
+    async def main():
+        now = datetime.now(timezone.utc)
+        await seed(pg_sessionmaker, now)
+        async with pg_sessionmaker() as holder:
+            await holder.scalar(select(func.pg_advisory_xact_lock(RECURRING_LOCK_KEY)))
+            async with pg_sessionmaker() as db:
+                return await OperationCRUD.materialize_recurring(db, now)
+
+    assert asyncio.run(main()) is None
+
+
+def test_generated_expenses_update_budget_counter(pg_sessionmaker):
+    async def main():
+        now = datetime.now(timezone.utc)
+        await seed(pg_sessionmaker, now)
+        async with pg_sessionmaker() as db:
+            await OperationCRUD.materialize_recurring(db, now)
+        async with pg_sessionmaker() as db:
+            counted = await db.scalar(
+                select(func.sum(BudgetSpend.spent)).where(BudgetSpend.period_start == func.date_trunc("month", func.now()))
+            )
+            # Шаблоны добавлены в обход CRUD и в счетчиках не учтены
+            actual = await db.scalar(
+                select(func.sum(Operation.amount)).where(
+                    Operation.recurring_template_id.isnot(None),
+                    func.date_trunc("month", Operation.occurred_at) == func.date_trunc("month", func.now()),
+                )
+            )
+            return counted, actual
+
+    counted, actual = asyncio.run(main())
+    assert counted == actual
\ No newline at end of file
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.database import versions
+from app.services.report_cache import ReportCache
+from app.utils.metrics import metrics
+
+
+class StubVersions:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, user_id):
+        return self.values.get(user_id, 0)
+
+
+class Calls:
+    """load_user и build, которые считают вызовы"""
+
+    def __init__(self, expires_at=None):
+        self.users = 0
+        self.builds = 0
+        self.expires_at = expires_at or datetime.now(timezone.utc) + timedelta(days=1)
+
+    async def load_user(self):
+        self.users += 1
+        return SimpleNamespace(id=42)
+
+    async def build(self, user):
+        self.builds += 1
+        return self.expires_at, f"report {self.builds}"
+
+
+def test_hit_does_not_load_user():
+    cache, calls = ReportCache(StubVersions()), Calls()
+    hits = metrics.get("report_cache_total", report="report_month", result="hit")
+
+    async def main():
+        first = await cache.get_or_build(1, "report_month", calls.load_user, calls.build)
+        second = await cache.get_or_build(1, "report_month", calls.load_user, calls.build)
+        return first, second
+
+    assert asyncio.run(main()) == ("report 1", "report 1")
+    assert (calls.users, calls.builds) == (1, 1)
+    assert metrics.get("report_cache_total", report="report_month", result="hit") == hits + 1
+
+
+def test_version_change_rebuilds():
+    stub = StubVersions()
+    cache, calls = ReportCache(stub), Calls()
+
+    async def main():
+        await cache.get_or_build(1, "report_month", calls.load_user, calls.build)
+        stub.values[42] = 1
+        return await cache.get_or_build(1, "report_month", calls.load_user, calls.build)
+
+    assert asyncio.run(main()) == "report 2"
+
+
+def test_report_expires_at_period_end():
+    cache, calls = ReportCache(StubVersions()), Calls(datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    async def main():
+        await cache.get_or_build(1, "report_today", calls.load_user, calls.build)
+        return await cache.get_or_build(1, "report_today", calls.load_user, calls.build)
+
+    assert asyncio.run(main()) == "report 2"
+
+
+def test_unknown_user():
+    cache, calls = ReportCache(StubVersions()), Calls()
+
+    async def no_user():
+        return None
+
+    assert asyncio.run(cache.get_or_build(1, "report_month", no_user, calls.build)) is None
+    assert calls.builds == 0
+
+
+def test_commit_waits_for_version_bump(monkeypatch):
+    bumped = []
+
+    async def slow_bump(user_ids):
+        await asyncio.sleep(0.01)
+        bumped.extend(user_ids)
+
+    monkeypatch.setattr(versions.data_versions, "bump", slow_bump)
+
+    async def main():
+        async with versions.VersionedSession() as db:
+            versions.data_versions.touch(db, 7)
+            await db.commit()
+            return list(bumped)
+
+    assert asyncio.run(main()) == [7]
\ No newline at end of file
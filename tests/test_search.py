@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.database.crud import OperationCRUD
+from app.database.models import Category, Operation, User
+
+BASE = datetime(2024, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+async def seed(db):
+    """Пользователь с 25 операциями (по пять на одну и ту же минуту) и посторонний пользователь"""
+    user, other = User(telegram_id=1, first_name="Test"), User(telegram_id=2, first_name="Other")
+    transport = Category(name="Транспорт", is_income=False)
+    tree = Category(name="Ёлочные игрушки", is_income=False)
+    db.add_all([user, other, transport, tree])
+    await db.flush()
+    for i in range(25):
+        db.add(Operation(
+            user_id=user.id,
+            category_id=tree.id if i % 5 == 0 else transport.id,
+            type="expense",
+            amount=100 + i,
+            description="Такси домой" if i % 2 else "метро",
+            tag_list=["работа"] if i % 3 == 0 else [],
+            occurred_at=BASE - timedelta(minutes=i // 5),
+        ))
+    db.add(Operation(
+        user_id=other.id, category_id=transport.id, type="expense", amount=1,
+        description="Такси домой", tag_list=["работа"], occurred_at=BASE,
+    ))
+    await db.commit()
+    return user.id
+
+
+async def pages(db, user_id, limit=10, **filters):
+    """Все страницы поиска так, как их листает /search"""
+    result, after = [], None
+    while True:
+        rows = await OperationCRUD.search_operations(db, user_id, "", after=after, limit=limit, **filters)
+        page = rows[:limit]
+        result.append([row.id for row in page])
+        if len(rows) <= limit:
+            return result
+        after = (page[-1].occurred_at, page[-1].id)
+
+
+def test_keyset_pagination_walks_ties_once(pg_sessionmaker):
+    async def main():
+        async with pg_sessionmaker() as db:
+            user_id = await seed(db)
+            walked = await pages(db, user_id)
+            expected = await db.execute(
+                Operation.__table__.select()
+                .with_only_columns(Operation.id)
+                .where(Operation.user_id == user_id)
+                .order_by(Operation.occurred_at.desc(), Operation.id.desc())
+            )
+            return walked, expected.scalars().all()
+
+    walked, expected = asyncio.run(main())
+    assert [len(page) for page in walked] == [10, 10, 5]
+    assert [operation_id for page in walked for operation_id in page] == expected
+
+
+def test_filters_combine(pg_sessionmaker):
+    async def main():
+        async with pg_sessionmaker() as db:
+            user_id = await seed(db)
+            search = OperationCRUD.search_operations
+            return {
+                "all": len(await search(db, user_id, "", limit=100)),
+                "period": len(await search(db, user_id, "", start=BASE - timedelta(minutes=1), end=BASE, limit=100)),
+                "category": len(await search(db, user_id, "", category="елоч", limit=100)),
+                "tags": len(await search(db, user_id, "", tags=["работа"], limit=100)),
+                "category_and_tags": len(await search(db, user_id, "", category="тран", tags=["работа"], limit=100)),
+                "escaped": len(await search(db, user_id, "", category="%", limit=100)),
+            }
+
+    counts = asyncio.run(main())
+    assert counts == {
+        "all": 25,
+        "period": 5,  # конец периода не включается
+        "category": 5,  # «ё» в названии категории сравнивается как «е»
+        "tags": 9,
+        "category_and_tags": 7,
+        "escaped": 0,
+    }
+
+
+def test_text_search(pg_sessionmaker):
+    async def main():
+        async with pg_sessionmaker() as db:
+            if not await db.scalar(text("SELECT count(*) FROM pg_extension WHERE extname = 'pg_trgm'")):
+                return None
+            user_id = await seed(db)
+            search = OperationCRUD.search_operations
+            return {
+                query: len(await search(db, user_id, query, limit=100))
+                for query in ("такси", "домом", "такс", "метр", "самолет")
+            }
+
+    counts = asyncio.run(main())
+    if counts is None:
+        pytest.skip("pg_trgm недоступен")
+    assert counts == {
+        "такси": 12,
+        "домом": 12,  # стемминг
+        "такс": 12,  # часть слова через word_similarity
+        "метр": 13,
+        "самолет": 0,
+    }
\ No newline at end of file
@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import pytest
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.services.send_queue import SendQueue, broadcast_priority
+from app.utils.metrics import metrics
+
+
+class FakeBotAPI:
+    """Заглушка Bot API: записывает время запросов и по заказу отвечает 429"""
+
+    def __init__(self, retry_after=None):
+        self.calls = []
+        self.retry_after = dict(retry_after or {})  # chat_id -> сколько раз ответить 429
+
+    async def __call__(self, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        self.calls.append((time.monotonic(), chat_id))
+        if self.retry_after.get(chat_id):
+            self.retry_after[chat_id] -= 1
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0.2)
+        return True
+
+
+def send(queue, api, chat_id):
+    return queue(api, None, SendMessage(chat_id=chat_id, text="test"))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_global_rate_limits_requests_after_burst():
+    queue = SendQueue(rate=20, burst=5, chat_interval=0, group_interval=0)
+    api = FakeBotAPI()
+
+    async def main():
+        started = time.monotonic()
+        await asyncio.gather(*(send(queue, api, chat_id) for chat_id in range(1, 16)))
+        return started
+
+    started = run(main())
+    offsets = [at - started for at, _ in api.calls]
+    assert len(offsets) == 15
+    # Первые burst запросов уходят сразу, остальные 10 — со скоростью rate
+    assert max(offsets[:5]) < 0.05
+    assert offsets[-1] == pytest.approx(10 / 20, abs=0.1)
+
+
+def test_same_chat_requests_are_spaced():
+    queue = SendQueue(rate=1000, burst=1000, chat_interval=0.1, group_interval=0.3)
+    api = FakeBotAPI()
+
+    async def main():
+        await asyncio.gather(*(send(queue, api, 42) for _ in range(3)))
+        await asyncio.gather(*(send(queue, api, -100) for _ in range(2)))
+
+    run(main())
+    private = [at for at, chat_id in api.calls if chat_id == 42]
+    group = [at for at, chat_id in api.calls if chat_id == -100]
+    assert all(b - a >= 0.09 for a, b in zip(private, private[1:]))
+    assert group[1] - group[0] >= 0.29
+
+
+def test_other_chats_are_not_delayed_by_busy_chat():
+    queue = SendQueue(rate=1000, burst=1000, chat_interval=0.2, group_interval=0.2)
+    api = FakeBotAPI()
+
+    async def main():
+        started = time.monotonic()
+        await asyncio.gather(send(queue, api, 1), send(queue, api, 1), send(queue, api, 2))
+        return started
+
+    started = run(main())
+    second_chat = next(at for at, chat_id in api.calls if chat_id == 2)
+    assert second_chat - started < 0.05
+
+
+def test_retry_after_pauses_chat_and_retries():
+    queue = SendQueue(rate=1000, burst=1000, chat_interval=0, group_interval=0)
+    api = FakeBotAPI(retry_after={7: 1})
+
+    async def main():
+        return await send(queue, api, 7)
+
+    assert run(main()) is True
+    attempts = [at for at, chat_id in api.calls if chat_id == 7]
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.19
+
+
+def test_retry_after_gives_up_after_max_retries():
+    queue = SendQueue(rate=1000, burst=1000, chat_interval=0, group_interval=0, max_retries=1)
+    api = FakeBotAPI(retry_after={7: 5})
+
+    with pytest.raises(TelegramRetryAfter):
+        run(send(queue, api, 7))
+    assert len(api.calls) == 2
+
+
+def test_requests_without_chat_respect_global_pause():
+    queue = SendQueue(rate=1000, burst=1000)
+    api = FakeBotAPI(retry_after={None: 1})
+
+    async def main():
+        return await queue(api, None, AnswerCallbackQuery(callback_query_id="1"))
+
+    assert run(main()) is True
+    assert api.calls[1][0] - api.calls[0][0] >= 0.19
+
+
+def test_interactive_requests_overtake_broadcasts():
+    queue = SendQueue(rate=20, burst=1, chat_interval=0, group_interval=0)
+    api = FakeBotAPI()
+
+    async def broadcast(chat_id):
+        with broadcast_priority():
+            return await send(queue, api, chat_id)
+
+    async def main():
+        broadcasts = [asyncio.create_task(broadcast(chat_id)) for chat_id in range(1, 5)]
+        await asyncio.sleep(0.01)  # рассылка уже в очереди
+        await send(queue, api, 100)
+        await asyncio.gather(*broadcasts)
+
+    run(main())
+    order = [chat_id for _, chat_id in api.calls]
+    # Первый запрос рассылки забрал единственный токен, дальше интерактивный — вне очереди
+    assert order == [1, 100, 2, 3, 4]
+
+
+def test_retry_after_from_local_bot_api_server():
+    """Настоящая AiohttpSession против локального сервера Bot API, отвечающего 429"""
+    requests = []
+
+    async def send_message(request):
+        requests.append(time.monotonic())
+        if len(requests) == 1:
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1},
+            }, status=429)
+        return web.json_response({
+            "ok": True,
+            "result": {"message_id": 1, "date": 0, "chat": {"id": 7, "type": "private"}, "text": "test"},
+        })
+
+    async def main():
+        app = web.Application()
+        app.router.add_post("/bot{token}/sendMessage", send_message)
+        server = TestServer(app, host="127.0.0.1")
+        await server.start_server()
+        session = AiohttpSession(api=TelegramAPIServer.from_base(str(server.make_url("")).rstrip("/")))
+        queue = SendQueue(rate=1000, burst=1000, chat_interval=0, group_interval=0)
+        session.middleware(queue)
+        bot = Bot("123456:TEST", session=session)
+        before = metrics.get("telegram_retry_after_total", method="SendMessage")
+        try:
+            message = await bot.send_message(7, "test")
+        finally:
+            await session.close()
+            await server.close()
+        return message, metrics.get("telegram_retry_after_total", method="SendMessage") - before
+
+    message, retries = run(main())
+    assert message.message_id == 1
+    assert len(requests) == 2
+    assert requests[1] - requests[0] >= 0.99
+    assert retries == 1
\ No newline at end of file
@@ -0,0 +1,105 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from app.schemas.operation import OperationCreate
+from app.services import spool as spool_module
+from app.services.spool import OperationSpool, replay_spool
+
+
+def operation(amount=100.0, category_id=1):
+    return OperationCreate(
+        amount=amount,
+        type="expense",
+        occurred_at=datetime(2024, 5, 1, tzinfo=timezone.utc),
+        category_id=category_id,
+    )
+
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = OperationSpool()
+    spool.open(str(tmp_path / "spool.db"))
+    yield spool
+    spool.close()
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Заглушка БД: отвергает операции с category_id=404 и пользователя 0"""
+    saved = []
+
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    async def create_spooled(db, batch):
+        if any(item.operation.category_id == 404 for item in batch):
+            raise ValueError("violates foreign key constraint")
+        known = [item for item in batch if item.telegram_id != 0]
+        saved.extend(item.idempotency_key for item in known)
+        return len(known), [item.idempotency_key for item in batch if item.telegram_id == 0]
+
+    monkeypatch.setattr(spool_module, "get_async_session", session)
+    monkeypatch.setattr(spool_module.OperationCRUD, "create_spooled", create_spooled)
+    return saved
+
+
+def dead_keys(spool):
+    return {row[0] for row in spool._conn.execute("SELECT idempotency_key FROM dead_operations")}
+
+
+def test_size_is_tracked_without_query(spool):
+    async def main():
+        keys = [await spool.append(1, operation()) for _ in range(3)]
+        assert spool.size() == 3
+        await spool.remove(keys[:2])
+        assert spool.size() == 1
+
+    asyncio.run(main())
+
+
+def test_size_survives_reopen(spool, tmp_path):
+    asyncio.run(spool.append(1, operation()))
+    spool.close()
+    spool.open(str(tmp_path / "spool.db"))
+    assert spool.size() == 1
+
+
+def test_replay_drains_spool(spool, database):
+    async def main():
+        keys = [await spool.append(1, operation()) for _ in range(5)]
+        assert await replay_spool(spool, batch_size=2) == 5
+        return keys
+
+    keys = asyncio.run(main())
+    assert database == keys
+    assert spool.size() == 0
+
+
+def test_bad_row_goes_to_dead_letter_and_rest_is_saved(spool, database):
+    async def main():
+        good = await spool.append(1, operation())
+        bad = await spool.append(1, operation(category_id=404))
+        other = await spool.append(2, operation())
+        await replay_spool(spool)
+        return good, bad, other
+
+    good, bad, other = asyncio.run(main())
+    assert database == [good, other]
+    assert dead_keys(spool) == {str(bad)}
+    assert spool.size() == 0
+
+
+def test_unknown_user_is_dead_lettered(spool, database):
+    async def main():
+        key = await spool.append(0, operation())
+        await replay_spool(spool)
+        return key
+
+    key = asyncio.run(main())
+    assert database == []
+    assert dead_keys(spool) == {str(key)}
+    assert spool.size() == 0
\ No newline at end of file
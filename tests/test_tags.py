@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import select, text
+
+from app.database.crud import OperationCRUD
+from app.database.models import Category, Operation, User
+from app.services import tags as tags_module
+
+
+def seed(pg_sessionmaker, rows):
+    """Операции с парами (tag_list, tags); возвращает их id"""
+    async def main():
+        async with pg_sessionmaker() as db:
+            user, category = User(telegram_id=1, first_name="Test"), Category(name="Еда")
+            db.add_all([user, category])
+            await db.flush()
+            operations = [
+                Operation(
+                    user_id=user.id, category_id=category.id, type="expense", amount=Decimal("100"),
+                    occurred_at=datetime(2024, 5, 1, tzinfo=timezone.utc), tag_list=tag_list, tags=legacy,
+                )
+                for tag_list, legacy in rows
+            ]
+            db.add_all(operations)
+            await db.commit()
+            return [operation.id for operation in operations]
+
+    return asyncio.run(main())
+
+
+def tag_lists(pg_sessionmaker):
+    async def main():
+        async with pg_sessionmaker() as db:
+            rows = await db.execute(select(Operation.tag_list, Operation.tags).order_by(Operation.id))
+            return [tuple(row) for row in rows]
+
+    return asyncio.run(main())
+
+
+def test_backfill_does_not_duplicate_tags(pg_sessionmaker):
+    seed(pg_sessionmaker, [
+        (["работа"], '["Работа", "кофе"]'),
+        ([], "отпуск, море"),
+        (["кофе"], None),
+    ])
+
+    async def main():
+        async with pg_sessionmaker() as db:
+            return await OperationCRUD.backfill_tag_batch(db, 0)
+
+    assert asyncio.run(main()) is not None
+    assert tag_lists(pg_sessionmaker) == [
+        (["работа", "кофе"], None),
+        (["отпуск", "море"], None),
+        (["кофе"], None),
+    ]
+
+
+def test_run_tag_backfill_retries_locked_rows(pg_sessionmaker, monkeypatch):
+    locked_id, _ = seed(pg_sessionmaker, [([], '["кофе"]'), ([], '["работа"]')])
+
+    @asynccontextmanager
+    async def session():
+        async with pg_sessionmaker() as db:
+            yield db
+            await db.commit()
+
+    monkeypatch.setattr(tags_module, "get_async_session", session)
+
+    async def main():
+        async with pg_sessionmaker() as lock:
+            # Строка заблокирована чужой транзакцией: первый проход ее пропустит
+            await lock.execute(text("SELECT id FROM operations WHERE id = :id FOR UPDATE"), {"id": locked_id})
+            backfill = asyncio.create_task(tags_module.run_tag_backfill(recheck_interval=0.05))
+            await asyncio.sleep(0.3)
+            assert not backfill.done()
+            await lock.rollback()
+        await asyncio.wait_for(backfill, 5)
+
+    asyncio.run(main())
+    assert tag_lists(pg_sessionmaker) == [(["кофе"], None), (["работа"], None)]
\ No newline at end of file